@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta contra a LocalStack (SQS → Lambda Consumer → Java Processor → DynamoDB):
+1. Envia BENCH_MESSAGE_COUNT mensagens de INSERT à taxa BENCH_RATE (0 = o mais rápido possível)
+2. Cada mensagem leva o instante de envio no campo timestamp, que vira a chave de classificação (recordId)
+3. Latência de ponta a ponta = processedAt gravado pelo processador Java - instante de envio,
+   coletada por polling do DynamoDB com BatchGetItem (o intervalo de polling não afeta a medida)
+4. Vazão sustentada, taxa de DLQ, pico de backlog e tempo de drenagem da fila principal
+5. Resultado em JSON (stdout e, opcionalmente, BENCH_OUTPUT) para comparar configurações do consumidor
+
+Pare o message-producer durante a medição: mensagens de outros produtores distorcem backlog e DLQ.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+import boto3
+from botocore.config import Config
+
+# BatchSender e codec compartilhados, usados direto da árvore do repositório
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT_DIR, 'docker', 'common'))
+
+import codec
+from batch_sender import BatchSender
+from sqs_batch import backoff_delay
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Configurações AWS
+AWS_ENDPOINT_URL = os.environ.get('AWS_ENDPOINT_URL', 'http://localhost:4566')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'test')
+AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY', 'test')
+
+SQS_QUEUE_NAME = os.environ.get('SQS_QUEUE_NAME', 'message-processor-main')
+SQS_DLQ_NAME = os.environ.get('SQS_DLQ_NAME', 'message-processor-dlq')
+DYNAMODB_TABLE = os.environ.get('DYNAMODB_TABLE', 'message-processor-data')
+
+# Configurações do benchmark
+BENCH_MESSAGE_COUNT = int(os.environ.get('BENCH_MESSAGE_COUNT', '1000'))
+BENCH_RATE = float(os.environ.get('BENCH_RATE', '100'))  # Mensagens por segundo (0 = sem limite)
+BENCH_TICK_MS = int(os.environ.get('BENCH_TICK_MS', '100'))  # Intervalo entre envios com taxa limitada
+BENCH_SEND_CONCURRENCY = int(os.environ.get('BENCH_SEND_CONCURRENCY', '4'))  # Chamadas send_message_batch simultâneas
+BENCH_POLL_INTERVAL = float(os.environ.get('BENCH_POLL_INTERVAL', '1.0'))  # Segundos entre polls do DynamoDB e do SQS
+BENCH_TIMEOUT_SECONDS = float(os.environ.get('BENCH_TIMEOUT_SECONDS', '300'))  # Espera máxima após o fim do envio
+BENCH_LABEL = os.environ.get('BENCH_LABEL', '')  # Identificação da execução (ex.: CONSUMER_MODE=async)
+BENCH_OUTPUT = os.environ.get('BENCH_OUTPUT', '')  # Arquivo JSON com o resultado (opcional)
+
+DYNAMODB_BATCH_GET_MAX_KEYS = 100  # Limite do BatchGetItem por chamada
+UNPROCESSED_KEYS_MAX_RETRIES = 3  # Novas tentativas das UnprocessedKeys dentro de um poll
+UNLIMITED_CHUNK = 100  # Mensagens por envio quando BENCH_RATE=0
+
+def create_client(service):
+    """Cria um cliente boto3 para a LocalStack, com conexões para os envios simultâneos."""
+    return boto3.client(
+        service,
+        endpoint_url=AWS_ENDPOINT_URL,
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        config=Config(max_pool_connections=max(BENCH_SEND_CONCURRENCY, 10))
+    )
+
+def queue_depth(sqs, queue_url):
+    """Mensagens na fila: visíveis mais em processamento (recebidas e ainda não removidas)."""
+    attributes = sqs.get_queue_attributes(
+        QueueUrl=queue_url,
+        AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+    )['Attributes']
+    return int(attributes['ApproximateNumberOfMessages']) + int(attributes['ApproximateNumberOfMessagesNotVisible'])
+
+def parse_instant(value):
+    """Converte um Instant ISO-8601 do Java (ex.: 2024-01-01T00:00:00.123456789Z) em epoch."""
+    value = value.rstrip('Z')
+    if '.' in value:
+        seconds, fraction = value.split('.', 1)
+        value = f"{seconds}.{fraction[:6]}"  # datetime aceita no máximo microssegundos
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+def percentile(ordered, fraction):
+    """Percentil por posição mais próxima sobre uma lista já ordenada."""
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def build_insert_message(sent_at):
+    """Mensagem de INSERT no formato do processador Java, com o instante de envio no timestamp."""
+    message_id = str(uuid.uuid4())
+    return {
+        "id": message_id,
+        "timestamp": datetime.fromtimestamp(sent_at, timezone.utc).isoformat(),
+        "operation": "INSERT",
+        "name": "Benchmark User",
+        "email": f"bench-{message_id[:8]}@example.com",
+        "address": "Benchmark Street, 1",
+        "phone": "+5511999999999"
+    }
+
+class LatencyTracker(threading.Thread):
+    """Consulta no DynamoDB as chaves enviadas e ainda não vistas, registrando a latência de cada uma."""
+
+    def __init__(self, dynamodb, table_name, poll_interval):
+        super().__init__(name='dynamodb-poller', daemon=True)
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.poll_interval = poll_interval
+        self.latencies = []
+        self.last_processed_at = None
+        self._pending = {}  # (customerId, recordId) -> instante de envio
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def track(self, key, sent_at):
+        with self._lock:
+            self._pending[key] = sent_at
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            with self._lock:
+                keys = list(self._pending)
+            for start in range(0, len(keys), DYNAMODB_BATCH_GET_MAX_KEYS):
+                try:
+                    self._poll(keys[start:start + DYNAMODB_BATCH_GET_MAX_KEYS])
+                except Exception as e:
+                    logger.warning(f"Erro no BatchGetItem: {str(e)}")
+
+    def _poll(self, keys):
+        """BatchGetItem das chaves; UnprocessedKeys são repetidas com backoff e, esgotadas as tentativas,
+        continuam pendentes para o próximo poll."""
+        request = {
+            self.table_name: {
+                'Keys': [{'customerId': {'S': customer_id}, 'recordId': {'S': record_id}}
+                         for customer_id, record_id in keys],
+                'ProjectionExpression': 'customerId, recordId, processedAt'
+            }
+        }
+        for attempt in range(UNPROCESSED_KEYS_MAX_RETRIES + 1):
+            response = self.dynamodb.batch_get_item(RequestItems=request)
+            self._record(response.get('Responses', {}).get(self.table_name, []), time.time())
+            request = response.get('UnprocessedKeys') or {}
+            if not request.get(self.table_name, {}).get('Keys') or attempt == UNPROCESSED_KEYS_MAX_RETRIES:
+                break
+            time.sleep(backoff_delay(attempt))
+
+    def _record(self, items, observed_at):
+        for item in items:
+            key = (item['customerId']['S'], item['recordId']['S'])
+            with self._lock:
+                sent_at = self._pending.pop(key, None)
+            if sent_at is None:
+                continue
+            try:
+                processed_at = parse_instant(item['processedAt']['S'])
+            except (KeyError, ValueError):
+                # Sem processedAt legível, o momento em que o registro foi visto é o limite superior
+                processed_at = observed_at
+            self.latencies.append(max(0.0, processed_at - sent_at))
+            self.last_processed_at = max(self.last_processed_at or processed_at, processed_at)
+
+class QueueMonitor(threading.Thread):
+    """Amostra a profundidade da fila principal para medir o pico de backlog e o tempo de drenagem."""
+
+    def __init__(self, sqs, queue_url, poll_interval):
+        super().__init__(name='queue-monitor', daemon=True)
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.poll_interval = poll_interval
+        self.peak_backlog = 0
+        self.drained_at = None
+        self.send_finished_at = None  # Definido pelo benchmark ao terminar o envio
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                depth = queue_depth(self.sqs, self.queue_url)
+            except Exception as e:
+                logger.warning(f"Erro ao consultar a fila principal: {str(e)}")
+            else:
+                sampled_at = time.time()
+                self.peak_backlog = max(self.peak_backlog, depth)
+                if self.send_finished_at is not None and self.drained_at is None and depth == 0:
+                    self.drained_at = sampled_at
+            self._stop_event.wait(self.poll_interval)
+
+class E2EBenchmark:
+    """Envia as mensagens no ritmo configurado e acompanha o processamento até o fim ou o timeout."""
+
+    def __init__(self, sqs, dynamodb, queue_url, dlq_url):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.dlq_url = dlq_url
+        self.batch_sender = BatchSender(sqs, concurrency=BENCH_SEND_CONCURRENCY)
+        self.tracker = LatencyTracker(dynamodb, DYNAMODB_TABLE, BENCH_POLL_INTERVAL)
+        self.monitor = QueueMonitor(sqs, queue_url, BENCH_POLL_INTERVAL)
+        self.sent = 0
+        self.send_failed = 0
+
+    def send_chunk(self, count):
+        """Gera e envia `count` mensagens, registrando as aceitas pelo SQS no rastreador."""
+        sent_at = time.time()
+        messages = [build_insert_message(sent_at) for _ in range(count)]
+        entries = [{'Id': str(i), 'MessageBody': codec.dumps(message)} for i, message in enumerate(messages)]
+        successful, failed = self.batch_sender.send(self.queue_url, entries)
+        for entry_id in successful:
+            message = messages[int(entry_id)]
+            self.tracker.track((message['id'], message['timestamp']), sent_at)
+        self.sent += len(successful)
+        self.send_failed += len(failed)
+        if failed:
+            logger.warning(f"{len(failed)} mensagens recusadas pelo SQS: {list(failed.values())[:3]}")
+
+    def send_all(self):
+        """Envio com taxa limitada por ticks sem deriva: cada tick completa o total esperado até o momento."""
+        start = time.time()
+        generated = 0
+        tick = BENCH_TICK_MS / 1000.0
+        next_tick = start
+
+        while generated < BENCH_MESSAGE_COUNT:
+            if BENCH_RATE > 0:
+                expected = min(BENCH_MESSAGE_COUNT, int((time.time() - start) * BENCH_RATE) + 1)
+                count = expected - generated
+            else:
+                count = min(UNLIMITED_CHUNK, BENCH_MESSAGE_COUNT - generated)
+            if count > 0:
+                self.send_chunk(count)
+                generated += count
+            if BENCH_RATE > 0:
+                next_tick += tick
+                time.sleep(max(0.0, next_tick - time.time()))
+
+        return start, time.time()
+
+    def run(self):
+        dlq_before = queue_depth(self.sqs, self.dlq_url)
+        self.tracker.start()
+        self.monitor.start()
+
+        logger.info(f"Enviando {BENCH_MESSAGE_COUNT} mensagens "
+                    f"({'sem limite de taxa' if BENCH_RATE <= 0 else f'{BENCH_RATE:g} msg/s'})")
+        send_started_at, send_finished_at = self.send_all()
+        self.monitor.send_finished_at = send_finished_at
+        logger.info(f"Envio concluído em {send_finished_at - send_started_at:.1f}s: "
+                    f"{self.sent} enviadas, {self.send_failed} falhas")
+
+        # Aguardar até cada mensagem enviada estar no DynamoDB ou na DLQ e a fila drenar, ou o timeout
+        deadline = send_finished_at + BENCH_TIMEOUT_SECONDS
+        last_report = 0.0
+        while True:
+            pending = self.tracker.pending()
+            dlq_messages = self.dlq_messages(dlq_before)
+            if pending <= dlq_messages and self.monitor.drained_at is not None:
+                break
+            if time.time() >= deadline:
+                logger.warning(f"Timeout de {BENCH_TIMEOUT_SECONDS:g}s: {pending} mensagens fora do DynamoDB, "
+                               f"{dlq_messages} na DLQ")
+                break
+            if time.time() - last_report >= 5:
+                logger.info(f"Aguardando processamento: {pending} mensagens pendentes, "
+                            f"{len(self.tracker.latencies)} processadas, {dlq_messages} na DLQ")
+                last_report = time.time()
+            time.sleep(BENCH_POLL_INTERVAL)
+
+        self.tracker.stop()
+        self.monitor.stop()
+        self.tracker.join()
+        self.monitor.join()
+        return self.report(send_started_at, send_finished_at, dlq_messages)
+
+    def dlq_messages(self, dlq_before):
+        """Mensagens que chegaram à DLQ desde o início da execução."""
+        try:
+            return max(0, queue_depth(self.sqs, self.dlq_url) - dlq_before)
+        except Exception as e:
+            logger.warning(f"Erro ao consultar a DLQ: {str(e)}")
+            return 0
+
+    def report(self, send_started_at, send_finished_at, dlq_messages):
+        latencies = sorted(self.tracker.latencies)
+        processed = len(latencies)
+        last_processed_at = self.tracker.last_processed_at
+        processing_seconds = (last_processed_at - send_started_at) if last_processed_at else None
+        drained_at = self.monitor.drained_at
+
+        def latency_ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'label': BENCH_LABEL,
+            'started_at': datetime.fromtimestamp(send_started_at, timezone.utc).isoformat(),
+            'config': {
+                'message_count': BENCH_MESSAGE_COUNT,
+                'rate': BENCH_RATE,
+                'send_concurrency': BENCH_SEND_CONCURRENCY,
+                'poll_interval': BENCH_POLL_INTERVAL,
+                'timeout_seconds': BENCH_TIMEOUT_SECONDS
+            },
+            'sent': self.sent,
+            'send_failed': self.send_failed,
+            'processed': processed,
+            # Enviadas que não chegaram ao DynamoDB nem à DLQ até o fim da espera
+            'missing': max(0, self.sent - processed - dlq_messages),
+            'dlq_messages': dlq_messages,
+            'dlq_rate': dlq_messages / self.sent if self.sent else 0.0,
+            'send_seconds': round(send_finished_at - send_started_at, 3),
+            'send_throughput': round(self.sent / max(send_finished_at - send_started_at, 1e-9), 1),
+            # Vazão sustentada: mensagens gravadas pelo tempo entre o primeiro envio e a última gravação
+            'throughput': round(processed / processing_seconds, 1) if processing_seconds else 0.0,
+            'latency_ms': {
+                'p50': latency_ms(percentile(latencies, 0.50)),
+                'p90': latency_ms(percentile(latencies, 0.90)),
+                'p95': latency_ms(percentile(latencies, 0.95)),
+                'p99': latency_ms(percentile(latencies, 0.99)),
+                'max': latency_ms(latencies[-1] if latencies else None),
+                'mean': latency_ms(sum(latencies) / processed if processed else None)
+            },
+            'backlog': {
+                'peak': self.monitor.peak_backlog,
+                # Tempo do fim do envio até a fila principal ficar vazia (None se não drenou antes do timeout)
+                'drain_seconds': round(drained_at - send_finished_at, 3) if drained_at else None
+            }
+        }
+
+def main():
+    sqs = create_client('sqs')
+    dynamodb = create_client('dynamodb')
+
+    try:
+        queue_url = sqs.get_queue_url(QueueName=SQS_QUEUE_NAME)['QueueUrl']
+        dlq_url = sqs.get_queue_url(QueueName=SQS_DLQ_NAME)['QueueUrl']
+    except Exception as e:
+        logger.error(f"Erro ao obter as URLs das filas: {str(e)}")
+        sys.exit(1)
+
+    result = E2EBenchmark(sqs, dynamodb, queue_url, dlq_url).run()
+    output = json.dumps(result, indent=2)
+    print(output)
+    if BENCH_OUTPUT:
+        with open(BENCH_OUTPUT, 'w') as f:
+            f.write(output + '\n')
+        logger.info(f"Resultado gravado em {BENCH_OUTPUT}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Envio de mensagens ao SQS em lotes aceitos pelo send_message_batch:
+1. Empacotamento por quantidade (até 10 entradas) e por bytes acumulados (até 256 KB, incluindo atributos)
+2. Lotes enviados em paralelo por um pool de threads, sobre um cliente com pool de conexões
+3. Reenvio apenas das entradas Failed retentáveis, com backoff exponencial e jitter (execute_batch de sqs_batch)
+"""
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from sqs_batch import SQS_MAX_BATCH_ENTRIES, execute_batch
+
+logger = logging.getLogger(__name__)
+
+# Limite de bytes do SQS por chamada send_message_batch (o de entradas vem de sqs_batch)
+SQS_MAX_BATCH_BYTES = 256 * 1024
+
+def entry_size(entry):
+    """Bytes da entrada contabilizados pelo SQS: corpo mais nome, tipo e valor de cada atributo."""
+    size = len(entry['MessageBody'].encode('utf-8'))
+    for name, attribute in (entry.get('MessageAttributes') or {}).items():
+        value = attribute.get('StringValue', attribute.get('BinaryValue', ''))
+        size += len(name.encode('utf-8')) + len(attribute['DataType'].encode('utf-8'))
+        size += len(value.encode('utf-8')) if isinstance(value, str) else len(value)
+    return size
+
+def pack_entries(entries, max_entries=SQS_MAX_BATCH_ENTRIES, max_bytes=SQS_MAX_BATCH_BYTES):
+    """
+    Agrupa as entradas, na ordem, em lotes de até max_entries e max_bytes.
+    Retorna (lotes, grandes demais), onde grandes demais são as entradas que sozinhas excedem max_bytes.
+    """
+    batches = []
+    oversized = []
+    current = []
+    current_bytes = 0
+
+    for entry in entries:
+        size = entry_size(entry)
+        if size > max_bytes:
+            oversized.append(entry)
+            continue
+        if current and (len(current) == max_entries or current_bytes + size > max_bytes):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(entry)
+        current_bytes += size
+
+    if current:
+        batches.append(current)
+    return batches, oversized
+
+def too_long_failure(entry):
+    """Falha (não retentável) de uma entrada que sozinha excede o limite de bytes do lote."""
+    return {
+        'Id': entry['Id'], 'Code': 'MessageTooLong', 'SenderFault': True,
+        'Message': f"Entrada com {entry_size(entry)} bytes excede o limite de {SQS_MAX_BATCH_BYTES} bytes"
+    }
+
+class BatchSender:
+    """
+    Envia listas de entradas de qualquer tamanho com send_message_batch.
+    O cliente boto3 é thread-safe; max_pool_connections do cliente deve comportar `concurrency` chamadas.
+    """
+
+    def __init__(self, sqs, concurrency=4, max_retries=3):
+        self.sqs = sqs
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='send') \
+            if concurrency > 1 else None
+
+    def send(self, queue_url, entries):
+        """
+        Envia as entradas (Ids únicos dentro da lista) e retorna (successful, failed),
+        dicionários indexados pelo Id de cada entrada.
+        """
+        batches, oversized = pack_entries(entries)
+        successful = {}
+        failed = {}
+
+        for entry in oversized:
+            failed[entry['Id']] = too_long_failure(entry)
+
+        if self._executor is None or len(batches) <= 1:
+            results = [self._send_batch(queue_url, batch) for batch in batches]
+        else:
+            results = list(self._executor.map(lambda batch: self._send_batch(queue_url, batch), batches))
+
+        for batch_successful, batch_failed in results:
+            successful.update(batch_successful)
+            failed.update(batch_failed)
+        return successful, failed
+
+    def _send_batch(self, queue_url, batch):
+        """Envia um lote válido, repetindo apenas as entradas com falha retentável."""
+        return execute_batch(partial(self.sqs.send_message_batch, QueueUrl=queue_url), batch, self.max_retries)
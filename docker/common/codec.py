@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Codec JSON compartilhado pelo consumidor e pelos produtores:
+1. Usa o orjson quando instalado, com a biblioteca padrão (json) como alternativa
+2. Backend escolhido por JSON_CODEC: 'auto' (orjson se disponível), 'orjson' ou 'json'
+3. dumps retorna str (corpo de mensagem SQS) e dumps_bytes retorna bytes (corpo HTTP)
+4. raw_body converte o corpo SQS em bytes para repassá-lo sem decodificar e codificar de novo
+Este módulo fica em docker/common e é copiado para a imagem de cada serviço.
+"""
+import os
+import json
+
+# Backend do codec: 'auto', 'orjson' ou 'json'
+JSON_CODEC = os.environ.get('JSON_CODEC', 'auto').lower()
+
+JSON_CONTENT_TYPE = 'application/json'
+
+class StdlibCodec:
+    """Codec da biblioteca padrão, sempre disponível."""
+
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def dumps_bytes(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+class OrjsonCodec:
+    """
+    Codec baseado no orjson: gera bytes UTF-8 diretamente, sem espaços entre os separadores.
+    Levanta ImportError se o orjson não estiver instalado.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj):
+        return self._orjson.dumps(obj)
+
+CODECS = {
+    StdlibCodec.name: StdlibCodec,
+    OrjsonCodec.name: OrjsonCodec
+}
+
+def get_codec(name='auto'):
+    """Cria o codec pelo nome. 'auto' usa o orjson quando disponível e a biblioteca padrão caso contrário."""
+    if name == 'auto':
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return StdlibCodec()
+    if name not in CODECS:
+        raise ValueError(f"Codec JSON desconhecido: {name} (opções: auto, {', '.join(CODECS)})")
+    return CODECS[name]()
+
+def raw_body(body):
+    """Corpo de mensagem SQS (str) como bytes UTF-8, pronto para ser enviado sem parsing."""
+    return body.encode('utf-8') if isinstance(body, str) else body
+
+# Codec padrão do processo
+_default = get_codec(JSON_CODEC)
+name = _default.name
+loads = _default.loads
+dumps = _default.dumps
+dumps_bytes = _default.dumps_bytes
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark dos codecs JSON usados no caminho das mensagens:
+1. Payloads nos dois formatos dos produtores: processador Java (pequeno) e cliente (grande e aninhado)
+2. Mede dumps (produtor), loads, o ciclo loads + dumps_bytes (consumidor antes do repasse direto)
+   e raw_body (repasse do corpo SQS sem parsing)
+3. Compara todos os codecs disponíveis no ambiente (orjson é opcional)
+"""
+import os
+import json
+import time
+import uuid
+import random
+import statistics
+from datetime import datetime
+import codec
+
+# Configurações do benchmark
+CODEC_BENCH_ITERATIONS = int(os.environ.get('CODEC_BENCH_ITERATIONS', '20000'))  # Operações por medição
+CODEC_BENCH_REPEAT = int(os.environ.get('CODEC_BENCH_REPEAT', '5'))  # Medições por caso (usa a mediana)
+CODEC_BENCH_OUTPUT = os.environ.get('CODEC_BENCH_OUTPUT', '')  # Arquivo JSON com o resultado (opcional)
+
+def java_processor_payload(rng):
+    """Mensagem no formato do java-processor-producer.py."""
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "timestamp": datetime.now().isoformat(),
+        "operation": "INSERT",
+        "name": "Maria Oliveira",
+        "email": "maria.oliveira@example.com",
+        "address": "Rua das Flores, 123, São Paulo, SP 01234-567",
+        "phone": "+55 11 91234-5678"
+    }
+
+def customer_payload(rng):
+    """Mensagem de insert no formato do producer.py (generate_customer_data), sem depender do Faker."""
+    now = datetime.now().isoformat()
+    return {
+        "operation": "INSERT",
+        "data": {
+            "customerId": str(uuid.UUID(int=rng.getrandbits(128))),
+            "recordId": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": "Maria Oliveira",
+            "email": "maria.oliveira@example.com",
+            "address": {"street": "Rua das Flores, 123", "city": "São Paulo", "state": "SP", "zipCode": "01234-567"},
+            "phoneNumber": "+55 11 91234-5678",
+            "registrationDate": now,
+            "lastUpdated": now,
+            "preferences": {
+                "category": rng.choice(["electronics", "clothing", "books", "home", "sports"]),
+                "communicationChannel": rng.choice(["email", "sms", "push", "mail"]),
+                "frequency": rng.choice(["daily", "weekly", "monthly", "quarterly"])
+            },
+            "status": rng.choice(["active", "inactive", "pending"]),
+            "metadata": {
+                "deviceInfo": {"type": "mobile", "os": "Android", "browser": "Chrome"},
+                "sessionData": {
+                    "lastLogin": now,
+                    "ipAddress": "192.168.10.25",
+                    "userAgent": "Mozilla/5.0 (Linux; Android 13) AppleWebKit/537.36 (KHTML, like Gecko) "
+                                 "Chrome/112.0.0.0 Mobile Safari/537.36"
+                },
+                "analytics": {
+                    "visitCount": rng.randint(1, 100),
+                    "timeOnSite": rng.randint(60, 3600),
+                    "referrer": "https://www.example.com/categoria/produtos?pagina=2"
+                }
+            }
+        },
+        "timestamp": now
+    }
+
+PAYLOADS = {'java_processor': java_processor_payload, 'customer': customer_payload}
+
+def measure(fn, items):
+    """Executa fn sobre os itens CODEC_BENCH_REPEAT vezes e retorna a mediana em microssegundos por operação."""
+    samples = []
+    for _ in range(CODEC_BENCH_REPEAT):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        samples.append((time.perf_counter() - start) * 1e6 / len(items))
+    return statistics.median(samples)
+
+def available_codecs():
+    codecs = {}
+    for name in codec.CODECS:
+        try:
+            codecs[name] = codec.get_codec(name)
+        except ImportError:
+            print(f"Codec {name} indisponível neste ambiente")
+    return codecs
+
+def main():
+    rng = random.Random(42)
+    report = {}
+    codecs = available_codecs()
+
+    for payload_name, factory in PAYLOADS.items():
+        objects = [factory(rng) for _ in range(CODEC_BENCH_ITERATIONS)]
+        # Corpos como chegam do SQS: gerados pela biblioteca padrão, como os produtores faziam
+        bodies = [json.dumps(obj) for obj in objects]
+        report[payload_name] = {'body_bytes': statistics.mean(len(body.encode('utf-8')) for body in bodies)}
+
+        for name, instance in codecs.items():
+            report[payload_name][name] = {
+                'dumps_us': measure(instance.dumps, objects),
+                'loads_us': measure(instance.loads, bodies),
+                'roundtrip_us': measure(lambda body: instance.dumps_bytes(instance.loads(body)), bodies)
+            }
+        report[payload_name]['raw_body_us'] = measure(codec.raw_body, bodies)
+
+    print(f"Codecs JSON ({CODEC_BENCH_ITERATIONS} operações por medição, mediana de {CODEC_BENCH_REPEAT}, µs/operação)")
+    print(f"{'payload':<16}{'codec':<10}{'dumps':>10}{'loads':>10}{'ciclo':>10}")
+    for payload_name, results in report.items():
+        for name in codecs:
+            stats = results[name]
+            print(f"{payload_name:<16}{name:<10}{stats['dumps_us']:>10.2f}{stats['loads_us']:>10.2f}"
+                  f"{stats['roundtrip_us']:>10.2f}")
+        print(f"{payload_name:<16}{'raw_body':<10}{'':>10}{'':>10}{results['raw_body_us']:>10.2f}"
+              f"  (corpo médio de {results['body_bytes']:.0f} bytes)")
+
+    if CODEC_BENCH_OUTPUT:
+        with open(CODEC_BENCH_OUTPUT, 'w') as f:
+            json.dump({'iterations': CODEC_BENCH_ITERATIONS, 'repeat': CODEC_BENCH_REPEAT, 'payloads': report},
+                      f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Envelope de compressão dos corpos de mensagem SQS, compartilhado pelos produtores e pelo consumidor:
+1. Corpos a partir de um limite de tamanho são comprimidos (zlib, ou zstd se o pacote zstandard
+   estiver instalado) e codificados em base64, já que o corpo SQS precisa ser texto
+2. O algoritmo vai no atributo de mensagem 'content-encoding'; sem o atributo o corpo é JSON puro
+3. O corpo comprimido só é usado quando fica menor que o original
+4. decode_message restaura o corpo original no recebimento, antes de qualquer outra etapa
+"""
+import zlib
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENCODING_ATTRIBUTE = 'content-encoding'
+
+class ZlibAlgorithm:
+    name = 'zlib'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+class ZstdAlgorithm:
+    """Levanta ImportError se o pacote zstandard não estiver instalado."""
+
+    name = 'zstd'
+
+    def __init__(self, level=3):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+ALGORITHMS = {
+    ZlibAlgorithm.name: ZlibAlgorithm,
+    ZstdAlgorithm.name: ZstdAlgorithm
+}
+
+def get_algorithm(name, level=None):
+    """Cria o algoritmo pelo nome, com o nível padrão dele quando level não é informado."""
+    if name not in ALGORITHMS:
+        raise ValueError(f"Algoritmo de compressão desconhecido: {name} (opções: {', '.join(ALGORITHMS)})")
+    return ALGORITHMS[name]() if level is None else ALGORITHMS[name](level)
+
+class Compressor:
+    """Aplica o envelope de compressão aos corpos que atingem min_bytes."""
+
+    def __init__(self, algorithm='zlib', min_bytes=1024, level=None):
+        self.algorithm = get_algorithm(algorithm, level)
+        self.min_bytes = min_bytes
+
+    def encode(self, body):
+        """
+        Retorna (corpo, atributos de mensagem). Abaixo do limite, ou quando a compressão não reduz
+        o tamanho, o corpo segue sem alteração e sem atributos.
+        """
+        raw = body.encode('utf-8')
+        if len(raw) < self.min_bytes:
+            return body, {}
+
+        encoded = base64.b64encode(self.algorithm.compress(raw)).decode('ascii')
+        if len(encoded) >= len(raw):
+            return body, {}
+        return encoded, {ENCODING_ATTRIBUTE: {'DataType': 'String', 'StringValue': self.algorithm.name}}
+
+def message_encoding(message):
+    """Algoritmo informado no atributo content-encoding (formato da API do SQS ou do evento Lambda)."""
+    attributes = message.get('MessageAttributes') or {}
+    attribute = attributes.get(ENCODING_ATTRIBUTE)
+    if not attribute:
+        return None
+    return attribute.get('StringValue', attribute.get('stringValue'))
+
+_decoders = {}
+
+def decode_body(body, encoding):
+    """Restaura o corpo original de um envelope com o algoritmo informado."""
+    if encoding not in _decoders:
+        _decoders[encoding] = get_algorithm(encoding)
+    return _decoders[encoding].decompress(base64.b64decode(body)).decode('utf-8')
+
+def decode_message(message):
+    """
+    Substitui o corpo comprimido pelo original e remove o atributo content-encoding.
+    Um envelope inválido é mantido como recebido: o parsing falha adiante e a mensagem segue o
+    tratamento de erro normal (DLQ).
+    """
+    encoding = message_encoding(message)
+    if encoding is None:
+        return False
+    try:
+        message['Body'] = decode_body(message['Body'], encoding)
+    except Exception as e:
+        logger.error(f"Erro ao descomprimir mensagem {message.get('MessageId')} ({encoding}): {str(e)}")
+        return False
+    del message['MessageAttributes'][ENCODING_ATTRIBUTE]
+    return True
+
+def decode_messages(messages):
+    """Aplica decode_message a um lote. Retorna a quantidade de mensagens descomprimidas."""
+    return sum(1 for message in messages if decode_message(message))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Relatório do envelope de compressão por tamanho de mensagem:
+1. Mensagens de cliente (formato do producer.py, cerca de 1 KB) ampliadas com histórico até cada tamanho alvo
+2. Taxa de compressão (corpo final em base64 / corpo original) e custo de CPU para comprimir e descomprimir
+3. Efeito no SQS: blocos de 64 KB cobrados por mensagem e mensagens que cabem num lote de 256 KB
+4. Compara os algoritmos disponíveis no ambiente (zstd é opcional)
+"""
+import os
+import json
+import math
+import time
+import random
+import statistics
+import codec
+from compression import ALGORITHMS, Compressor, decode_body
+from codec_benchmark import customer_payload
+
+# Configurações do relatório
+COMPRESSION_BENCH_SIZES = [int(size) for size in
+                           os.environ.get('COMPRESSION_BENCH_SIZES', '1024,2048,4096,16384,65536,200000').split(',')]
+COMPRESSION_BENCH_SAMPLES = int(os.environ.get('COMPRESSION_BENCH_SAMPLES', '50'))  # Mensagens por tamanho
+COMPRESSION_BENCH_OUTPUT = os.environ.get('COMPRESSION_BENCH_OUTPUT', '')  # Arquivo JSON com o resultado (opcional)
+
+SQS_BILLING_CHUNK_BYTES = 64 * 1024  # Cada bloco de 64 KB conta como uma requisição
+SQS_MAX_BATCH_BYTES = 256 * 1024
+SQS_MAX_BATCH_ENTRIES = 10
+
+def message_of_size(rng, target_bytes):
+    """Mensagem de insert de cliente com histórico de registros até atingir target_bytes."""
+    message = customer_payload(rng)
+    history = []
+    message['data']['history'] = history
+    while len(codec.dumps(message).encode('utf-8')) < target_bytes:
+        history.append(customer_payload(rng)['data'])
+    return codec.dumps(message)
+
+def sqs_cost(body_bytes):
+    """Blocos de 64 KB cobrados e mensagens por lote send_message_batch para um corpo do tamanho informado."""
+    return math.ceil(body_bytes / SQS_BILLING_CHUNK_BYTES), min(SQS_MAX_BATCH_ENTRIES, int(SQS_MAX_BATCH_BYTES // body_bytes))
+
+def measure_size(compressor, bodies):
+    raw_sizes = []
+    encoded_sizes = []
+    compress_us = []
+    decompress_us = []
+    for body in bodies:
+        start = time.perf_counter()
+        encoded, attributes = compressor.encode(body)
+        compress_us.append((time.perf_counter() - start) * 1e6)
+        raw_sizes.append(len(body.encode('utf-8')))
+        encoded_sizes.append(len(encoded.encode('utf-8')))
+        if attributes:
+            start = time.perf_counter()
+            decode_body(encoded, compressor.algorithm.name)
+            decompress_us.append((time.perf_counter() - start) * 1e6)
+
+    raw_bytes = statistics.mean(raw_sizes)
+    encoded_bytes = statistics.mean(encoded_sizes)
+    raw_chunks, raw_per_batch = sqs_cost(raw_bytes)
+    encoded_chunks, encoded_per_batch = sqs_cost(encoded_bytes)
+    return {
+        'raw_bytes': raw_bytes,
+        'encoded_bytes': encoded_bytes,
+        'ratio': encoded_bytes / raw_bytes,
+        'compress_us': statistics.median(compress_us),
+        'decompress_us': statistics.median(decompress_us) if decompress_us else 0.0,
+        'raw_chunks': raw_chunks,
+        'encoded_chunks': encoded_chunks,
+        'raw_per_batch': raw_per_batch,
+        'encoded_per_batch': encoded_per_batch
+    }
+
+def available_algorithms():
+    algorithms = []
+    for name in ALGORITHMS:
+        try:
+            # Sem limite mínimo: o relatório mede todos os tamanhos
+            algorithms.append(Compressor(algorithm=name, min_bytes=0))
+        except ImportError:
+            print(f"Algoritmo {name} indisponível neste ambiente")
+    return algorithms
+
+def main():
+    rng = random.Random(42)
+    compressors = available_algorithms()
+    report = {}
+
+    for size in COMPRESSION_BENCH_SIZES:
+        bodies = [message_of_size(rng, size) for _ in range(COMPRESSION_BENCH_SAMPLES)]
+        report[size] = {compressor.algorithm.name: measure_size(compressor, bodies) for compressor in compressors}
+
+    print(f"Envelope de compressão ({COMPRESSION_BENCH_SAMPLES} mensagens por tamanho, CPU em µs por mensagem)")
+    print(f"{'alvo':>8} {'algoritmo':<10}{'original':>10}{'final':>10}{'taxa':>7}{'comprimir':>11}"
+          f"{'descomprimir':>14}{'blocos 64KB':>13}{'msgs/lote':>11}")
+    for size, results in report.items():
+        for name, stats in results.items():
+            print(f"{size:>8} {name:<10}{stats['raw_bytes']:>10.0f}{stats['encoded_bytes']:>10.0f}"
+                  f"{stats['ratio']:>7.2f}{stats['compress_us']:>11.1f}{stats['decompress_us']:>14.1f}"
+                  f"{stats['raw_chunks']:>6} → {stats['encoded_chunks']:<4}"
+                  f"{stats['raw_per_batch']:>5} → {stats['encoded_per_batch']:<4}")
+
+    if COMPRESSION_BENCH_OUTPUT:
+        with open(COMPRESSION_BENCH_OUTPUT, 'w') as f:
+            json.dump({'samples': COMPRESSION_BENCH_SAMPLES, 'sizes': report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Utilitários para operações em lote do SQS (send, delete e change visibility):
+1. Divisão das entradas em blocos de até 10 (limite do SQS por chamada)
+2. Tratamento da lista Failed da resposta, entrada por entrada
+3. Reenvio apenas das entradas com falha retentável, com backoff exponencial e jitter
+"""
+import time
+import random
+
+# Limite de entradas por chamada em lote imposto pelo SQS
+SQS_MAX_BATCH_ENTRIES = 10
+
+def chunked(items, size=SQS_MAX_BATCH_ENTRIES):
+    """Divide uma lista em blocos de no máximo `size` itens."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def is_retryable(failure):
+    """SenderFault indica erro na própria entrada (ex.: receipt handle inválido), que não adianta repetir."""
+    return not failure.get('SenderFault', False)
+
+def backoff_delay(attempt, base=0.1, cap=2.0):
+    """Backoff exponencial com full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def _collect_response(response, chunk, successful, failed):
+    """Registra o resultado de cada entrada do bloco e retorna as entradas a repetir."""
+    entries_by_id = {entry['Id']: entry for entry in chunk}
+    retry = []
+
+    for result in response.get('Successful', []):
+        successful[result['Id']] = result
+        failed.pop(result['Id'], None)
+
+    for failure in response.get('Failed', []):
+        failed[failure['Id']] = failure
+        if is_retryable(failure) and failure['Id'] in entries_by_id:
+            retry.append(entries_by_id[failure['Id']])
+
+    return retry
+
+def _collect_error(error, chunk, failed):
+    """Registra um erro da chamada inteira como falha retentável de todas as entradas do bloco."""
+    failure = {'Code': type(error).__name__, 'Message': str(error), 'SenderFault': False}
+    for entry in chunk:
+        failed[entry['Id']] = dict(failure, Id=entry['Id'])
+    return list(chunk)
+
+def execute_batch(call, entries, max_retries=3):
+    """
+    Executa uma operação em lote do SQS em blocos de 10, repetindo apenas as entradas Failed
+    retentáveis. `call` recebe Entries como argumento nomeado (ex.: partial de sqs.delete_message_batch).
+    Retorna (successful, failed), dicionários indexados pelo Id de cada entrada.
+    """
+    successful = {}
+    failed = {}
+    pending = list(entries)
+
+    for attempt in range(max_retries + 1):
+        retry = []
+        for chunk in chunked(pending):
+            try:
+                response = call(Entries=chunk)
+            except Exception as e:
+                retry.extend(_collect_error(e, chunk, failed))
+                continue
+            retry.extend(_collect_response(response, chunk, successful, failed))
+
+        if not retry or attempt == max_retries:
+            break
+        time.sleep(backoff_delay(attempt))
+        pending = retry
+
+    return successful, failed
+
+async def execute_batch_async(call, entries, max_retries=3):
+    """Versão assíncrona de execute_batch, para clientes aiobotocore."""
+    successful = {}
+    failed = {}
+    pending = list(entries)
+
+    for attempt in range(max_retries + 1):
+        retry = []
+        for chunk in chunked(pending):
+            try:
+                response = await call(Entries=chunk)
+            except Exception as e:
+                retry.extend(_collect_error(e, chunk, failed))
+                continue
+            retry.extend(_collect_response(response, chunk, successful, failed))
+
+        if not retry or attempt == max_retries:
+            break
+        # Import tardio: o asyncio só é necessário na engine assíncrona e pesa no cold start
+        import asyncio
+        await asyncio.sleep(backoff_delay(attempt))
+        pending = retry
+
+    return successful, failed
@@ -8,6 +8,7 @@ import lombok.extern.slf4j.Slf4j;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
 
+import java.util.List;
 import java.util.concurrent.CompletableFuture;
 
 @RestController
@@ -29,6 +30,14 @@ public class ProcessorController {
         return ResponseEntity.ok(response);
     }
 
+    @PostMapping("/batch")
+    @Timed(value = "process.batch", description = "Time taken to process a batch of messages")
+    public ResponseEntity<List<ProcessResponse>> processBatch(@RequestBody List<ProcessRequest> requests) {
+        log.info("Received request to process batch with {} messages", requests.size());
+        List<ProcessResponse> responses = processorService.processBatch(requests);
+        return ResponseEntity.ok(responses);
+    }
+
     @PostMapping("/async")
     public CompletableFuture<ResponseEntity<ProcessResponse>> processMessageAsync(@RequestBody ProcessRequest request) {
         log.info("Received async request to process message: {}", request.getId());
@@ -17,4 +17,5 @@ public class ProcessRequest {
     private String email;
     private String address;
     private String phone;
+    private String messageId;  // MessageId do SQS, usado para correlacionar respostas do processamento em lote
 }
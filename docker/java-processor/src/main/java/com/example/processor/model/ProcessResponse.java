@@ -17,4 +17,5 @@ public class ProcessResponse {
     private String status;
     private Instant processedAt;
     private String message;
+    private String messageId;  // MessageId do SQS recebido na requisição, quando informado
 }
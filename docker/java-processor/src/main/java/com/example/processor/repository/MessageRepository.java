@@ -9,14 +9,26 @@ import software.amazon.awssdk.enhanced.dynamodb.DynamoDbEnhancedClient;
 import software.amazon.awssdk.enhanced.dynamodb.DynamoDbTable;
 import software.amazon.awssdk.enhanced.dynamodb.Key;
 import software.amazon.awssdk.enhanced.dynamodb.TableSchema;
+import software.amazon.awssdk.enhanced.dynamodb.model.BatchWriteItemEnhancedRequest;
+import software.amazon.awssdk.enhanced.dynamodb.model.BatchWriteResult;
+import software.amazon.awssdk.enhanced.dynamodb.model.WriteBatch;
+import software.amazon.awssdk.services.dynamodb.model.AttributeValue;
 
 import javax.annotation.PostConstruct;
 import java.time.Instant;
 import java.time.temporal.ChronoUnit;
+import java.util.ArrayList;
+import java.util.HashSet;
+import java.util.List;
+import java.util.Set;
 
 @Repository
 public class MessageRepository {
 
+    // Limite de itens por chamada BatchWriteItem do DynamoDB
+    public static final int MAX_BATCH_WRITE_ITEMS = 25;
+    private static final int MAX_BATCH_WRITE_RETRIES = 3;
+
     private final DynamoDbEnhancedClient dynamoDbEnhancedClient;
     private DynamoDbTable<MessageData> table;
 
@@ -42,13 +54,7 @@ public class MessageRepository {
     }
 
     public MessageData save(MessageData messageData) {
-        // Definir o tempo de expiração (TTL) para 7 dias a partir de agora
-        if (messageData.getExpiryTime() == null) {
-            messageData.setExpiryTime(Instant.now().plus(7, ChronoUnit.DAYS).getEpochSecond());
-        }
-        
-        // Registrar o momento do processamento
-        messageData.setProcessedAt(Instant.now());
+        prepareForSave(messageData);
         
         try {
             // Salvar no DynamoDB
@@ -94,4 +100,107 @@ public class MessageRepository {
             throw e;
         }
     }
+
+    /**
+     * Grava inserções e exclusões com BatchWriteItem, em chamadas de até 25 itens,
+     * reenviando os itens não processados. Os itens a excluir precisam ter apenas a chave.
+     * Uma mesma chave não pode aparecer duas vezes na mesma chamada.
+     * Retorna as chaves (ver {@link #itemKey}) que não puderam ser gravadas.
+     */
+    public Set<String> batchWrite(List<MessageData> itemsToSave, List<MessageData> itemsToDelete) {
+        itemsToSave.forEach(this::prepareForSave);
+        
+        Set<String> failedKeys = new HashSet<>();
+        int total = itemsToSave.size() + itemsToDelete.size();
+        
+        for (int start = 0; start < total; start += MAX_BATCH_WRITE_ITEMS) {
+            List<MessageData> puts = new ArrayList<>();
+            List<Key> deletes = new ArrayList<>();
+            
+            for (int i = start; i < Math.min(start + MAX_BATCH_WRITE_ITEMS, total); i++) {
+                if (i < itemsToSave.size()) {
+                    puts.add(itemsToSave.get(i));
+                } else {
+                    MessageData item = itemsToDelete.get(i - itemsToSave.size());
+                    deletes.add(buildKey(item.getCustomerId(), item.getRecordId()));
+                }
+            }
+            
+            failedKeys.addAll(writeChunk(puts, deletes));
+        }
+        
+        return failedKeys;
+    }
+
+    public static String itemKey(String customerId, String recordId) {
+        return customerId + "#" + recordId;
+    }
+
+    private Set<String> writeChunk(List<MessageData> puts, List<Key> deletes) {
+        List<MessageData> pendingPuts = puts;
+        List<Key> pendingDeletes = deletes;
+        
+        try {
+            for (int attempt = 0; attempt <= MAX_BATCH_WRITE_RETRIES; attempt++) {
+                if (pendingPuts.isEmpty() && pendingDeletes.isEmpty()) {
+                    break;
+                }
+                if (attempt > 0) {
+                    // Backoff exponencial antes de reenviar os itens não processados
+                    Thread.sleep(50L << attempt);
+                }
+                
+                WriteBatch.Builder<MessageData> batch = WriteBatch.builder(MessageData.class)
+                        .mappedTableResource(table);
+                pendingPuts.forEach(batch::addPutItem);
+                pendingDeletes.forEach(batch::addDeleteItem);
+                
+                BatchWriteResult result = dynamoDbEnhancedClient.batchWriteItem(
+                        BatchWriteItemEnhancedRequest.builder().writeBatches(batch.build()).build());
+                
+                List<MessageData> unprocessedPuts = result.unprocessedPutItemsForTable(table);
+                List<Key> unprocessedDeletes = result.unprocessedDeleteItemsForTable(table);
+                
+                // Incrementar contadores apenas com os itens efetivamente gravados
+                dynamoDbInsertCounter.increment(pendingPuts.size() - unprocessedPuts.size());
+                dynamoDbDeleteCounter.increment(pendingDeletes.size() - unprocessedDeletes.size());
+                
+                pendingPuts = unprocessedPuts;
+                pendingDeletes = unprocessedDeletes;
+            }
+        } catch (InterruptedException e) {
+            Thread.currentThread().interrupt();
+        } catch (Exception e) {
+            // Os itens ainda pendentes são reportados como falha abaixo
+        }
+        
+        Set<String> failedKeys = new HashSet<>();
+        pendingPuts.forEach(item -> failedKeys.add(itemKey(item.getCustomerId(), item.getRecordId())));
+        pendingDeletes.forEach(key -> failedKeys.add(itemKey(
+                key.partitionKeyValue().s(),
+                key.sortKeyValue().map(AttributeValue::s).orElse(null))));
+        
+        if (!failedKeys.isEmpty()) {
+            // Incrementar contador de erros com os itens que não foram gravados
+            dynamoDbErrorCounter.increment(failedKeys.size());
+        }
+        return failedKeys;
+    }
+
+    private void prepareForSave(MessageData messageData) {
+        // Definir o tempo de expiração (TTL) para 7 dias a partir de agora
+        if (messageData.getExpiryTime() == null) {
+            messageData.setExpiryTime(Instant.now().plus(7, ChronoUnit.DAYS).getEpochSecond());
+        }
+        
+        // Registrar o momento do processamento
+        messageData.setProcessedAt(Instant.now());
+    }
+
+    private Key buildKey(String customerId, String recordId) {
+        return Key.builder()
+                .partitionValue(customerId)
+                .sortValue(recordId)
+                .build();
+    }
 }
@@ -11,6 +11,11 @@ import lombok.extern.slf4j.Slf4j;
 import org.springframework.stereotype.Service;
 
 import java.time.Instant;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.HashSet;
+import java.util.List;
+import java.util.Set;
 import java.util.concurrent.CompletableFuture;
 
 @Service
@@ -21,6 +26,7 @@ public class MessageProcessorService {
     private final Counter sqsMessageReceivedCounter;
     private final Counter sqsMessageErrorCounter;
     private final Timer processMessageTimer;
+    private final Timer processBatchTimer;
 
     public MessageProcessorService(MessageRepository messageRepository, 
                                  Counter sqsMessageReceivedCounter,
@@ -32,6 +38,9 @@ public class MessageProcessorService {
         this.processMessageTimer = Timer.builder("process_message_seconds")
                 .description("Time taken to process a message")
                 .register(meterRegistry);
+        this.processBatchTimer = Timer.builder("process_batch_seconds")
+                .description("Time taken to process a batch of messages")
+                .register(meterRegistry);
     }
 
     public ProcessResponse processMessage(ProcessRequest request) {
@@ -78,11 +87,111 @@ public class MessageProcessorService {
         return CompletableFuture.supplyAsync(() -> processMessage(request));
     }
 
-    private ProcessResponse handleInsert(ProcessRequest request) {
-        log.debug("Handling INSERT operation for ID: {}", request.getId());
+    /**
+     * Processa um lote de mensagens gravando no DynamoDB com BatchWriteItem em vez de
+     * um putItem/deleteItem por mensagem. As respostas seguem a ordem das requisições.
+     * Exclusões no lote não consultam o item antes (DeleteItem é idempotente).
+     */
+    public List<ProcessResponse> processBatch(List<ProcessRequest> requests) {
+        log.info("Processing batch with {} messages", requests.size());
         
-        // Converter request para MessageData
-        MessageData messageData = MessageData.builder()
+        return processBatchTimer.record(() -> {
+            ProcessResponse[] responses = new ProcessResponse[requests.size()];
+            List<Integer> chunk = new ArrayList<>();
+            Set<String> chunkKeys = new HashSet<>();
+            
+            for (int i = 0; i < requests.size(); i++) {
+                ProcessRequest request = requests.get(i);
+                sqsMessageReceivedCounter.increment();
+                
+                if (!isInsert(request) && !isDelete(request)) {
+                    log.warn("Unknown operation: {}", request.getOperation());
+                    sqsMessageErrorCounter.increment();
+                    responses[i] = batchResponse(request, "ERROR", "Unknown operation");
+                    continue;
+                }
+                
+                // BatchWriteItem não aceita duas operações sobre a mesma chave na mesma chamada,
+                // então uma chave repetida inicia uma nova chamada (mantendo a ordem das operações)
+                String key = MessageRepository.itemKey(request.getId(), request.getTimestamp());
+                if (chunk.size() == MessageRepository.MAX_BATCH_WRITE_ITEMS || chunkKeys.contains(key)) {
+                    writeBatchChunk(requests, chunk, responses);
+                    chunk.clear();
+                    chunkKeys.clear();
+                }
+                chunk.add(i);
+                chunkKeys.add(key);
+            }
+            
+            if (!chunk.isEmpty()) {
+                writeBatchChunk(requests, chunk, responses);
+            }
+            return Arrays.asList(responses);
+        });
+    }
+
+    private void writeBatchChunk(List<ProcessRequest> requests, List<Integer> chunk, ProcessResponse[] responses) {
+        List<MessageData> itemsToSave = new ArrayList<>();
+        List<MessageData> itemsToDelete = new ArrayList<>();
+        
+        for (int index : chunk) {
+            ProcessRequest request = requests.get(index);
+            if (isInsert(request)) {
+                itemsToSave.add(toMessageData(request));
+            } else {
+                itemsToDelete.add(MessageData.builder()
+                        .customerId(request.getId())
+                        .recordId(request.getTimestamp())
+                        .build());
+            }
+        }
+        
+        Set<String> failedKeys;
+        String errorMessage = "Batch write failed";
+        try {
+            failedKeys = messageRepository.batchWrite(itemsToSave, itemsToDelete);
+        } catch (Exception e) {
+            log.error("Error writing batch: {}", e.getMessage(), e);
+            errorMessage = "Error: " + e.getMessage();
+            failedKeys = new HashSet<>();
+            for (int index : chunk) {
+                failedKeys.add(MessageRepository.itemKey(requests.get(index).getId(), requests.get(index).getTimestamp()));
+            }
+        }
+        
+        for (int index : chunk) {
+            ProcessRequest request = requests.get(index);
+            if (failedKeys.contains(MessageRepository.itemKey(request.getId(), request.getTimestamp()))) {
+                sqsMessageErrorCounter.increment();
+                responses[index] = batchResponse(request, "ERROR", errorMessage);
+            } else {
+                responses[index] = batchResponse(request, "SUCCESS",
+                        isInsert(request) ? "Data inserted successfully" : "Data deleted successfully");
+            }
+        }
+    }
+
+    private ProcessResponse batchResponse(ProcessRequest request, String status, String message) {
+        return ProcessResponse.builder()
+                .id(request.getId())
+                .messageId(request.getMessageId())
+                .operation(request.getOperation())
+                .status(status)
+                .processedAt(Instant.now())
+                .message(message)
+                .build();
+    }
+
+    private boolean isInsert(ProcessRequest request) {
+        return "INSERT".equalsIgnoreCase(request.getOperation());
+    }
+
+    private boolean isDelete(ProcessRequest request) {
+        return "DELETE".equalsIgnoreCase(request.getOperation());
+    }
+
+    private MessageData toMessageData(ProcessRequest request) {
+        return MessageData.builder()
                 .customerId(request.getId())
                 .recordId(request.getTimestamp())
                 .operation(request.getOperation())
@@ -92,6 +201,13 @@ public class MessageProcessorService {
                 .phone(request.getPhone())
                 .processedAt(Instant.now())
                 .build();
+    }
+
+    private ProcessResponse handleInsert(ProcessRequest request) {
+        log.debug("Handling INSERT operation for ID: {}", request.getId());
+        
+        // Converter request para MessageData
+        MessageData messageData = toMessageData(request);
         
         try {
             // Salvar no DynamoDB
@@ -13,12 +13,15 @@ import org.springframework.http.HttpStatus;
 import org.springframework.http.ResponseEntity;
 
 import java.time.Instant;
+import java.util.Collections;
+import java.util.List;
 import java.util.UUID;
 import java.util.concurrent.CompletableFuture;
 
 import static org.junit.jupiter.api.Assertions.assertEquals;
 import static org.junit.jupiter.api.Assertions.assertNotNull;
 import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.ArgumentMatchers.anyList;
 import static org.mockito.Mockito.when;
 
 @ExtendWith(MockitoExtension.class)
@@ -84,6 +87,20 @@ public class ProcessorControllerTest {
         assertEquals(successResponse, response.getBody());
     }
 
+    @Test
+    void processBatch() {
+        // Arrange
+        when(messageProcessorService.processBatch(anyList())).thenReturn(Collections.singletonList(successResponse));
+
+        // Act
+        ResponseEntity<List<ProcessResponse>> response = processorController.processBatch(Collections.singletonList(request));
+
+        // Assert
+        assertNotNull(response);
+        assertEquals(HttpStatus.OK, response.getStatusCode());
+        assertEquals(Collections.singletonList(successResponse), response.getBody());
+    }
+
     @Test
     void healthCheck() {
         // Act
@@ -11,12 +11,18 @@ import org.springframework.test.util.ReflectionTestUtils;
 import software.amazon.awssdk.enhanced.dynamodb.DynamoDbEnhancedClient;
 import software.amazon.awssdk.enhanced.dynamodb.DynamoDbTable;
 import software.amazon.awssdk.enhanced.dynamodb.Key;
+import software.amazon.awssdk.enhanced.dynamodb.TableSchema;
+import software.amazon.awssdk.enhanced.dynamodb.model.BatchWriteItemEnhancedRequest;
+import software.amazon.awssdk.enhanced.dynamodb.model.BatchWriteResult;
 
 import java.time.Instant;
+import java.util.Collections;
+import java.util.Set;
 import java.util.UUID;
 
 import static org.junit.jupiter.api.Assertions.*;
 import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.ArgumentMatchers.anyDouble;
 import static org.mockito.Mockito.*;
 
 @ExtendWith(MockitoExtension.class)
@@ -139,4 +145,47 @@ public class MessageRepositoryTest {
         assertThrows(RuntimeException.class, () -> messageRepository.findById(customerId, recordId));
         verify(dynamoDbErrorCounter, times(1)).increment();
     }
+    
+    @Test
+    void testBatchWriteIncrementsCountersForWrittenItems() {
+        // Arrange - o WriteBatch usa o schema e o nome da tabela para montar as requisições
+        lenient().doReturn(TableSchema.fromBean(MessageData.class)).when(table).tableSchema();
+        lenient().doReturn("messages-table").when(table).tableName();
+        doReturn(BatchWriteResult.builder().unprocessedRequests(Collections.emptyMap()).build())
+            .when(dynamoDbEnhancedClient).batchWriteItem(any(BatchWriteItemEnhancedRequest.class));
+        
+        MessageData toDelete = MessageData.builder()
+                .customerId(UUID.randomUUID().toString())
+                .recordId(recordId)
+                .build();
+        
+        // Act
+        Set<String> failedKeys = messageRepository.batchWrite(
+                Collections.singletonList(messageData), Collections.singletonList(toDelete));
+        
+        // Assert
+        assertTrue(failedKeys.isEmpty());
+        assertNotNull(messageData.getExpiryTime());
+        verify(dynamoDbEnhancedClient, times(1)).batchWriteItem(any(BatchWriteItemEnhancedRequest.class));
+        verify(dynamoDbInsertCounter, times(1)).increment(1.0);
+        verify(dynamoDbDeleteCounter, times(1)).increment(1.0);
+        verify(dynamoDbErrorCounter, never()).increment(anyDouble());
+    }
+    
+    @Test
+    void testBatchWriteReportsFailedKeysOnException() {
+        // Arrange
+        lenient().doReturn(TableSchema.fromBean(MessageData.class)).when(table).tableSchema();
+        lenient().doReturn("messages-table").when(table).tableName();
+        doThrow(new RuntimeException("Test exception"))
+            .when(dynamoDbEnhancedClient).batchWriteItem(any(BatchWriteItemEnhancedRequest.class));
+        
+        // Act
+        Set<String> failedKeys = messageRepository.batchWrite(
+                Collections.singletonList(messageData), Collections.emptyList());
+        
+        // Assert
+        assertEquals(Collections.singleton(MessageRepository.itemKey(customerId, recordId)), failedKeys);
+        verify(dynamoDbErrorCounter, times(1)).increment(1.0);
+    }
 }
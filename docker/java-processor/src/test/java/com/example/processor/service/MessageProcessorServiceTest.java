@@ -15,11 +15,15 @@ import org.mockito.Spy;
 import org.mockito.junit.jupiter.MockitoExtension;
 
 import java.time.Instant;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.List;
 import java.util.UUID;
 import java.util.concurrent.CompletableFuture;
 
 import static org.junit.jupiter.api.Assertions.*;
 import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.ArgumentMatchers.anyList;
 import static org.mockito.Mockito.*;
 
 @ExtendWith(MockitoExtension.class)
@@ -242,6 +246,66 @@ public class MessageProcessorServiceTest {
         // Verificar se o timer foi registrado no MeterRegistry para processamento assíncrono
         assertTrue(meterRegistry.find("process_message_seconds").timer() != null);
     }
+    
+    @Test
+    void processBatchWritesAllItemsInSingleBatchWrite() {
+        // Arrange
+        ProcessRequest otherInsert = new ProcessRequest();
+        otherInsert.setId(UUID.randomUUID().toString());
+        otherInsert.setTimestamp(timestamp);
+        otherInsert.setOperation("INSERT");
+        otherInsert.setMessageId("sqs-2");
+        insertRequest.setMessageId("sqs-1");
+        
+        when(messageRepository.batchWrite(anyList(), anyList())).thenReturn(Collections.emptySet());
+        
+        // Act
+        List<ProcessResponse> responses = messageProcessorService.processBatch(Arrays.asList(insertRequest, otherInsert));
+        
+        // Assert
+        assertEquals(2, responses.size());
+        assertEquals("sqs-1", responses.get(0).getMessageId());
+        assertEquals("sqs-2", responses.get(1).getMessageId());
+        assertTrue(responses.stream().allMatch(r -> "SUCCESS".equals(r.getStatus())));
+        verify(messageRepository, times(1)).batchWrite(anyList(), anyList());
+        verify(messageRepository, never()).save(any(MessageData.class));
+        verify(sqsMessageReceivedCounter, times(2)).increment();
+        verify(sqsMessageErrorCounter, never()).increment();
+        assertTrue(meterRegistry.find("process_batch_seconds").timer() != null);
+    }
+    
+    @Test
+    void processBatchSplitsWritesWhenSameKeyRepeats() {
+        // Arrange - INSERT seguido de DELETE da mesma chave não pode ir na mesma chamada
+        when(messageRepository.batchWrite(anyList(), anyList())).thenReturn(Collections.emptySet());
+        
+        // Act
+        List<ProcessResponse> responses = messageProcessorService.processBatch(Arrays.asList(insertRequest, deleteRequest));
+        
+        // Assert
+        assertEquals("SUCCESS", responses.get(0).getStatus());
+        assertEquals("SUCCESS", responses.get(1).getStatus());
+        verify(messageRepository, times(2)).batchWrite(anyList(), anyList());
+    }
+    
+    @Test
+    void processBatchReportsFailedItemsAndUnknownOperations() {
+        // Arrange
+        ProcessRequest invalidRequest = new ProcessRequest();
+        invalidRequest.setId(UUID.randomUUID().toString());
+        invalidRequest.setTimestamp(timestamp);
+        invalidRequest.setOperation("INVALID");
+        
+        when(messageRepository.batchWrite(anyList(), anyList()))
+            .thenReturn(Collections.singleton(MessageRepository.itemKey(messageId, timestamp)));
+        
+        // Act
+        List<ProcessResponse> responses = messageProcessorService.processBatch(Arrays.asList(insertRequest, invalidRequest));
+        
+        // Assert
+        assertEquals("ERROR", responses.get(0).getStatus());
+        assertEquals("ERROR", responses.get(1).getStatus());
+        assertTrue(responses.get(1).getMessage().contains("Unknown operation"));
+        verify(sqsMessageErrorCounter, times(2)).increment();
+    }
 }
-
-
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Subsistema de confirmação (remoção) de mensagens processadas:
+1. Agrupa remoções de lotes sucessivos até o limite de 10 entradas por chamada
+2. Inspeciona a lista Failed de delete_message_batch e repete as entradas retentáveis com jitter
+3. Contabiliza falhas permanentes, que seriam reentregues e reprocessadas após o visibility timeout
+"""
+import time
+import logging
+import threading
+from functools import partial
+from sqs_batch import SQS_MAX_BATCH_ENTRIES, execute_batch, is_retryable
+import consumer_metrics
+
+logger = logging.getLogger(__name__)
+
+class AckManager:
+    """
+    Acumula receipt handles por fila e os remove em lote numa thread própria.
+    Um bloco é enviado quando atinge 10 entradas ou quando a entrada mais antiga
+    aguarda mais que flush_interval segundos.
+    """
+
+    def __init__(self, sqs, flush_interval=0.5, max_retries=3):
+        self.sqs = sqs
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._pending = {}  # queue_url -> lista de (receipt_handle, instante de chegada)
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'deleted': 0,
+            'failed_permanent': 0,  # SenderFault (ex.: receipt handle inválido ou expirado)
+            'failed_exhausted': 0,  # Retentáveis que esgotaram as tentativas
+            'delete_calls': 0
+        }
+
+    def start(self):
+        """Inicia a thread que envia as remoções pendentes."""
+        self._thread = threading.Thread(target=self._flush_loop, name='ack-manager', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Envia todas as remoções pendentes e encerra a thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+    def ack(self, queue_url, receipt_handles):
+        """Agenda a remoção das mensagens processadas com sucesso."""
+        if not receipt_handles:
+            return
+        now = time.time()
+        with self._cond:
+            self._pending.setdefault(queue_url, []).extend((handle, now) for handle in receipt_handles)
+            self._cond.notify_all()
+
+    def flush(self):
+        """Remove imediatamente todas as mensagens pendentes, na thread atual."""
+        with self._cond:
+            ready = self._take_ready(force=True)
+        for queue_url, handles in ready:
+            self._delete(queue_url, handles)
+
+    def _take_ready(self, force=False):
+        """Retira os blocos prontos para envio. Deve ser chamado com o lock adquirido."""
+        ready = []
+        now = time.time()
+
+        for queue_url, pending in list(self._pending.items()):
+            while pending and (len(pending) >= SQS_MAX_BATCH_ENTRIES or force
+                               or now - pending[0][1] >= self.flush_interval):
+                chunk = pending[:SQS_MAX_BATCH_ENTRIES]
+                del pending[:SQS_MAX_BATCH_ENTRIES]
+                ready.append((queue_url, [handle for handle, _ in chunk]))
+            if not pending:
+                del self._pending[queue_url]
+
+        return ready
+
+    def _next_deadline(self):
+        """Instante em que o bloco pendente mais antigo deve ser enviado."""
+        oldest = [pending[0][1] for pending in self._pending.values() if pending]
+        return min(oldest) + self.flush_interval if oldest else None
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                ready = self._take_ready()
+                while not ready and not self._stopping:
+                    deadline = self._next_deadline()
+                    self._cond.wait(None if deadline is None else max(deadline - time.time(), 0))
+                    ready = self._take_ready()
+                if not ready and self._stopping:
+                    return
+
+            for queue_url, handles in ready:
+                self._delete(queue_url, handles)
+
+    def _delete(self, queue_url, handles):
+        """Remove um bloco de mensagens, repetindo as entradas com falha retentável."""
+        entries = [{'Id': str(index), 'ReceiptHandle': handle} for index, handle in enumerate(handles)]
+        successful, failed = execute_batch(
+            partial(self._counted_delete, QueueUrl=queue_url), entries, self.max_retries
+        )
+        self.record_results(successful, failed)
+
+    def _counted_delete(self, **kwargs):
+        with self._stats_lock:
+            self._stats['delete_calls'] += 1
+        with consumer_metrics.DELETE_SECONDS.time():
+            return self.sqs.delete_message_batch(**kwargs)
+
+    def record_results(self, successful, failed):
+        """Contabiliza o resultado de uma remoção em lote (também usado pela engine assíncrona)."""
+        permanent = [failure for failure in failed.values() if not is_retryable(failure)]
+
+        with self._stats_lock:
+            self._stats['deleted'] += len(successful)
+            self._stats['failed_permanent'] += len(permanent)
+            self._stats['failed_exhausted'] += len(failed) - len(permanent)
+
+        for failure in failed.values():
+            logger.error(f"Erro ao remover mensagem da fila: {failure.get('Code', '')} - "
+                         f"{failure.get('Message', '')}")
+
+    def stats(self):
+        """Retorna uma cópia dos contadores de remoção."""
+        with self._stats_lock:
+            return dict(self._stats)
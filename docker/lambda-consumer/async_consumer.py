@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Engine assíncrona do consumidor (CONSUMER_MODE=async), baseada em asyncio:
+1. Clientes SQS (aiobotocore) e HTTP (aiohttp) não bloqueantes
+2. Centenas de mensagens em processamento em um único núcleo, sem uma thread por requisição
+3. Mesmo fluxo da engine síncrona: remoção em lote das mensagens processadas e DLQ para as falhas
+4. Circuit breaker compartilhado com a engine síncrona: com o circuito aberto os receptores param
+5. Cache de idempotência compartilhado: reentregas já processadas são removidas sem chamar o serviço ECS
+6. Coalescência opcional das operações sobre a mesma chave dentro de cada lote recebido
+7. Corpos no envelope de compressão descomprimidos no recebimento
+8. Corpo SQS repassado sem parsing ao serviço ECS e respostas lidas com o codec JSON compartilhado
+9. Encerramento gracioso por sinal (stop_signals): os receptores param e os lotes em andamento são concluídos
+"""
+import time
+import asyncio
+import logging
+from functools import partial
+import aiohttp
+from aiobotocore.session import get_session
+import codec
+from compression import ENCODING_ATTRIBUTE, decode_messages
+from dlq import forward_to_dlq_async, STATUS_SEND_FAILED, STATUS_INVALID_BODY
+from sqs_batch import execute_batch_async
+from circuit_breaker import REJECTED
+from coalescing import coalesce, expand_results
+import consumer_metrics
+
+logger = logging.getLogger(__name__)
+
+class AsyncConsumer:
+    """
+    Consumidor SQS assíncrono.
+    Receptores fazem long polling enquanto houver capacidade dentro do limite de mensagens
+    em processamento; cada lote recebido é processado em uma task própria.
+    """
+
+    def __init__(self, aws_config, queue_name, dlq_name, ecs_service_url, metrics_fn,
+                 visibility_manager, circuit_breaker, dedup_filter=None, coalesce=False, raw_body_passthrough=True, dlq_compressor=None, batch_size=10, receivers=2, max_in_flight=200, http_timeout=5,
+                 wait_time_seconds=5, dlq_max_retries=3,
+                 ack_max_retries=3, ack_results_fn=None, stop_signals=()):
+        self.aws_config = aws_config  # endpoint_url, region_name e credenciais do cliente SQS
+        self.queue_name = queue_name
+        self.dlq_name = dlq_name
+        self.ecs_service_url = ecs_service_url
+        self.metrics_fn = metrics_fn  # metrics_fn(successful, failed, processing_time_ms, batches)
+        self.batch_size = batch_size
+        self.receivers = receivers
+        self.max_in_flight = max_in_flight
+        self.http_timeout = http_timeout
+        # O heartbeat roda numa thread própria com o cliente síncrono; track/release não bloqueiam
+        self.visibility_manager = visibility_manager
+        self.circuit_breaker = circuit_breaker  # Thread-safe e sem I/O: chamado direto do event loop
+        self.dedup_filter = dedup_filter  # O backend compartilhado faz I/O síncrono: chamado via to_thread
+        self.coalesce = coalesce
+        self.raw_body_passthrough = raw_body_passthrough  # Envia o corpo SQS como recebido, sem parsing
+        self.dlq_compressor = dlq_compressor  # Opcional: comprime os corpos encaminhados para a DLQ
+        self.wait_time_seconds = wait_time_seconds
+        self.dlq_max_retries = dlq_max_retries
+        self.ack_max_retries = ack_max_retries
+        self.ack_results_fn = ack_results_fn  # ack_results_fn(successful, failed) para as métricas de remoção
+        self.stop_signals = stop_signals  # Sinais (ex.: SIGTERM) tratados no event loop com stop()
+
+        self.sqs = None
+        self.http = None
+        self._in_flight = 0
+        self._capacity = None
+        self._batch_tasks = set()
+        self._stop = None
+
+    def stop(self):
+        """Pede o encerramento: os receptores param e run() retorna após concluir os lotes em andamento."""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self):
+        """Cria os clientes, localiza as filas e consome mensagens até ser cancelado ou até stop()."""
+        # O Event é criado dentro do loop de asyncio.run (no Python 3.9 ele fica preso ao loop da criação)
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in self.stop_signals:
+            loop.add_signal_handler(signum, self.stop)
+
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=self.http_timeout)
+
+        async with get_session().create_client('sqs', **self.aws_config) as sqs, \
+                aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            self.sqs = sqs
+            self.http = http
+            self._capacity = asyncio.Condition()
+
+            queue_url, dlq_url = await self.wait_for_queues()
+            if not queue_url or not dlq_url:
+                logger.error("Não foi possível encontrar as filas SQS. Encerrando.")
+                return
+
+            logger.info(f"Engine assíncrona iniciada. Receptores: {self.receivers}, "
+                        f"Máximo em processamento: {self.max_in_flight}")
+
+            receivers = [asyncio.create_task(self._receiver_loop(queue_url, dlq_url))
+                         for _ in range(self.receivers)]
+            stop_task = asyncio.create_task(self._stop.wait())
+            try:
+                done, _ = await asyncio.wait(receivers + [stop_task], return_when=asyncio.FIRST_COMPLETED)
+                if stop_task in done:
+                    logger.info(f"Encerrando: concluindo {len(self._batch_tasks)} lotes em andamento")
+                for task in done:
+                    if task is not stop_task:
+                        task.result()  # Propaga a exceção de um receptor que terminou
+            finally:
+                # Apenas os receptores são cancelados; os lotes já recebidos seguem até a remoção/DLQ
+                stop_task.cancel()
+                for task in receivers:
+                    task.cancel()
+                await asyncio.gather(*receivers, return_exceptions=True)
+                # Concluir os lotes em andamento antes de fechar os clientes
+                if self._batch_tasks:
+                    await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def find_queue_url(self, queue_name):
+        """Retorna a URL da fila com o nome exato, entre as listadas pelo prefixo, ou None."""
+        response = await self.sqs.list_queues(QueueNamePrefix=queue_name)
+        for url in response.get('QueueUrls', []):
+            if url.rstrip('/').rsplit('/', 1)[-1] == queue_name:
+                return url
+        return None
+
+    async def wait_for_queues(self):
+        """Aguarda até que as filas SQS estejam disponíveis."""
+        logger.info(f"Aguardando filas SQS '{self.queue_name}' e '{self.dlq_name}' estarem disponíveis...")
+
+        max_retries = 30
+        main_queue_url = None
+        dlq_url = None
+
+        for retries in range(max_retries):
+            try:
+                if not main_queue_url:
+                    main_queue_url = await self.find_queue_url(self.queue_name)
+                    if main_queue_url:
+                        logger.info(f"Fila principal encontrada: {main_queue_url}")
+
+                if not dlq_url:
+                    dlq_url = await self.find_queue_url(self.dlq_name)
+                    if dlq_url:
+                        logger.info(f"DLQ encontrada: {dlq_url}")
+
+                if main_queue_url and dlq_url:
+                    return main_queue_url, dlq_url
+            except Exception as e:
+                logger.info(f"Erro ao verificar filas SQS: {str(e)}. Tentativa {retries+1}/{max_retries}")
+
+            await asyncio.sleep(2)
+
+        logger.error("Timeout aguardando as filas SQS")
+        return main_queue_url, dlq_url
+
+    async def _acquire_capacity(self, count):
+        """Aguarda até haver espaço para mais `count` mensagens em processamento."""
+        async with self._capacity:
+            await self._capacity.wait_for(lambda: self._in_flight + count <= self.max_in_flight)
+            self._in_flight += count
+
+    async def _release_capacity(self, count):
+        async with self._capacity:
+            self._in_flight -= count
+            self._capacity.notify_all()
+
+    async def _receiver_loop(self, queue_url, dlq_url):
+        """Recebe lotes continuamente, respeitando o limite de mensagens em processamento."""
+        while True:
+            # Com o circuito aberto o serviço ECS está indisponível: aguardar o período de teste
+            if self.circuit_breaker.is_open():
+                await asyncio.sleep(min(self.circuit_breaker.remaining_open_seconds(), self.wait_time_seconds))
+                continue
+
+            await self._acquire_capacity(self.batch_size)
+            visibility_timeout = self.visibility_manager.receive_timeout()
+            start_time = time.time()
+            try:
+                response = await self.sqs.receive_message(
+                    QueueUrl=queue_url,
+                    MaxNumberOfMessages=self.batch_size,
+                    VisibilityTimeout=visibility_timeout,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    MessageAttributeNames=[ENCODING_ATTRIBUTE]
+                )
+            except Exception as e:
+                await self._release_capacity(self.batch_size)
+                logger.error(f"Erro ao receber mensagens: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+
+            messages = response.get('Messages', [])
+            consumer_metrics.observe_receive(time.time() - start_time, messages)
+
+            # Devolver a capacidade reservada e não utilizada pelo lote
+            unused = self.batch_size - len(messages)
+            if unused:
+                await self._release_capacity(unused)
+            if not messages:
+                continue
+
+            self.visibility_manager.track(queue_url, messages, visibility_timeout)
+            # Descompressão de poucos KB por mensagem: rápida o bastante para o event loop
+            consumer_metrics.DECOMPRESSED_MESSAGES.inc(decode_messages(messages))
+            task = asyncio.create_task(self.process_message_batch(queue_url, dlq_url, messages))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def process_message(self, message):
+        """
+        Processa uma mensagem individual, enviando para o serviço ECS.
+        Retorna True se processado com sucesso, False caso contrário, ou REJECTED
+        se o circuit breaker recusou a chamada.
+        """
+        start_time = None
+        status = 'error'
+        try:
+            # Sem transformação o corpo segue como recebido; um JSON inválido é recusado pelo serviço (4xx)
+            if self.raw_body_passthrough:
+                payload = codec.raw_body(message['Body'])
+            else:
+                payload = codec.dumps_bytes(codec.loads(message['Body']))
+
+            if not self.circuit_breaker.allow_request():
+                return REJECTED
+
+            start_time = time.time()
+            consumer_metrics.DISPATCH_IN_FLIGHT.inc()
+            async with self.http.post(self.ecs_service_url, data=payload,
+                                      headers={'Content-Type': codec.JSON_CONTENT_TYPE}) as response:
+                status = response.status
+                # Apenas erros do servidor indicam indisponibilidade do serviço
+                if response.status >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+
+                if response.status == 200:
+                    result = codec.loads(await response.read())
+                    logger.info(f"Mensagem processada com sucesso: {result.get('operation', 'UNKNOWN')} - "
+                                f"{result.get('status', 'OK')}")
+                    return True
+
+                logger.error(f"Erro ao processar mensagem: Status {response.status}, "
+                             f"Resposta: {await response.text()}")
+                return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if start_time is not None:
+                self.circuit_breaker.record_failure()
+            logger.error(f"Erro de conexão com o serviço ECS: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Erro ao processar mensagem: {str(e)}")
+            return False
+        finally:
+            if start_time is not None:
+                latency = time.time() - start_time
+                self.visibility_manager.observe(latency)
+                consumer_metrics.DISPATCH_IN_FLIGHT.dec()
+                consumer_metrics.observe_dispatch('process', status, latency)
+            await self._release_capacity(1)
+
+    async def process_message_batch(self, queue_url, dlq_url, messages):
+        """Processa um lote recebido em paralelo, remove os sucessos e envia as falhas para a DLQ."""
+        start_time = time.time()
+        # Capacidade reservada pelo receptor: cada mensagem a devolve em process_message ou ao ser descartada.
+        # Uma exceção antes disso devolve no finally a parte ainda não entregue
+        reserved = len(messages)
+        dispatched = 0
+        received = messages
+        settled = set()  # Receipt handles já removidos, enviados para a DLQ ou devolvidos à fila
+        try:
+            duplicates = []
+            if self.dedup_filter:
+                duplicates, messages = await asyncio.to_thread(self.dedup_filter.split, messages)
+                # Duplicadas não passam por process_message, que libera a capacidade das demais
+                if duplicates:
+                    dispatched += len(duplicates)
+                    await self._release_capacity(len(duplicates))
+
+            if self.coalesce:
+                groups = coalesce(messages)
+                # Mensagens cobertas por outra do grupo não passam por process_message
+                skipped = len(messages) - len(groups)
+                if skipped:
+                    dispatched += skipped
+                    await self._release_capacity(skipped)
+                    consumer_metrics.COALESCED_MESSAGES.inc(skipped)
+                dispatched += len(groups)
+                results = await self._process_coalesced(messages, groups)
+            else:
+                dispatched += len(messages)
+                results = await asyncio.gather(*(self.process_message(message) for message in messages))
+
+            successful_messages = [message for message, processed in zip(messages, results)
+                                   if processed is not REJECTED and processed]
+            failed_messages = [message for message, processed in zip(messages, results)
+                               if processed is not REJECTED and not processed]
+            rejected_messages = [message for message, processed in zip(messages, results) if processed is REJECTED]
+
+            # Reentregas já processadas são removidas junto com os sucessos, sem chamar o serviço ECS
+            to_delete = successful_messages + duplicates
+            if to_delete:
+                deleted, delete_failed = await execute_batch_async(
+                    partial(self._timed_delete, QueueUrl=queue_url),
+                    [{'Id': str(index), 'ReceiptHandle': msg['ReceiptHandle']}
+                     for index, msg in enumerate(to_delete)],
+                    self.ack_max_retries
+                )
+                if self.ack_results_fn:
+                    self.ack_results_fn(deleted, delete_failed)
+                self.visibility_manager.release([msg['ReceiptHandle'] for msg in to_delete])
+                settled.update(msg['ReceiptHandle'] for msg in to_delete)
+            if self.dedup_filter and successful_messages:
+                await asyncio.to_thread(self.dedup_filter.mark_processed, successful_messages)
+
+            await self.send_to_dlq(queue_url, dlq_url, failed_messages)
+            settled.update(msg['ReceiptHandle'] for msg in failed_messages)
+
+            # Mensagens recusadas pelo circuit breaker voltam à fila rapidamente, sem ir para a DLQ
+            if rejected_messages:
+                consumer_metrics.count_results(rejected=len(rejected_messages))
+                await asyncio.to_thread(self.visibility_manager.release_for_retry, queue_url,
+                                        [msg['ReceiptHandle'] for msg in rejected_messages])
+                settled.update(msg['ReceiptHandle'] for msg in rejected_messages)
+
+            processing_time = (time.time() - start_time) * 1000
+            self.metrics_fn(len(successful_messages), len(failed_messages), processing_time, 1)
+
+            logger.info(f"Processado lote em {processing_time:.2f}ms. Sucesso: {len(successful_messages)}, "
+                        f"Falhas: {len(failed_messages)}, Devolvidas: {len(rejected_messages)}, "
+                        f"Duplicadas: {len(duplicates)}")
+        except Exception as e:
+            logger.error(f"Erro ao processar lote de mensagens: {str(e)}")
+            self.metrics_fn(0, 1, 0.0, 0)
+            # Sem isso o heartbeat seguiria estendendo mensagens que ninguém processa: devolvê-las à fila
+            unsettled = [msg['ReceiptHandle'] for msg in received if msg['ReceiptHandle'] not in settled]
+            if unsettled:
+                await asyncio.to_thread(self.visibility_manager.release_for_retry, queue_url, unsettled)
+        finally:
+            if reserved > dispatched:
+                await self._release_capacity(reserved - dispatched)
+
+    async def _process_coalesced(self, messages, groups):
+        """Envia apenas o efeito líquido de cada chave (grupos de coalesce) e replica o resultado para o grupo."""
+        group_results = await asyncio.gather(*(self.process_message(representative) for representative, _ in groups))
+        return expand_results(messages, groups, group_results)
+
+    async def _timed_delete(self, **kwargs):
+        with consumer_metrics.DELETE_SECONDS.time():
+            return await self.sqs.delete_message_batch(**kwargs)
+
+    async def send_to_dlq(self, queue_url, dlq_url, failed_messages):
+        """Envia mensagens com falha para a DLQ e as remove da fila principal, em lote."""
+        start_time = time.time()
+        report = await forward_to_dlq_async(self.sqs, queue_url, dlq_url, failed_messages, self.dlq_max_retries,
+                                            compressor=self.dlq_compressor)
+        consumer_metrics.observe_dlq(report, time.time() - start_time)
+
+        # Mensagens que não chegaram à DLQ serão reentregues: reduzir a visibilidade para voltarem logo
+        retry_handles = [message['ReceiptHandle'] for message, result in zip(failed_messages, report)
+                         if result['status'] in (STATUS_SEND_FAILED, STATUS_INVALID_BODY)]
+        self.visibility_manager.release([message['ReceiptHandle'] for message in failed_messages])
+        if retry_handles:
+            await asyncio.to_thread(self.visibility_manager.release_for_retry, queue_url, retry_handles)
+
+        return report
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Autoscaler local dos processos consumidores, guiado pela profundidade da fila (equivalente local da política
+aws_appautoscaling_policy.sqs_queue_depth do módulo ECS):
+1. Consulta periódica de ApproximateNumberOfMessages e ApproximateNumberOfMessagesNotVisible da fila principal
+2. Target tracking: workers desejados = backlog / AUTOSCALER_TARGET_BACKLOG_PER_WORKER, entre o mínimo e o máximo
+   (padrão: um worker por núcleo de CPU)
+3. Cooldowns separados para scale-out e scale-in, como scale_out_cooldown e scale_in_cooldown do Terraform
+4. Scale-in gracioso: o worker recebe SIGTERM, conclui e confirma o lote em andamento e só é finalizado à força
+   após AUTOSCALER_DRAIN_TIMEOUT_SECONDS
+5. Workers que terminam inesperadamente são substituídos sem esperar o cooldown
+6. Vazão por worker lida do endpoint /metrics de cada processo (porta AUTOSCALER_METRICS_PORT_BASE + slot)
+
+Uso: docker-compose --profile autoscaler up consumer-autoscaler (ou localmente: python autoscaler.py)
+"""
+import os
+import sys
+import math
+import time
+import signal
+import logging
+import subprocess
+from urllib.request import urlopen
+
+# Módulos compartilhados com os produtores: na imagem ficam ao lado deste arquivo, fora dela em docker/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from aws_clients import create_sqs_client
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configurações AWS
+AWS_ENDPOINT_URL = os.environ.get('AWS_ENDPOINT_URL', 'http://localstack:4566')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'test')
+AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY', 'test')
+AWS_SESSION_TOKEN = os.environ.get('AWS_SESSION_TOKEN')
+
+# Fila observada (a mesma consumida pelos workers, por padrão)
+AUTOSCALER_QUEUE_NAME = os.environ.get('AUTOSCALER_QUEUE_NAME', os.environ.get('SQS_QUEUE_NAME', 'message-processor-main'))
+# Conta as mensagens em processamento (NotVisible) no backlog; a política do ECS usa apenas as visíveis
+AUTOSCALER_INCLUDE_IN_FLIGHT = os.environ.get('AUTOSCALER_INCLUDE_IN_FLIGHT', 'true').lower() == 'true'
+
+# Política de escala (os padrões de cooldown são os do módulo ECS)
+AUTOSCALER_TARGET_BACKLOG_PER_WORKER = float(os.environ.get('AUTOSCALER_TARGET_BACKLOG_PER_WORKER', '100'))
+AUTOSCALER_MIN_WORKERS = int(os.environ.get('AUTOSCALER_MIN_WORKERS', '1'))
+AUTOSCALER_MAX_WORKERS = int(os.environ.get('AUTOSCALER_MAX_WORKERS', str(os.cpu_count() or 1)))
+AUTOSCALER_SCALE_OUT_COOLDOWN_SECONDS = float(os.environ.get('AUTOSCALER_SCALE_OUT_COOLDOWN_SECONDS', '60'))
+AUTOSCALER_SCALE_IN_COOLDOWN_SECONDS = float(os.environ.get('AUTOSCALER_SCALE_IN_COOLDOWN_SECONDS', '300'))
+AUTOSCALER_POLL_SECONDS = float(os.environ.get('AUTOSCALER_POLL_SECONDS', '5'))  # Intervalo entre as avaliações
+
+# Workers
+AUTOSCALER_DRAIN_TIMEOUT_SECONDS = float(os.environ.get('AUTOSCALER_DRAIN_TIMEOUT_SECONDS', '30'))  # Antes do SIGKILL
+AUTOSCALER_METRICS_PORT_BASE = int(os.environ.get('AUTOSCALER_METRICS_PORT_BASE', '8000'))  # METRICS_PORT do slot 0
+AUTOSCALER_WORKER_COMMAND = os.environ.get(
+    'AUTOSCALER_WORKER_COMMAND',
+    f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'consumer.py')}"
+).split()
+
+def desired_workers(backlog, target_per_worker, min_workers, max_workers):
+    """Workers necessários para manter o backlog por worker no alvo, dentro dos limites."""
+    return max(min_workers, min(max_workers, math.ceil(backlog / target_per_worker)))
+
+def processed_messages(port, timeout=1.0):
+    """Mensagens concluídas pelo worker (consumer_messages_processed_total), ou None se /metrics não responder."""
+    try:
+        with urlopen(f'http://localhost:{port}/metrics', timeout=timeout) as response:
+            text = response.read().decode('utf-8')
+    except Exception:
+        return None
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith('consumer_messages_processed_total{'):
+            total += float(line.rsplit(' ', 1)[1])
+    return total
+
+class Worker:
+    """Processo consumidor ocupando um slot (o slot define a porta do endpoint de métricas)."""
+
+    def __init__(self, slot, process):
+        self.slot = slot
+        self.process = process
+        self.drain_started = None
+        self.processed = None  # Última leitura de consumer_messages_processed_total
+        self.rate = None  # Mensagens/s entre as duas últimas leituras
+
+class WorkerSupervisor:
+    """Mantém o número de processos consumidores de acordo com o backlog da fila."""
+
+    def __init__(self, sqs, queue_url, command, target_per_worker=100, min_workers=1, max_workers=4,
+                 scale_out_cooldown=60.0, scale_in_cooldown=300.0, drain_timeout=30.0, include_in_flight=True,
+                 metrics_port_base=8000):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.command = command
+        self.target_per_worker = target_per_worker
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers)
+        self.scale_out_cooldown = scale_out_cooldown
+        self.scale_in_cooldown = scale_in_cooldown
+        self.drain_timeout = drain_timeout
+        self.include_in_flight = include_in_flight
+        self.metrics_port_base = metrics_port_base
+
+        self.capacity = 0  # Workers pretendidos; os que terminam inesperadamente são repostos até ele
+        self.workers = []  # Workers ativos, do mais antigo ao mais novo
+        self.draining = []  # Workers em scale-in, aguardando concluir o lote em andamento
+        self._last_scale_out = 0.0
+        self._last_scale_in = 0.0
+        self._last_metrics = None
+        self.stats = {'scale_outs': 0, 'scale_ins': 0, 'replaced': 0, 'killed': 0}
+
+    def queue_depth(self):
+        """Retorna (visíveis, em processamento) da fila."""
+        attributes = self.sqs.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+        )['Attributes']
+        return int(attributes['ApproximateNumberOfMessages']), int(attributes['ApproximateNumberOfMessagesNotVisible'])
+
+    def step(self):
+        """Uma avaliação: recolhe os processos encerrados, mede a fila e aplica a política de escala."""
+        now = time.time()
+        self._reap(now)
+
+        # Partida inicial e reposição de workers perdidos: não dependem do cooldown nem da fila responder
+        self.capacity = max(self.capacity, self.min_workers)
+        if len(self.workers) < self.capacity:
+            self._spawn(self.capacity - len(self.workers))
+
+        visible, in_flight = self.queue_depth()
+        backlog = visible + in_flight if self.include_in_flight else visible
+        current = self.capacity
+        desired = desired_workers(backlog, self.target_per_worker, self.min_workers, self.max_workers)
+
+        if desired > current and now - self._last_scale_out >= self.scale_out_cooldown:
+            self._last_scale_out = now
+            self.stats['scale_outs'] += 1
+            logger.info(f"Scale-out: {current} -> {desired} workers (backlog {backlog}, "
+                        f"alvo {self.target_per_worker:g} por worker)")
+            self.capacity = desired
+            self._spawn(desired - current)
+        elif desired < current and now - max(self._last_scale_in, self._last_scale_out) >= self.scale_in_cooldown:
+            # Scale-in conservador: aguarda o cooldown desde a última mudança em qualquer direção
+            self._last_scale_in = now
+            self.stats['scale_ins'] += 1
+            logger.info(f"Scale-in: {current} -> {desired} workers (backlog {backlog}, "
+                        f"alvo {self.target_per_worker:g} por worker)")
+            self.capacity = desired
+            self._drain(current - desired)
+
+        self._report(now, visible, in_flight, desired)
+
+    def shutdown(self):
+        """Drena todos os workers (SIGTERM) e aguarda o encerramento, finalizando à força após o prazo."""
+        logger.info(f"Encerrando {len(self.workers)} workers...")
+        self.capacity = 0
+        self._drain(len(self.workers))
+        while self.draining:
+            self._reap(time.time())
+            time.sleep(0.2)
+        logger.info(f"Autoscaler encerrado: {self.stats}")
+
+    def _spawn(self, count):
+        used = {worker.slot for worker in self.workers + self.draining}
+        for _ in range(count):
+            slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+            used.add(slot)
+            env = dict(os.environ, METRICS_PORT=str(self.metrics_port_base + slot))
+            # Sessão própria: o Ctrl+C do terminal chega só ao autoscaler, que drena os workers com SIGTERM
+            process = subprocess.Popen(self.command, env=env, start_new_session=True)
+            self.workers.append(Worker(slot, process))
+            logger.info(f"Worker {slot} iniciado (pid {process.pid})")
+
+    def _drain(self, count):
+        """Retira os workers mais novos, que têm menos conexões e caches aquecidos a perder."""
+        for _ in range(min(count, len(self.workers))):
+            worker = self.workers.pop()
+            worker.drain_started = time.time()
+            self.draining.append(worker)
+            if worker.process.poll() is None:
+                worker.process.send_signal(signal.SIGTERM)
+            logger.info(f"Worker {worker.slot} em drenagem (pid {worker.process.pid})")
+
+    def _reap(self, now):
+        """Remove os processos encerrados e finaliza os que excederam o prazo de drenagem."""
+        for worker in list(self.workers):
+            code = worker.process.poll()
+            if code is not None:
+                self.workers.remove(worker)
+                self.stats['replaced'] += 1
+                logger.warning(f"Worker {worker.slot} terminou inesperadamente (código {code}); será reposto")
+
+        for worker in list(self.draining):
+            if worker.process.poll() is not None:
+                self.draining.remove(worker)
+                logger.info(f"Worker {worker.slot} encerrado após {now - worker.drain_started:.1f}s de drenagem")
+            elif now - worker.drain_started >= self.drain_timeout:
+                worker.process.kill()
+                worker.process.wait()
+                self.draining.remove(worker)
+                self.stats['killed'] += 1
+                logger.warning(f"Worker {worker.slot} não concluiu a drenagem em {self.drain_timeout:g}s; finalizado")
+
+    def _report(self, now, visible, in_flight, desired):
+        """Registra fila, workers e a vazão de cada worker desde a avaliação anterior."""
+        elapsed = now - self._last_metrics if self._last_metrics else None
+        self._last_metrics = now
+        for worker in self.workers:
+            processed = processed_messages(self.metrics_port_base + worker.slot)
+            if processed is not None and worker.processed is not None and elapsed:
+                worker.rate = (processed - worker.processed) / elapsed
+            worker.processed = processed
+
+        rates = [worker.rate for worker in self.workers if worker.rate is not None]
+        throughput = (f", vazão {sum(rates):.1f} msg/s ({sum(rates) / len(rates):.1f} por worker: "
+                      + ", ".join(f"{worker.slot}={worker.rate:.1f}" for worker in self.workers
+                                  if worker.rate is not None) + ")") if rates else ""
+        logger.info(f"Fila: {visible} visíveis, {in_flight} em processamento; workers {len(self.workers)} "
+                    f"(desejados {desired}, em drenagem {len(self.draining)}){throughput}")
+
+def find_queue_url(sqs, name, max_retries=30):
+    """Aguarda a fila com exatamente esse nome. Retorna a URL ou None."""
+    for retries in range(max_retries):
+        try:
+            for url in sqs.list_queues(QueueNamePrefix=name).get('QueueUrls', []):
+                if url.rstrip('/').split('/')[-1] == name:
+                    return url
+            logger.info(f"Fila SQS '{name}' ainda não existe. Tentativa {retries + 1}/{max_retries}")
+        except Exception as e:
+            logger.info(f"Erro ao verificar fila SQS: {str(e)}. Tentativa {retries + 1}/{max_retries}")
+        time.sleep(2)
+    return None
+
+def main():
+    """Executa o laço de avaliação até SIGTERM ou Ctrl+C, drenando os workers ao sair."""
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    sqs = create_sqs_client(
+        endpoint_url=AWS_ENDPOINT_URL,
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        aws_session_token=AWS_SESSION_TOKEN
+    )
+    queue_url = find_queue_url(sqs, AUTOSCALER_QUEUE_NAME)
+    if not queue_url:
+        logger.error(f"Fila SQS '{AUTOSCALER_QUEUE_NAME}' não encontrada. Encerrando.")
+        sys.exit(1)
+
+    supervisor = WorkerSupervisor(
+        sqs, queue_url, AUTOSCALER_WORKER_COMMAND,
+        target_per_worker=AUTOSCALER_TARGET_BACKLOG_PER_WORKER,
+        min_workers=AUTOSCALER_MIN_WORKERS,
+        max_workers=AUTOSCALER_MAX_WORKERS,
+        scale_out_cooldown=AUTOSCALER_SCALE_OUT_COOLDOWN_SECONDS,
+        scale_in_cooldown=AUTOSCALER_SCALE_IN_COOLDOWN_SECONDS,
+        drain_timeout=AUTOSCALER_DRAIN_TIMEOUT_SECONDS,
+        include_in_flight=AUTOSCALER_INCLUDE_IN_FLIGHT,
+        metrics_port_base=AUTOSCALER_METRICS_PORT_BASE
+    )
+    logger.info(f"Autoscaler da fila {AUTOSCALER_QUEUE_NAME}: {AUTOSCALER_MIN_WORKERS}-{supervisor.max_workers} "
+                f"workers, alvo {AUTOSCALER_TARGET_BACKLOG_PER_WORKER:g} mensagens por worker, cooldowns "
+                f"{AUTOSCALER_SCALE_OUT_COOLDOWN_SECONDS:g}s/{AUTOSCALER_SCALE_IN_COOLDOWN_SECONDS:g}s")
+
+    try:
+        while True:
+            started = time.time()
+            try:
+                supervisor.step()
+            except Exception as e:
+                # Falha ao consultar a fila: mantém os workers atuais até a próxima avaliação
+                logger.error(f"Erro na avaliação do autoscaler: {str(e)}")
+            time.sleep(max(0.0, AUTOSCALER_POLL_SECONDS - (time.time() - started)))
+    except KeyboardInterrupt:
+        logger.info("Autoscaler interrompido")
+    finally:
+        supervisor.shutdown()
+
+if __name__ == "__main__":
+    main()
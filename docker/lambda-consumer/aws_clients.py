@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Construção dos clientes AWS com foco no tempo de cold start:
+1. Importação do botocore adiada até o primeiro uso do cliente
+2. Clientes criados direto de uma sessão botocore, carregando apenas o modelo do serviço usado
+3. Configuração enxuta: retries padrão, sem validação de parâmetros e timeouts curtos
+"""
+import threading
+
+class LazyClient:
+    """
+    Proxy que cria o cliente no primeiro acesso a um atributo.
+    Numa invocação Lambda que não usa o SQS o custo de importação e criação nunca é pago.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        return self._client is not None
+
+    def get(self):
+        """Retorna o cliente, criando-o uma única vez mesmo com várias threads."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+def create_sqs_client(**kwargs):
+    """Cria um cliente SQS síncrono (ver create_client)."""
+    return create_client('sqs', **kwargs)
+
+def create_client(service_name, endpoint_url=None, region_name=None, aws_access_key_id=None,
+                  aws_secret_access_key=None, aws_session_token=None, max_pool_connections=10):
+    """
+    Cria um cliente síncrono a partir de uma sessão botocore, sem passar pelo boto3.
+    O loader do botocore só lê os modelos do serviço solicitado.
+    """
+    import botocore.session
+    from botocore.config import Config
+
+    config = Config(
+        retries={'max_attempts': 3, 'mode': 'standard'},
+        # A validação de parâmetros percorre o modelo do serviço a cada chamada
+        parameter_validation=False,
+        connect_timeout=5,
+        read_timeout=30,  # Acima do WaitTimeSeconds máximo do long polling (20 s)
+        max_pool_connections=max_pool_connections
+    )
+    session = botocore.session.get_session()
+    return session.create_client(
+        service_name,
+        endpoint_url=endpoint_url or None,
+        region_name=region_name,
+        aws_access_key_id=aws_access_key_id or None,
+        aws_secret_access_key=aws_secret_access_key or None,
+        aws_session_token=aws_session_token or None,
+        config=config
+    )
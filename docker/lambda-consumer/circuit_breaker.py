@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker para as chamadas do consumidor ao Java Processor:
+1. CLOSED: chamadas liberadas, com taxa de falhas medida numa janela deslizante
+2. OPEN: chamadas recusadas por open_seconds após a taxa de falhas passar do limite
+3. HALF_OPEN: algumas chamadas de teste decidem entre fechar ou reabrir o circuito
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Resultado de uma mensagem não enviada porque o circuito recusou a chamada.
+# Deve ser verificado antes do teste de sucesso: a mensagem volta à fila, sem ir para a DLQ.
+REJECTED = None
+
+class CircuitBreaker:
+    """Circuit breaker thread-safe baseado na taxa de falhas das últimas chamadas."""
+
+    def __init__(self, enabled=True, failure_rate_threshold=0.5, minimum_calls=10, window_size=20,
+                 open_seconds=30, half_open_calls=3):
+        self.enabled = enabled
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls  # Chamadas mínimas na janela antes de avaliar a taxa de falhas
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._window = deque(maxlen=window_size)  # True para falha, False para sucesso
+        self._opened_at = 0.0
+        self._half_open_issued = 0
+        self._half_open_succeeded = 0
+        self._transitions = {}
+        self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def is_open(self):
+        """Indica se as chamadas estão sendo recusadas (o consumidor deve parar de receber)."""
+        return self.enabled and self.state == OPEN
+
+    def remaining_open_seconds(self):
+        """Tempo restante até o circuito aberto permitir chamadas de teste."""
+        with self._lock:
+            self._refresh()
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_at + self.open_seconds - time.time(), 0.0)
+
+    def allow_request(self):
+        """Reserva uma chamada. Retorna False se o circuito recusar a chamada."""
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_issued < self.half_open_calls:
+                self._half_open_issued += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_succeeded += 1
+                if self._half_open_succeeded >= self.half_open_calls:
+                    self._transition(CLOSED)
+            elif self._state == CLOSED:
+                self._window.append(False)
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self._state == CLOSED:
+                self._window.append(True)
+                if len(self._window) >= self.minimum_calls and \
+                        sum(self._window) / len(self._window) >= self.failure_rate_threshold:
+                    self._transition(OPEN)
+
+    def stats(self):
+        """Retorna o estado atual, as transições por par de estados e as chamadas recusadas."""
+        with self._lock:
+            self._refresh()
+            return {
+                'state': self._state,
+                'transitions': dict(self._transitions),
+                'rejected': self._rejected
+            }
+
+    def _refresh(self):
+        """Passa de OPEN para HALF_OPEN quando o período aberto termina. Requer o lock."""
+        if self._state == OPEN and time.time() >= self._opened_at + self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, new_state):
+        """Muda de estado e reinicia os contadores do novo estado. Requer o lock."""
+        key = f"{self._state}->{new_state}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        logger.warning(f"Circuit breaker: {self._state} -> {new_state}")
+
+        self._state = new_state
+        self._window.clear()
+        self._half_open_issued = 0
+        self._half_open_succeeded = 0
+        if new_state == OPEN:
+            self._opened_at = time.time()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Coalescência de operações por chave dentro de uma janela de recebimento:
+1. Agrupa as mensagens por (id, timestamp) ou (customerId, recordId)
+2. Encaminha apenas o efeito líquido de cada grupo: a última operação na ordem de chegada.
+   Um DELETE final cobre os INSERTs anteriores da mesma chave, e um INSERT após um DELETE
+   deixa o registro gravado
+3. O resultado do envio vale para todas as mensagens do grupo, que continuam sendo
+   confirmadas (ou reprocessadas) individualmente
+"""
+import logging
+import codec
+
+logger = logging.getLogger(__name__)
+
+def coalescing_key(body):
+    """
+    Chave do registro afetado pela mensagem, ou None se não for possível identificá-lo.
+    No formato do processador Java o DELETE repete o id e o timestamp do INSERT; no formato
+    do produtor de clientes o timestamp muda, então a chave é (customerId, recordId).
+    """
+    if not isinstance(body, dict):
+        return None
+    if body.get('id'):
+        return ('id', body['id'], body.get('timestamp', ''))
+
+    data = body.get('data') or {}
+    customer_id = body.get('customerId', data.get('customerId'))
+    record_id = body.get('recordId', data.get('recordId'))
+    if customer_id and record_id:
+        return ('customer', customer_id, record_id)
+    return None
+
+def coalesce(messages):
+    """
+    Agrupa as mensagens por chave, na ordem de chegada.
+    Retorna uma lista de (mensagem a encaminhar, mensagens cobertas pelo grupo).
+    """
+    groups = {}
+    for index, message in enumerate(messages):
+        try:
+            body = codec.loads(message['Body'])
+            key = coalescing_key(body)
+            operation = body.get('operation') if key else None
+        except Exception:
+            key = None
+            operation = None
+        # Mensagens sem chave (ou inválidas) seguem sozinhas e mantêm o tratamento de erro atual
+        groups.setdefault(key if key is not None else ('message', index), []).append((message, operation))
+
+    coalesced = []
+    for members in groups.values():
+        # A última operação define o estado final: o DELETE é idempotente (remove o registro inserido na
+        # janela ou uma versão anterior) e o INSERT grava o registro completo, existindo ele ou não
+        representative = members[-1][0]
+        coalesced.append((representative, [message for message, _ in members]))
+    return coalesced
+
+def expand_results(messages, groups, results):
+    """Replica o resultado de cada grupo para as mensagens cobertas, na ordem de messages."""
+    result_by_message = {}
+    for (_, members), result in zip(groups, results):
+        for message in members:
+            result_by_message[id(message)] = result
+    return [result_by_message[id(message)] for message in messages]
+
+def dispatch_coalesced(messages, dispatch_fn):
+    """
+    Envia apenas o efeito líquido de cada chave com dispatch_fn(lista) -> resultados e
+    replica o resultado de cada grupo para as mensagens cobertas.
+    Retorna (resultados na ordem de messages, quantidade de mensagens não encaminhadas).
+    """
+    groups = coalesce(messages)
+    results = dispatch_fn([representative for representative, _ in groups])
+
+    saved = len(messages) - len(groups)
+    if saved:
+        logger.info(f"Coalescência: {len(messages)} mensagens resultaram em {len(groups)} operações")
+    return expand_results(messages, groups, results), saved
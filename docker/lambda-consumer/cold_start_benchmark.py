@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark de cold start do consumidor Lambda:
+1. Cada execução é um processo Python novo, como num ambiente de execução Lambda recém-criado
+2. Mede a importação do módulo, a criação do cliente SQS e a primeira invocação do handler
+3. Compara o modo otimizado (LAZY_CLIENTS=true) com a criação antecipada dos clientes
+4. Tempo de importação de cada dependência pesada até o fim da primeira invocação (python -X importtime),
+   para verificar quais deixam de ser carregadas no cold start
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+import statistics
+
+# Configurações do benchmark
+COLD_START_RUNS = int(os.environ.get('COLD_START_RUNS', '10'))  # Processos por modo
+COLD_START_OUTPUT = os.environ.get('COLD_START_OUTPUT', '')  # Arquivo JSON com o resultado (opcional)
+# Sem serviço ECS na porta 9 a primeira invocação mede o caminho do cliente HTTP até a recusa da conexão
+COLD_START_ECS_URL = os.environ.get('COLD_START_ECS_URL', 'http://127.0.0.1:9/process')
+
+MODES = {'lazy': 'true', 'eager': 'false'}
+# cold_start_ms: do início do processo até o fim da primeira invocação (inclui a inicialização do interpretador)
+PHASES = ('cold_start_ms', 'import_ms', 'first_invoke_ms', 'sqs_client_ms')
+# Dependências com tempo de importação relatado (0 quando não carregadas até o fim da primeira invocação)
+HEAVY_IMPORTS = ('botocore', 'requests', 'prometheus_client', 'aiohttp', 'aiobotocore', 'orjson')
+# Separa, na saída do -X importtime, as importações do cold start das feitas depois (criação do cliente SQS)
+COLD_START_MARKER = 'cold-start-done'
+
+def run_child():
+    """Executado no processo filho: mede as fases e imprime o resultado em JSON."""
+    start = time.perf_counter()
+    import consumer
+    imported = time.perf_counter()
+
+    event = {'Records': [{
+        'messageId': 'cold-start',
+        'receiptHandle': 'cold-start',
+        'body': json.dumps({'id': 'cold-start', 'operation': 'INSERT'})
+    }]}
+    consumer.handler(event, None)
+    invoked = time.perf_counter()
+    sys.stderr.write(COLD_START_MARKER + '\n')
+    sys.stderr.flush()
+
+    # Custo pago no primeiro uso do SQS pelos modos daemon (já incluído na importação no modo eager)
+    consumer.sqs.get()
+    client_ready = time.perf_counter()
+
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'first_invoke_ms': (invoked - imported) * 1000,
+        'sqs_client_ms': (client_ready - invoked) * 1000
+    }))
+
+def parse_importtime(stderr):
+    """
+    Milissegundos de importação de cada HEAVY_IMPORTS antes do marcador, a partir das linhas do -X importtime
+    ('import time: self | cumulative | nome', em pós-ordem com a indentação indicando o aninhamento).
+    Cada pacote soma o tempo cumulativo das suas importações mais externas (submódulos e dependências inclusos).
+    """
+    pending = []  # (profundidade, nome, cumulativo em µs, filhos), raízes ao final
+    for line in stderr.splitlines():
+        if line.strip() == COLD_START_MARKER:
+            break
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, raw_name = line[len('import time:'):].split('|')
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        children = []
+        while pending and pending[-1][0] > depth:
+            children.insert(0, pending.pop())
+        pending.append((depth, raw_name.strip(), int(cumulative), children))
+
+    totals = dict.fromkeys(HEAVY_IMPORTS, 0.0)
+
+    def visit(nodes):
+        for _, name, cumulative, children in nodes:
+            package = name.split('.')[0]
+            if package in totals:
+                totals[package] += cumulative / 1000
+            else:
+                visit(children)
+
+    visit(pending)
+    return totals
+
+def run_once(lazy_clients):
+    """Executa um processo filho e retorna as fases medidas, incluindo o tempo até a primeira resposta."""
+    env = dict(os.environ,
+               LAZY_CLIENTS=lazy_clients,
+               ECS_SERVICE_URL=COLD_START_ECS_URL,
+               CIRCUIT_BREAKER_ENABLED='false',
+               PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child'],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['imports_ms'] = parse_importtime(process.stderr)
+    # A criação do cliente SQS é medida depois da invocação e não faz parte do cold start do handler
+    result['cold_start_ms'] = (time.perf_counter() - start) * 1000 - result['sqs_client_ms']
+    return result
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median': statistics.median(ordered),
+        'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+        'max': ordered[-1]
+    }
+
+def main():
+    report = {}
+    for mode, lazy_clients in MODES.items():
+        runs = [run_once(lazy_clients) for _ in range(COLD_START_RUNS)]
+        report[mode] = {phase: summarize([run[phase] for run in runs]) for phase in PHASES}
+        report[mode]['imports_ms'] = {module: statistics.median(run['imports_ms'][module] for run in runs)
+                                      for module in HEAVY_IMPORTS}
+
+    print(f"Cold start ({COLD_START_RUNS} processos por modo, tempos em ms)")
+    print(f"{'modo':<8}{'fase':<18}{'mediana':>10}{'p95':>10}{'máximo':>10}")
+    for mode, phases in report.items():
+        for phase in PHASES:
+            stats = phases[phase]
+            print(f"{mode:<8}{phase:<18}{stats['median']:>10.1f}{stats['p95']:>10.1f}{stats['max']:>10.1f}")
+
+    # O -X importtime acrescenta um pequeno custo por módulo: comparar os modos entre si, não com as fases acima
+    print("\nImportações até o fim da primeira invocação (mediana em ms, 0 = não carregada)")
+    print(f"{'dependência':<20}" + ''.join(f"{mode:>10}" for mode in report))
+    for module in HEAVY_IMPORTS:
+        print(f"{module:<20}" + ''.join(f"{phases['imports_ms'][module]:>10.1f}" for phases in report.values()))
+
+    if COLD_START_OUTPUT:
+        with open(COLD_START_OUTPUT, 'w') as f:
+            json.dump({'runs': COLD_START_RUNS, 'modes': report}, f, indent=2)
+
+if __name__ == "__main__":
+    if '--child' in sys.argv:
+        run_child()
+    else:
+        main()
@@ -5,17 +5,40 @@ Consumidor Lambda que implementa as otimizações recomendadas:
 2. Memória otimizada (simulado com limites de recursos)
 3. Timeout adequado para processamento em lote
 4. Tratamento de erros com DLQ
+5. Execução como AWS Lambda (handler) com resposta parcial de lote (batchItemFailures)
+6. Descarte de reentregas já processadas (cache de idempotência)
+7. Coalescência de INSERT/DELETE da mesma chave dentro de uma janela de recebimento
+8. Codec JSON rápido (orjson) e repasse do corpo SQS sem parsing quando não há transformação
+9. Envelope de compressão (atributo content-encoding) desfeito no recebimento
+10. Controle adaptativo (AIMD) da concorrência e do tamanho do recebimento, guiado pela latência e pelos erros
+11. Consumo de várias filas com pesos (weighted fair queuing) e backoff do polling das filas vazias
+12. Encerramento gracioso com SIGTERM (docker stop, autoscaler): conclui o lote em andamento antes de sair
 """
 import os
+import sys
 import time
-import json
+import signal
 import logging
-import uuid
-import requests
-from datetime import datetime
-import boto3
 import threading
-import queue
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Módulos compartilhados com os produtores: na imagem ficam ao lado deste arquivo, fora dela em docker/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import codec
+from http_client import PooledHttpClient
+from aws_clients import LazyClient, create_client, create_sqs_client
+from dedup import DedupFilter, LocalDedupCache, DynamoDBDedupStore
+from coalescing import dispatch_coalesced
+from compression import Compressor, ENCODING_ATTRIBUTE, decode_messages
+from dlq import forward_to_dlq, STATUS_SEND_FAILED, STATUS_INVALID_BODY
+from acknowledgements import AckManager
+from visibility import VisibilityManager
+from circuit_breaker import CircuitBreaker, REJECTED
+from flow_control import FlowController, is_congestion
+from queue_scheduler import WeightedQueueScheduler, parse_queue_weights
+import consumer_metrics
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -26,12 +49,101 @@ AWS_ENDPOINT_URL = os.environ.get('AWS_ENDPOINT_URL', 'http://localstack:4566')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'test')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY', 'test')
+AWS_SESSION_TOKEN = os.environ.get('AWS_SESSION_TOKEN')  # Credenciais temporárias do runtime Lambda
+# Criação do cliente SQS e importação do requests e do prometheus_client adiadas até o primeiro uso
+# (reduz o cold start do handler Lambda)
+LAZY_CLIENTS = os.environ.get('LAZY_CLIENTS', 'true').lower() == 'true'
 
 # Configurações do consumidor
 SQS_QUEUE_NAME = os.environ.get('SQS_QUEUE_NAME', 'message-processor-main')
 SQS_DLQ_NAME = os.environ.get('SQS_DLQ_NAME', 'message-processor-dlq')
+# Várias filas com pesos no modo batch ('fila-prioritaria:4,message-processor-main:1'); vazio = só SQS_QUEUE_NAME
+SQS_QUEUES = parse_queue_weights(os.environ.get('SQS_QUEUES', ''), SQS_QUEUE_NAME)
+QUEUE_IDLE_BACKOFF_BASE_MS = int(os.environ.get('QUEUE_IDLE_BACKOFF_BASE_MS', '100'))  # Primeiro recuo de fila vazia
+QUEUE_IDLE_BACKOFF_MAX_MS = int(os.environ.get('QUEUE_IDLE_BACKOFF_MAX_MS', '2000'))  # Atraso máximo do polling
 BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '10'))  # Otimizado para processar 10 mensagens por vez
 ECS_SERVICE_URL = os.environ.get('ECS_SERVICE_URL', 'http://java-processor:8080/process')
+DISPATCH_CONCURRENCY = int(os.environ.get('DISPATCH_CONCURRENCY', '10'))  # Requisições simultâneas por lote (1 = serial)
+# Envio do lote inteiro em uma única requisição ao endpoint /process/batch
+USE_BATCH_ENDPOINT = os.environ.get('USE_BATCH_ENDPOINT', 'false').lower() == 'true'
+ECS_BATCH_URL = os.environ.get('ECS_BATCH_URL', ECS_SERVICE_URL.rstrip('/') + '/batch')
+# Envia o corpo SQS como recebido ao endpoint unitário, sem decodificar e codificar o JSON de novo
+RAW_BODY_PASSTHROUGH = os.environ.get('RAW_BODY_PASSTHROUGH', 'true').lower() == 'true'
+
+# Controle adaptativo de fluxo: o limite de requisições simultâneas parte de DISPATCH_CONCURRENCY e varia entre
+# FLOW_MIN_CONCURRENCY e FLOW_MAX_CONCURRENCY; o tamanho do recebimento fica limitado a ele (até BATCH_SIZE)
+FLOW_CONTROL_ENABLED = os.environ.get('FLOW_CONTROL_ENABLED', 'false').lower() == 'true'
+FLOW_MIN_CONCURRENCY = int(os.environ.get('FLOW_MIN_CONCURRENCY', '1'))
+FLOW_MAX_CONCURRENCY = int(os.environ.get('FLOW_MAX_CONCURRENCY', str(max(DISPATCH_CONCURRENCY, 1) * 4)))
+FLOW_BACKOFF_RATIO = float(os.environ.get('FLOW_BACKOFF_RATIO', '0.9'))  # Fator de redução do limite
+FLOW_LATENCY_TOLERANCE = float(os.environ.get('FLOW_LATENCY_TOLERANCE', '1.5'))  # Latência recente / referência
+FLOW_LATENCY_THRESHOLD_MS = int(os.environ.get('FLOW_LATENCY_THRESHOLD_MS', '0'))  # Limite absoluto (0 = desligado)
+# Threads de despacho: o teto do limite adaptativo ou a concorrência fixa
+DISPATCH_WORKERS = FLOW_MAX_CONCURRENCY if FLOW_CONTROL_ENABLED else DISPATCH_CONCURRENCY
+
+# Configurações do pool de conexões HTTP com o Java Processor
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '1'))  # Hosts com pool em cache
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', str(max(DISPATCH_WORKERS, 1))))  # Conexões por host
+HTTP_POOL_BLOCK = os.environ.get('HTTP_POOL_BLOCK', 'true').lower() == 'true'
+HTTP_KEEP_ALIVE = os.environ.get('HTTP_KEEP_ALIVE', 'true').lower() == 'true'
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', '5'))
+
+# Modo de execução: 'batch' (um lote por vez), 'pipeline' (receptores, workers e remoção em paralelo)
+# ou 'async' (engine asyncio com aiobotocore + aiohttp)
+CONSUMER_MODE = os.environ.get('CONSUMER_MODE', 'batch').lower()
+RECEIVE_WAIT_SECONDS = int(os.environ.get('RECEIVE_WAIT_SECONDS', '5'))  # Long polling (máximo 20)
+PIPELINE_RECEIVERS = int(os.environ.get('PIPELINE_RECEIVERS', '2'))
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', str(max(DISPATCH_WORKERS, 1))))
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', '100'))  # Mensagens aguardando processamento
+ASYNC_RECEIVERS = int(os.environ.get('ASYNC_RECEIVERS', '4'))
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get('ASYNC_MAX_IN_FLIGHT', '200'))  # Mensagens em processamento simultâneo
+DLQ_MAX_RETRIES = int(os.environ.get('DLQ_MAX_RETRIES', '3'))  # Novas tentativas das entradas recusadas pela DLQ
+
+# Configurações de confirmação (remoção) das mensagens processadas
+ACK_FLUSH_MS = int(os.environ.get('ACK_FLUSH_MS', '500'))  # Espera máxima para agrupar remoções de lotes sucessivos
+ACK_MAX_RETRIES = int(os.environ.get('ACK_MAX_RETRIES', '3'))  # Novas tentativas das entradas com falha retentável
+
+# Execução como AWS Lambda: margem para concluir as requisições em andamento antes do timeout da função
+LAMBDA_TIMEOUT_MARGIN_MS = int(os.environ.get('LAMBDA_TIMEOUT_MARGIN_MS', str(int(HTTP_TIMEOUT * 1000) + 1000)))
+
+# Idempotência: mensagens já processadas são removidas da fila sem chamar o serviço ECS
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'true').lower() == 'true'
+# Chaves de deduplicação: 'message_id' (MessageId do SQS) e/ou 'body' (operação + id + timestamp)
+DEDUP_KEYS = [key.strip() for key in os.environ.get('DEDUP_KEYS', 'message_id,body').split(',') if key.strip()]
+DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', '100000'))  # Limite do cache local (LRU)
+DEDUP_TTL_SECONDS = int(os.environ.get('DEDUP_TTL_SECONDS', '3600'))
+DEDUP_BACKEND = os.environ.get('DEDUP_BACKEND', '').lower()  # '' (somente local) ou 'dynamodb' (compartilhado)
+DEDUP_TABLE = os.environ.get('DEDUP_TABLE', 'consumer-dedup')
+
+# Coalescência: apenas o efeito líquido das operações sobre a mesma chave é enviado ao serviço ECS
+COALESCE_ENABLED = os.environ.get('COALESCE_ENABLED', 'false').lower() == 'true'
+COALESCE_WINDOW_MS = int(os.environ.get('COALESCE_WINDOW_MS', '0'))  # Recebimento adicional após o primeiro lote (0 = só o lote)
+COALESCE_MAX_MESSAGES = int(os.environ.get('COALESCE_MAX_MESSAGES', '100'))  # Limite de mensagens por janela
+
+# Envelope de compressão: corpos recebidos com o atributo content-encoding são sempre descomprimidos;
+# com COMPRESSION_ENABLED os corpos encaminhados para a DLQ também são comprimidos
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'false').lower() == 'true'
+COMPRESSION_ALGORITHM = os.environ.get('COMPRESSION_ALGORITHM', 'zlib')  # 'zlib' ou 'zstd' (pacote zstandard)
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))  # Corpos menores seguem sem compressão
+
+# Endpoint Prometheus (/metrics) do consumidor
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '8000'))
+
+# Configurações do circuit breaker em frente ao serviço ECS
+CIRCUIT_BREAKER_ENABLED = os.environ.get('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.environ.get('CIRCUIT_BREAKER_FAILURE_RATE', '0.5'))
+CIRCUIT_BREAKER_MINIMUM_CALLS = int(os.environ.get('CIRCUIT_BREAKER_MINIMUM_CALLS', '10'))
+CIRCUIT_BREAKER_WINDOW_SIZE = int(os.environ.get('CIRCUIT_BREAKER_WINDOW_SIZE', '20'))
+CIRCUIT_BREAKER_OPEN_SECONDS = int(os.environ.get('CIRCUIT_BREAKER_OPEN_SECONDS', '30'))
+CIRCUIT_BREAKER_HALF_OPEN_CALLS = int(os.environ.get('CIRCUIT_BREAKER_HALF_OPEN_CALLS', '3'))
+
+# Configurações do visibility timeout adaptativo
+VISIBILITY_TIMEOUT = int(os.environ.get('VISIBILITY_TIMEOUT', '180'))  # Usado até haver latências medidas
+VISIBILITY_MIN_TIMEOUT = int(os.environ.get('VISIBILITY_MIN_TIMEOUT', '30'))
+VISIBILITY_MAX_TIMEOUT = int(os.environ.get('VISIBILITY_MAX_TIMEOUT', '900'))
+VISIBILITY_HEARTBEAT_SECONDS = int(os.environ.get('VISIBILITY_HEARTBEAT_SECONDS', '10'))
+VISIBILITY_RETRY_TIMEOUT = int(os.environ.get('VISIBILITY_RETRY_TIMEOUT', '5'))  # Retorno rápido de mensagens a reprocessar
 
 # Métricas para monitoramento
 metrics = {
@@ -41,45 +153,149 @@ metrics = {
     'processing_time_ms': 0,
     'avg_processing_time_ms': 0
 }
+metrics_lock = threading.Lock()
 
-# Clientes AWS
-sqs = boto3.client(
-    'sqs',
+# Clientes AWS (o handler Lambda não usa o SQS: a remoção dos registros fica a cargo do serviço)
+sqs = LazyClient(partial(
+    create_sqs_client,
     endpoint_url=AWS_ENDPOINT_URL,
     region_name=AWS_REGION,
     aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    aws_session_token=AWS_SESSION_TOKEN
+))
+if not LAZY_CLIENTS:
+    sqs.get()
+
+# Cliente HTTP com pool de conexões keep-alive compartilhado entre as threads de despacho
+http_client = PooledHttpClient(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    pool_block=HTTP_POOL_BLOCK,
+    keep_alive=HTTP_KEEP_ALIVE,
+    timeout=HTTP_TIMEOUT
+)
+if not LAZY_CLIENTS:
+    http_client.prepare()
+    consumer_metrics.enable()
+
+# Remoções agrupadas entre lotes, com tratamento das entradas Failed
+ack_manager = AckManager(sqs, flush_interval=ACK_FLUSH_MS / 1000.0, max_retries=ACK_MAX_RETRIES)
+
+# Heartbeat de visibilidade das mensagens em processamento, guiado pela latência medida
+visibility_manager = VisibilityManager(
+    sqs,
+    initial_timeout=VISIBILITY_TIMEOUT,
+    min_timeout=VISIBILITY_MIN_TIMEOUT,
+    max_timeout=VISIBILITY_MAX_TIMEOUT,
+    heartbeat_interval=VISIBILITY_HEARTBEAT_SECONDS,
+    retry_timeout=VISIBILITY_RETRY_TIMEOUT
 )
 
-def wait_for_queues():
-    """Aguarda até que as filas SQS estejam disponíveis."""
-    logger.info(f"Aguardando filas SQS '{SQS_QUEUE_NAME}' e '{SQS_DLQ_NAME}' estarem disponíveis...")
+# Circuit breaker: com o serviço ECS fora do ar, as mensagens voltam à fila em vez de irem para a DLQ
+circuit_breaker = CircuitBreaker(
+    enabled=CIRCUIT_BREAKER_ENABLED,
+    failure_rate_threshold=CIRCUIT_BREAKER_FAILURE_RATE,
+    minimum_calls=CIRCUIT_BREAKER_MINIMUM_CALLS,
+    window_size=CIRCUIT_BREAKER_WINDOW_SIZE,
+    open_seconds=CIRCUIT_BREAKER_OPEN_SECONDS,
+    half_open_calls=CIRCUIT_BREAKER_HALF_OPEN_CALLS
+)
+
+# Limite adaptativo de requisições simultâneas ao serviço ECS (desabilitado, fixo em DISPATCH_CONCURRENCY)
+flow_controller = FlowController(
+    enabled=FLOW_CONTROL_ENABLED,
+    initial_limit=DISPATCH_CONCURRENCY,
+    min_limit=FLOW_MIN_CONCURRENCY,
+    max_limit=FLOW_MAX_CONCURRENCY,
+    backoff_ratio=FLOW_BACKOFF_RATIO,
+    latency_tolerance=FLOW_LATENCY_TOLERANCE,
+    latency_threshold=FLOW_LATENCY_THRESHOLD_MS / 1000.0
+)
+
+# Escalonamento dos recebimentos entre as filas de SQS_QUEUES (URLs associadas em main)
+queue_scheduler = WeightedQueueScheduler(
+    SQS_QUEUES,
+    idle_backoff_base=QUEUE_IDLE_BACKOFF_BASE_MS / 1000.0,
+    idle_backoff_max=QUEUE_IDLE_BACKOFF_MAX_MS / 1000.0
+)
+MULTI_QUEUE = len(SQS_QUEUES) > 1
+
+# Cache de idempotência local, com backend DynamoDB opcional compartilhado entre instâncias
+dedup_filter = DedupFilter(
+    LocalDedupCache(max_entries=DEDUP_MAX_ENTRIES, ttl_seconds=DEDUP_TTL_SECONDS),
+    backend=DynamoDBDedupStore(
+        LazyClient(partial(
+            create_client,
+            'dynamodb',
+            endpoint_url=AWS_ENDPOINT_URL,
+            region_name=AWS_REGION,
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            aws_session_token=AWS_SESSION_TOKEN
+        )),
+        DEDUP_TABLE,
+        ttl_seconds=DEDUP_TTL_SECONDS
+    ) if DEDUP_BACKEND == 'dynamodb' else None,
+    key_types=DEDUP_KEYS
+) if DEDUP_ENABLED else None
+
+# Envelope de compressão dos corpos encaminhados para a DLQ (mesmo formato dos produtores)
+dlq_compressor = Compressor(
+    algorithm=COMPRESSION_ALGORITHM,
+    min_bytes=COMPRESSION_MIN_BYTES
+) if COMPRESSION_ENABLED else None
+
+# Sinalizado pelo SIGTERM: os laços do modo batch terminam ao fim do lote em andamento
+shutdown_event = threading.Event()
+
+# Pool de threads para despachar as mensagens de um lote em paralelo
+dispatch_executor = ThreadPoolExecutor(
+    max_workers=DISPATCH_WORKERS,
+    thread_name_prefix='dispatch'
+) if DISPATCH_WORKERS > 1 else None
+
+def find_queue_url(queue_name):
+    """Retorna a URL da fila com o nome exato, entre as listadas pelo prefixo, ou None."""
+    response = sqs.list_queues(QueueNamePrefix=queue_name)
+    urls = response.get('QueueUrls', [])
+    for url in urls:
+        if url.rstrip('/').rsplit('/', 1)[-1] == queue_name:
+            return url
+    return None
+
+def wait_for_queues(queue_names):
+    """
+    Aguarda até que as filas SQS estejam disponíveis.
+    Retorna ({nome: url} das filas encontradas, url da DLQ ou None).
+    """
+    logger.info(f"Aguardando filas SQS {queue_names} e '{SQS_DLQ_NAME}' estarem disponíveis...")
     
     max_retries = 30
     retries = 0
     
-    main_queue_url = None
+    queue_urls = {}
     dlq_url = None
     
     while retries < max_retries:
         try:
-            # Verificar fila principal
-            if not main_queue_url:
-                response = sqs.list_queues(QueueNamePrefix=SQS_QUEUE_NAME)
-                if 'QueueUrls' in response and len(response['QueueUrls']) > 0:
-                    main_queue_url = response['QueueUrls'][0]
-                    logger.info(f"Fila principal encontrada: {main_queue_url}")
+            # Verificar filas de consumo
+            for queue_name in queue_names:
+                if queue_name not in queue_urls:
+                    url = find_queue_url(queue_name)
+                    if url:
+                        queue_urls[queue_name] = url
+                        logger.info(f"Fila encontrada: {url}")
             
             # Verificar DLQ
             if not dlq_url:
-                response = sqs.list_queues(QueueNamePrefix=SQS_DLQ_NAME)
-                if 'QueueUrls' in response and len(response['QueueUrls']) > 0:
-                    dlq_url = response['QueueUrls'][0]
+                dlq_url = find_queue_url(SQS_DLQ_NAME)
+                if dlq_url:
                     logger.info(f"DLQ encontrada: {dlq_url}")
             
-            # Se ambas as filas foram encontradas, retornar
-            if main_queue_url and dlq_url:
-                return main_queue_url, dlq_url
+            # Se todas as filas foram encontradas, retornar
+            if len(queue_urls) == len(queue_names) and dlq_url:
+                return queue_urls, dlq_url
         except Exception as e:
             logger.info(f"Erro ao verificar filas SQS: {str(e)}. Tentativa {retries+1}/{max_retries}")
         
@@ -87,140 +303,589 @@ def wait_for_queues():
         time.sleep(2)
     
     logger.error(f"Timeout aguardando as filas SQS")
-    return main_queue_url, dlq_url
+    return queue_urls, dlq_url
 
 def process_message(message):
     """
     Processa uma mensagem individual, enviando para o serviço ECS.
-    Retorna True se processado com sucesso, False caso contrário.
+    Retorna True se processado com sucesso, False caso contrário, ou REJECTED
+    se o circuit breaker recusou a chamada.
     """
+    start_time = None
+    status = 'error'
     try:
-        # Extrair o corpo da mensagem
-        body = json.loads(message['Body'])
+        # Sem transformação o corpo segue como recebido; um JSON inválido é recusado pelo serviço (4xx)
+        if RAW_BODY_PASSTHROUGH:
+            payload = codec.raw_body(message['Body'])
+        else:
+            payload = codec.dumps_bytes(codec.loads(message['Body']))
+        
+        if not circuit_breaker.allow_request():
+            return REJECTED
         
-        # Enviar para o serviço ECS (Java Processor)
-        response = requests.post(
+        # Aguardar vaga no limite de requisições simultâneas e enviar para o serviço ECS (Java Processor)
+        flow_controller.acquire()
+        start_time = time.time()
+        consumer_metrics.DISPATCH_IN_FLIGHT.inc()
+        response = http_client.post(
             ECS_SERVICE_URL,
-            json=body,
-            headers={'Content-Type': 'application/json'},
-            timeout=5  # Timeout para a requisição HTTP
+            data=payload,
+            headers={'Content-Type': codec.JSON_CONTENT_TYPE}
         )
+        status = response.status_code
+        
+        # Apenas erros do servidor indicam indisponibilidade do serviço
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
         
         # Verificar se a resposta foi bem-sucedida
         if response.status_code == 200:
-            logger.info(f"Mensagem processada com sucesso: {body.get('operation', 'UNKNOWN')} - {response.json().get('status', 'OK')}")
+            result = codec.loads(response.content)
+            logger.info(f"Mensagem processada com sucesso: {result.get('operation', 'UNKNOWN')} - {result.get('status', 'OK')}")
             return True
         else:
             logger.error(f"Erro ao processar mensagem: Status {response.status_code}, Resposta: {response.text}")
             return False
-    except requests.exceptions.RequestException as e:
+    except http_client.request_errors as e:
+        circuit_breaker.record_failure()
         logger.error(f"Erro de conexão com o serviço ECS: {str(e)}")
         return False
     except Exception as e:
         logger.error(f"Erro ao processar mensagem: {str(e)}")
         return False
+    finally:
+        # A latência medida orienta o visibility timeout
+        if start_time is not None:
+            latency = time.time() - start_time
+            visibility_manager.observe(latency)
+            flow_controller.release(latency, is_congestion(status))
+            consumer_metrics.DISPATCH_IN_FLIGHT.dec()
+            consumer_metrics.observe_dispatch('process', status, latency)
+
+def dispatch_messages(messages):
+    """
+    Envia as mensagens de um lote para o serviço ECS.
+    Com DISPATCH_CONCURRENCY > 1 as requisições são feitas em paralelo, limitadas
+    pelo tamanho do pool e, com FLOW_CONTROL_ENABLED, pelo limite adaptativo. Retorna a lista de resultados na mesma ordem das mensagens
+    (True, False ou REJECTED).
+    """
+    if dispatch_executor is None or len(messages) <= 1:
+        return [process_message(message) for message in messages]
+    
+    # process_message trata as próprias exceções, então map sempre retorna um bool por mensagem
+    return list(dispatch_executor.map(process_message, messages))
+
+def send_to_dlq(queue_url, dlq_url, failed_messages):
+    """
+    Envia mensagens com falha para a DLQ e as remove da fila principal, em lote
+    (send_message_batch e delete_message_batch). Retorna o relatório por mensagem.
+    """
+    start_time = time.time()
+    report = forward_to_dlq(sqs, queue_url, dlq_url, failed_messages, max_retries=DLQ_MAX_RETRIES,
+                            compressor=dlq_compressor)
+    consumer_metrics.observe_dlq(report, time.time() - start_time)
+    
+    # Mensagens que não chegaram à DLQ serão reentregues: reduzir a visibilidade para voltarem logo
+    retry_handles = [message['ReceiptHandle'] for message, result in zip(failed_messages, report)
+                     if result['status'] in (STATUS_SEND_FAILED, STATUS_INVALID_BODY)]
+    visibility_manager.release([message['ReceiptHandle'] for message in failed_messages])
+    visibility_manager.release_for_retry(queue_url, retry_handles)
+    
+    return report
+
+def process_message_bulk(messages):
+    """
+    Envia o lote inteiro ao endpoint /process/batch do serviço ECS em uma única requisição.
+    Cada item leva o MessageId do SQS, usado para associar o status devolvido à mensagem.
+    Retorna a lista de resultados na mesma ordem das mensagens (True, False ou REJECTED).
+    """
+    results = [False] * len(messages)
+    positions = {}
+    items = []
+    
+    for index, message in enumerate(messages):
+        try:
+            body = codec.loads(message['Body'])
+        except Exception as e:
+            logger.error(f"Erro ao processar mensagem: {str(e)}")
+            continue
+        # Um JSON válido que não é objeto não leva o messageId: falha como um corpo inválido, sem afetar o lote
+        if not isinstance(body, dict):
+            logger.error(f"Erro ao processar mensagem {message['MessageId']}: corpo não é um objeto JSON")
+            continue
+        body['messageId'] = message['MessageId']
+        positions[message['MessageId']] = index
+        items.append(body)
+    
+    if not items:
+        return results
+    
+    if not circuit_breaker.allow_request():
+        return [REJECTED if message['MessageId'] in positions else False for message in messages]
+    
+    start_time = time.time()
+    status = 'error'
+    consumer_metrics.DISPATCH_IN_FLIGHT.inc()
+    try:
+        response = http_client.post(
+            ECS_BATCH_URL,
+            data=codec.dumps_bytes(items),
+            headers={'Content-Type': codec.JSON_CONTENT_TYPE}
+        )
+        status = response.status_code
+        
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        
+        if response.status_code != 200:
+            logger.error(f"Erro ao processar lote: Status {response.status_code}, Resposta: {response.text}")
+            return results
+        
+        for item in codec.loads(response.content):
+            index = positions.get(item.get('messageId'))
+            if index is None:
+                continue
+            # Diferente do endpoint unitário, o status de cada item decide entre remoção e DLQ
+            results[index] = item.get('status') != 'ERROR'
+            if not results[index]:
+                logger.error(f"Erro ao processar mensagem {item.get('messageId')}: {item.get('message')}")
+        
+        logger.info(f"Lote processado pelo endpoint em lote: {sum(results)}/{len(items)} com sucesso")
+    except http_client.request_errors as e:
+        circuit_breaker.record_failure()
+        logger.error(f"Erro de conexão com o serviço ECS: {str(e)}")
+    except Exception as e:
+        logger.error(f"Erro ao processar lote: {str(e)}")
+    finally:
+        # Todas as mensagens do lote aguardaram a requisição inteira
+        latency = time.time() - start_time
+        visibility_manager.observe(latency)
+        # No endpoint em lote o limite adaptativo define quantas mensagens seguem por requisição
+        flow_controller.record(latency, is_congestion(status), len(items))
+        consumer_metrics.DISPATCH_IN_FLIGHT.dec()
+        consumer_metrics.observe_dispatch('batch', status, latency)
+    
+    return results
+
+def drop_duplicates(queue_url, messages):
+    """
+    Agenda a remoção das mensagens já processadas, sem chamar o serviço ECS.
+    Retorna as mensagens que ainda precisam ser processadas.
+    """
+    if dedup_filter is None or not messages:
+        return messages
+    
+    duplicates, fresh = dedup_filter.split(messages)
+    if duplicates:
+        handles = [message['ReceiptHandle'] for message in duplicates]
+        ack_manager.ack(queue_url, handles)
+        visibility_manager.release(handles)
+    return fresh
 
-def process_message_batch(queue_url, dlq_url, batch_size):
+def mark_processed(messages):
+    """Registra no cache de idempotência as mensagens processadas com sucesso."""
+    if dedup_filter is not None and messages:
+        dedup_filter.mark_processed(messages)
+
+def dispatch_batch(messages, dispatch_fn):
+    """
+    Envia as mensagens com dispatch_fn(lista) -> resultados, aplicando a coalescência
+    por chave quando habilitada. Retorna um resultado por mensagem, na mesma ordem.
+    """
+    if not messages:
+        return []
+    if not COALESCE_ENABLED:
+        return dispatch_fn(messages)
+    
+    results, saved = dispatch_coalesced(messages, dispatch_fn)
+    if saved:
+        consumer_metrics.COALESCED_MESSAGES.inc(saved)
+    return results
+
+def receive_messages(queue_url, max_messages, visibility_timeout, wait_time_seconds):
+    """Recebe um lote do SQS e passa a acompanhar a visibilidade das mensagens recebidas."""
+    start_time = time.time()
+    response = sqs.receive_message(
+        QueueUrl=queue_url,
+        MaxNumberOfMessages=max_messages,  # Otimizado para processar 10 mensagens por vez
+        VisibilityTimeout=visibility_timeout,
+        WaitTimeSeconds=wait_time_seconds,  # Long polling para reduzir custos
+        MessageAttributeNames=[ENCODING_ATTRIBUTE]
+    )
+    
+    messages = response.get('Messages', [])
+    consumer_metrics.observe_receive(time.time() - start_time, messages)
+    if messages:
+        # O heartbeat estende a visibilidade enquanto o lote estiver em processamento
+        visibility_manager.track(queue_url, messages, visibility_timeout)
+        consumer_metrics.DECOMPRESSED_MESSAGES.inc(decode_messages(messages))
+    return messages
+
+def receive_window(queue_url, batch_size, visibility_timeout, wait_time_seconds=RECEIVE_WAIT_SECONDS):
+    """
+    Recebe mensagens por até COALESCE_WINDOW_MS após o primeiro lote, para que operações
+    sobre a mesma chave sejam coalescidas. Sem a janela, recebe um único lote.
+    """
+    messages = receive_messages(queue_url, batch_size, visibility_timeout, wait_time_seconds)
+    if not messages or not COALESCE_ENABLED or COALESCE_WINDOW_MS <= 0:
+        return messages
+    
+    deadline = time.time() + COALESCE_WINDOW_MS / 1000.0
+    while time.time() < deadline and len(messages) < COALESCE_MAX_MESSAGES:
+        more = receive_messages(queue_url, min(batch_size, COALESCE_MAX_MESSAGES - len(messages)),
+                                visibility_timeout, 0)
+        if not more:
+            time.sleep(min(0.05, max(deadline - time.time(), 0)))
+        messages.extend(more)
+    return messages
+
+def process_message_batch(queue_url, dlq_url, batch_size, wait_time_seconds=RECEIVE_WAIT_SECONDS):
     """
     Recebe e processa um lote de mensagens da fila SQS.
     Implementa a otimização de processamento em lote.
+    Retorna o número de mensagens recebidas.
     """
+    messages = []
+    settled = set()  # Receipt handles já removidos, enviados para a DLQ ou devolvidos à fila
     try:
+        # Com o circuito aberto o serviço ECS está indisponível: não receber novas mensagens
+        if circuit_breaker.is_open():
+            time.sleep(min(circuit_breaker.remaining_open_seconds(), RECEIVE_WAIT_SECONDS))
+            return 0
+        
         # Receber mensagens em lote
         start_time = time.time()
+        visibility_timeout = visibility_manager.receive_timeout()  # Calculado a partir da latência medida
         
-        response = sqs.receive_message(
-            QueueUrl=queue_url,
-            MaxNumberOfMessages=batch_size,  # Otimizado para processar 10 mensagens por vez
-            VisibilityTimeout=180,  # 3 minutos (mesmo valor configurado na fila)
-            WaitTimeSeconds=5  # Long polling para reduzir custos
-        )
-        
-        messages = response.get('Messages', [])
+        messages = receive_window(queue_url, batch_size, visibility_timeout, wait_time_seconds)
         if not messages:
             return 0
         
         logger.info(f"Recebido lote com {len(messages)} mensagens")
         
+        # Reentregas de mensagens já processadas são removidas sem chamar o serviço ECS
+        pending_messages = drop_duplicates(queue_url, messages)
+        settled.update(msg['ReceiptHandle'] for msg in messages)
+        settled.difference_update(msg['ReceiptHandle'] for msg in pending_messages)
+        
         # Processar cada mensagem no lote
         successful_messages = []
         failed_messages = []
+        rejected_messages = []
+        
+        results = dispatch_batch(pending_messages, process_message_bulk if USE_BATCH_ENDPOINT else dispatch_messages)
         
-        for message in messages:
-            if process_message(message):
-                successful_messages.append({
-                    'Id': message['MessageId'],
-                    'ReceiptHandle': message['ReceiptHandle']
-                })
+        for message, processed in zip(pending_messages, results):
+            if processed is REJECTED:
+                rejected_messages.append(message)
+            elif processed:
+                successful_messages.append(message)
             else:
                 failed_messages.append(message)
         
-        # Remover mensagens processadas com sucesso da fila
-        if successful_messages:
-            sqs.delete_message_batch(
-                QueueUrl=queue_url,
-                Entries=[{'Id': msg['Id'], 'ReceiptHandle': msg['ReceiptHandle']} for msg in successful_messages]
-            )
+        # Agendar a remoção das mensagens processadas com sucesso (agrupada com os próximos lotes)
+        ack_manager.ack(queue_url, [msg['ReceiptHandle'] for msg in successful_messages])
+        visibility_manager.release([msg['ReceiptHandle'] for msg in successful_messages])
+        settled.update(msg['ReceiptHandle'] for msg in successful_messages)
+        mark_processed(successful_messages)
         
         # Enviar mensagens com falha para a DLQ
-        for message in failed_messages:
-            try:
-                # Extrair o corpo da mensagem
-                body = json.loads(message['Body'])
-                
-                # Adicionar informações de erro
-                body['error'] = {
-                    'timestamp': datetime.now().isoformat(),
-                    'reason': 'Failed to process by ECS service'
-                }
-                
-                # Enviar para a DLQ
-                sqs.send_message(
-                    QueueUrl=dlq_url,
-                    MessageBody=json.dumps(body)
-                )
-                
-                # Remover da fila principal
-                sqs.delete_message(
-                    QueueUrl=queue_url,
-                    ReceiptHandle=message['ReceiptHandle']
-                )
-                
-                logger.info(f"Mensagem com falha enviada para DLQ: {message['MessageId']}")
-            except Exception as e:
-                logger.error(f"Erro ao mover mensagem para DLQ: {str(e)}")
+        send_to_dlq(queue_url, dlq_url, failed_messages)
+        settled.update(msg['ReceiptHandle'] for msg in failed_messages)
+        
+        # Mensagens recusadas pelo circuit breaker voltam à fila rapidamente, sem ir para a DLQ
+        if rejected_messages:
+            visibility_manager.release_for_retry(queue_url, [msg['ReceiptHandle'] for msg in rejected_messages])
+            settled.update(msg['ReceiptHandle'] for msg in rejected_messages)
+            consumer_metrics.count_results(rejected=len(rejected_messages))
+            logger.warning(f"{len(rejected_messages)} mensagens devolvidas à fila com o circuit breaker aberto")
         
         # Atualizar métricas
         processing_time = (time.time() - start_time) * 1000  # em milissegundos
-        metrics['messages_processed'] += len(successful_messages)
-        metrics['batch_processed'] += 1
-        metrics['errors'] += len(failed_messages)
-        metrics['processing_time_ms'] += processing_time
+        update_metrics(len(successful_messages), len(failed_messages), processing_time, 1)
         
-        if metrics['batch_processed'] > 0:
-            metrics['avg_processing_time_ms'] = metrics['processing_time_ms'] / metrics['batch_processed']
-        
-        logger.info(f"Processado lote em {processing_time:.2f}ms. Sucesso: {len(successful_messages)}, Falhas: {len(failed_messages)}")
+        logger.info(f"Processado lote em {processing_time:.2f}ms. Sucesso: {len(successful_messages)}, "
+                    f"Falhas: {len(failed_messages)}, Devolvidas: {len(rejected_messages)}, "
+                    f"Duplicadas: {len(messages) - len(pending_messages)}")
         
         return len(messages)
     except Exception as e:
         logger.error(f"Erro ao processar lote de mensagens: {str(e)}")
-        metrics['errors'] += 1
+        update_metrics(0, 1, 0.0, 0)
+        # Sem isso o heartbeat seguiria estendendo mensagens que ninguém processa: devolvê-las à fila
+        unsettled = [msg['ReceiptHandle'] for msg in messages if msg['ReceiptHandle'] not in settled]
+        if unsettled:
+            visibility_manager.release_for_retry(queue_url, unsettled)
+        # Evitar loop apertado quando o SQS está indisponível
+        time.sleep(1)
         return 0
 
+def dispatch_until_deadline(messages, remaining_ms_fn=None):
+    """
+    Envia as mensagens ao serviço ECS enquanto houver tempo de execução.
+    remaining_ms_fn retorna o tempo restante da invocação; novas requisições deixam de ser
+    iniciadas quando ele fica abaixo de LAMBDA_TIMEOUT_MARGIN_MS. Mensagens não enviadas
+    ficam como REJECTED. Retorna a lista de resultados na mesma ordem das mensagens.
+    """
+    results = [REJECTED] * len(messages)
+    
+    def expired():
+        return remaining_ms_fn is not None and remaining_ms_fn() < LAMBDA_TIMEOUT_MARGIN_MS
+    
+    if dispatch_executor is None:
+        for index, message in enumerate(messages):
+            if expired():
+                break
+            results[index] = process_message(message)
+        return results
+    
+    # No máximo o limite de concorrência em andamento, para que o prazo seja verificado antes de cada envio
+    in_flight = {}
+    for index, message in enumerate(messages):
+        if len(in_flight) >= flow_controller.limit:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[in_flight.pop(future)] = future.result()
+        if expired():
+            break
+        in_flight[dispatch_executor.submit(process_message, message)] = index
+    
+    for future in in_flight:
+        results[in_flight[future]] = future.result()
+    return results
+
+def handler(event, context):
+    """
+    Ponto de entrada para execução como AWS Lambda acionada por event source mapping do SQS.
+    Processa os Records do evento e retorna batchItemFailures, para que apenas os registros
+    com falha sejam reentregues. A remoção dos sucessos e o encaminhamento para a DLQ
+    (redrive policy) ficam a cargo do serviço Lambda.
+    Os clientes em nível de módulo são reaproveitados entre invocações.
+    """
+    start_time = time.time()
+    records = event.get('Records', [])
+    messages = [{
+        'MessageId': record['messageId'],
+        'ReceiptHandle': record['receiptHandle'],
+        'Body': record['body'],
+        'MessageAttributes': dict(record.get('messageAttributes') or {})
+    } for record in records]
+    consumer_metrics.DECOMPRESSED_MESSAGES.inc(decode_messages(messages))
+    
+    # Registros já processados são confirmados ao serviço Lambda sem chamar o serviço ECS
+    if dedup_filter is not None:
+        duplicates, messages = dedup_filter.split(messages)
+    else:
+        duplicates = []
+    
+    remaining_ms_fn = context.get_remaining_time_in_millis if context is not None else None
+    
+    def dispatch_fn(batch):
+        if not USE_BATCH_ENDPOINT:
+            return dispatch_until_deadline(batch, remaining_ms_fn)
+        expired = remaining_ms_fn is not None and remaining_ms_fn() < LAMBDA_TIMEOUT_MARGIN_MS
+        return [REJECTED] * len(batch) if expired else process_message_bulk(batch)
+    
+    results = dispatch_batch(messages, dispatch_fn)
+    
+    failures = [message['MessageId'] for message, processed in zip(messages, results) if not processed]
+    not_sent = sum(1 for processed in results if processed is REJECTED)
+    mark_processed([message for message, processed in zip(messages, results) if processed])
+    
+    processing_time = (time.time() - start_time) * 1000
+    update_metrics(len(messages) - len(failures), len(failures) - not_sent, processing_time, 1)
+    consumer_metrics.count_results(rejected=not_sent)
+    
+    logger.info(f"Invocação processada em {processing_time:.2f}ms. Registros: {len(records)}, "
+                f"Falhas: {len(failures) - not_sent}, Não enviados: {not_sent}, Duplicados: {len(duplicates)}")
+    
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+def update_metrics(successful, failed, processing_time_ms, batches):
+    """Atualiza as métricas de forma segura entre threads."""
+    consumer_metrics.count_results(successful=successful, failed=failed)
+    with metrics_lock:
+        metrics['messages_processed'] += successful
+        metrics['batch_processed'] += batches
+        metrics['errors'] += failed
+        metrics['processing_time_ms'] += processing_time_ms
+        
+        if metrics['batch_processed'] > 0:
+            metrics['avg_processing_time_ms'] = metrics['processing_time_ms'] / metrics['batch_processed']
+
 def print_metrics():
     """Imprime métricas periodicamente para monitoramento."""
     while True:
+        http_stats = http_client.stats()
+        ack_stats = ack_manager.stats()
+        visibility_stats = visibility_manager.stats()
+        breaker_stats = circuit_breaker.stats()
+        flow_stats = flow_controller.stats()
+        queue_stats = queue_scheduler.stats() if MULTI_QUEUE and CONSUMER_MODE == 'batch' else None
+        dedup_stats = dedup_filter.stats() if dedup_filter is not None else None
         logger.info(f"MÉTRICAS: Mensagens processadas: {metrics['messages_processed']}, "
                    f"Lotes: {metrics['batch_processed']}, "
                    f"Erros: {metrics['errors']}, "
-                   f"Tempo médio de processamento: {metrics['avg_processing_time_ms']:.2f}ms")
+                   f"Tempo médio de processamento: {metrics['avg_processing_time_ms']:.2f}ms, "
+                   f"Conexões HTTP novas: {http_stats['new_connections']}, "
+                   f"Reutilizadas: {http_stats['reused_connections']} ({http_stats['reuse_ratio']:.1%}), "
+                   f"Remoções: {ack_stats['deleted']} em {ack_stats['delete_calls']} chamadas, "
+                   f"Falhas de remoção permanentes: {ack_stats['failed_permanent']}, "
+                   f"Esgotadas: {ack_stats['failed_exhausted']}, "
+                   f"Visibility timeout: {visibility_stats['receive_timeout']}s, "
+                   f"Extensões: {visibility_stats['extended']}, "
+                   f"Liberadas para reprocessamento: {visibility_stats['released_for_retry']}, "
+                   f"Circuit breaker: {breaker_stats['state']} (recusadas: {breaker_stats['rejected']}, "
+                   f"transições: {breaker_stats['transitions']}), "
+                   f"Limite de concorrência: {flow_stats['limit']} (reduções: {flow_stats['decreases']})"
+                   + (f", Duplicadas descartadas: {dedup_stats['hits_local'] + dedup_stats['hits_backend']} "
+                      f"({dedup_stats['hit_ratio']:.1%})" if dedup_stats else "")
+                   + (", Recebidas por fila: " + ", ".join(f"{name}={stats['received']}"
+                                                          for name, stats in queue_stats.items())
+                      if queue_stats else ""))
         time.sleep(10)
 
+def request_shutdown(signum, frame):
+    """
+    Tratador de SIGTERM dos modos batch e pipeline: o batch conclui e confirma o lote em andamento e o pipeline
+    para de receber e drena a fila de trabalho. O modo async trata o sinal no próprio event loop.
+    """
+    logger.info(f"Sinal {signal.Signals(signum).name} recebido: encerrando após as mensagens em andamento")
+    shutdown_event.set()
+
+def run_multi_queue(dlq_url):
+    """Processa lotes das filas de SQS_QUEUES na ordem definida pelo escalonador, até ser interrompido."""
+    while not shutdown_event.is_set():
+        # Com o circuito aberto nenhuma fila é consultada, e as filas não entram em backoff por isso
+        if circuit_breaker.is_open():
+            shutdown_event.wait(min(circuit_breaker.remaining_open_seconds(), RECEIVE_WAIT_SECONDS))
+            continue
+        
+        queue, wait_seconds = queue_scheduler.next_queue(RECEIVE_WAIT_SECONDS)
+        if queue is None:
+            # Todas as filas em backoff: aguardar a primeira ficar pronta
+            shutdown_event.wait(wait_seconds)
+            continue
+        
+        received = process_message_batch(queue.url, dlq_url, flow_controller.receive_size(BATCH_SIZE), wait_seconds)
+        queue_scheduler.record(queue, received)
+
+def run_pipeline(queue_url, dlq_url):
+    """Executa o consumidor em pipeline até ser interrompido."""
+    # Import tardio: o modo pipeline não é usado pelo handler Lambda
+    from pipeline import PipelinedConsumer
+    
+    consumer = PipelinedConsumer(
+        sqs,
+        queue_url,
+        dlq_url,
+        process_fn=process_message,
+        dlq_fn=send_to_dlq,
+        metrics_fn=update_metrics,
+        ack_manager=ack_manager,
+        visibility_manager=visibility_manager,
+        circuit_breaker=circuit_breaker,
+        dedup_filter=dedup_filter,
+        flow_controller=flow_controller,
+        batch_size=BATCH_SIZE,
+        receivers=PIPELINE_RECEIVERS,
+        workers=PIPELINE_WORKERS,
+        work_queue_size=PIPELINE_QUEUE_SIZE,
+        wait_time_seconds=RECEIVE_WAIT_SECONDS,
+        ack_flush_interval=ACK_FLUSH_MS / 1000.0
+    )
+    consumer.run_forever(shutdown_event)
+
+def run_async_consumer():
+    """Executa a engine assíncrona até ser interrompida."""
+    # Import tardio: asyncio, aiobotocore e aiohttp só são necessários neste modo
+    import asyncio
+    from async_consumer import AsyncConsumer
+    
+    consumer = AsyncConsumer(
+        aws_config={
+            'endpoint_url': AWS_ENDPOINT_URL,
+            'region_name': AWS_REGION,
+            'aws_access_key_id': AWS_ACCESS_KEY_ID,
+            'aws_secret_access_key': AWS_SECRET_ACCESS_KEY,
+            'aws_session_token': AWS_SESSION_TOKEN
+        },
+        queue_name=SQS_QUEUE_NAME,
+        dlq_name=SQS_DLQ_NAME,
+        ecs_service_url=ECS_SERVICE_URL,
+        metrics_fn=update_metrics,
+        batch_size=BATCH_SIZE,
+        receivers=ASYNC_RECEIVERS,
+        max_in_flight=ASYNC_MAX_IN_FLIGHT,
+        http_timeout=HTTP_TIMEOUT,
+        visibility_manager=visibility_manager,
+        circuit_breaker=circuit_breaker,
+        dedup_filter=dedup_filter,
+        coalesce=COALESCE_ENABLED,
+        raw_body_passthrough=RAW_BODY_PASSTHROUGH,
+        dlq_compressor=dlq_compressor,
+        wait_time_seconds=RECEIVE_WAIT_SECONDS,
+        dlq_max_retries=DLQ_MAX_RETRIES,
+        ack_max_retries=ACK_MAX_RETRIES,
+        ack_results_fn=ack_manager.record_results,
+        stop_signals=(signal.SIGTERM,)
+    )
+    asyncio.run(consumer.run())
+
+def start_metrics_endpoint():
+    """Expõe as métricas Prometheus do consumidor em /metrics."""
+    if not METRICS_ENABLED:
+        return
+    try:
+        consumer_metrics.start_metrics_server(
+            METRICS_PORT,
+            # A engine assíncrona usa o próprio cliente aiohttp
+            http_client=None if CONSUMER_MODE == 'async' else http_client,
+            ack_manager=ack_manager,
+            visibility_manager=visibility_manager,
+            circuit_breaker=circuit_breaker,
+            dedup_filter=dedup_filter,
+            # A engine assíncrona limita as mensagens em processamento com ASYNC_MAX_IN_FLIGHT
+            flow_controller=None if CONSUMER_MODE == 'async' else flow_controller,
+            queue_scheduler=queue_scheduler if MULTI_QUEUE and CONSUMER_MODE == 'batch' else None
+        )
+    except Exception as e:
+        logger.error(f"Erro ao iniciar o endpoint de métricas: {str(e)}")
+
 def main():
     """Função principal que consome mensagens da fila SQS em lote."""
-    main_queue_url, dlq_url = wait_for_queues()
-    if not main_queue_url or not dlq_url:
+    signal.signal(signal.SIGTERM, request_shutdown)
+    start_metrics_endpoint()
+    
+    if CONSUMER_MODE == 'async':
+        # A engine assíncrona localiza as filas com o próprio cliente SQS
+        metrics_thread = threading.Thread(target=print_metrics, daemon=True)
+        metrics_thread.start()
+        
+        logger.info(f"Iniciando consumidor Lambda. Modo: async, Tamanho do lote: {BATCH_SIZE}")
+        visibility_manager.start()
+        try:
+            run_async_consumer()
+        except KeyboardInterrupt:
+            logger.info("Consumidor Lambda interrompido pelo usuário")
+        except Exception as e:
+            logger.error(f"Erro no consumidor Lambda: {str(e)}")
+        finally:
+            visibility_manager.stop()
+        return
+    
+    # Várias filas apenas no modo batch; pipeline e async consomem SQS_QUEUE_NAME
+    multi_queue = MULTI_QUEUE and CONSUMER_MODE == 'batch'
+    if MULTI_QUEUE and not multi_queue:
+        logger.warning(f"SQS_QUEUES requer CONSUMER_MODE=batch; consumindo apenas '{SQS_QUEUE_NAME}'")
+    queue_names = queue_scheduler.names() if multi_queue else [SQS_QUEUE_NAME]
+    
+    queue_urls, dlq_url = wait_for_queues(queue_names)
+    if len(queue_urls) != len(queue_names) or not dlq_url:
         logger.error("Não foi possível encontrar as filas SQS. Encerrando.")
         return
     
@@ -228,20 +893,33 @@ def main():
     metrics_thread = threading.Thread(target=print_metrics, daemon=True)
     metrics_thread.start()
     
-    logger.info(f"Iniciando consumidor Lambda. Tamanho do lote: {BATCH_SIZE}")
+    logger.info(f"Iniciando consumidor Lambda. Modo: {CONSUMER_MODE}, Tamanho do lote: {BATCH_SIZE}, "
+                f"Concorrência: {DISPATCH_CONCURRENCY}, Endpoint em lote: {USE_BATCH_ENDPOINT}, "
+                f"Controle adaptativo: {FLOW_CONTROL_ENABLED}")
     
+    ack_manager.start()
+    visibility_manager.start()
     try:
-        while True:
-            # Processar um lote de mensagens
-            messages_processed = process_message_batch(main_queue_url, dlq_url, BATCH_SIZE)
-            
-            # Se não houver mensagens, aguardar um pouco antes de verificar novamente
-            if messages_processed == 0:
-                time.sleep(1)
+        if CONSUMER_MODE == 'pipeline':
+            run_pipeline(queue_urls[SQS_QUEUE_NAME], dlq_url)
+        elif multi_queue:
+            queue_scheduler.bind(queue_urls)
+            logger.info(f"Consumindo {len(queue_names)} filas com pesos: {dict(SQS_QUEUES)}")
+            run_multi_queue(dlq_url)
+        else:
+            main_queue_url = queue_urls[SQS_QUEUE_NAME]
+            while not shutdown_event.is_set():
+                # Processar um lote de mensagens. O long polling já aguarda quando a fila está vazia,
+                # então não há espera adicional entre os lotes.
+                process_message_batch(main_queue_url, dlq_url, flow_controller.receive_size(BATCH_SIZE))
     except KeyboardInterrupt:
         logger.info("Consumidor Lambda interrompido pelo usuário")
     except Exception as e:
         logger.error(f"Erro no consumidor Lambda: {str(e)}")
+    finally:
+        # Confirmar as mensagens já processadas antes de encerrar
+        ack_manager.stop()
+        visibility_manager.stop()
 
 if __name__ == "__main__":
     main()
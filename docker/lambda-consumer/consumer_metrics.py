@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Métricas Prometheus do consumidor, expostas num endpoint HTTP /metrics:
+1. Contadores e histogramas de latência para recebimento, envio ao Java Processor, remoção e DLQ
+2. Distribuição do tamanho dos lotes recebidos e gauges de mensagens em processamento
+3. Estado do circuit breaker, do pool HTTP, das remoções, do visibility timeout, do cache de idempotência
+   do limite adaptativo de concorrência e do escalonamento entre filas, lidos no momento da coleta
+Os objetos do prometheus_client são thread-safe e podem ser usados pelas três engines.
+Até o endpoint ser iniciado as métricas não têm efeito e o prometheus_client nem é importado: o handler Lambda,
+que não expõe /metrics, não paga essa importação no cold start.
+"""
+import logging
+import threading
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Buckets de latência das chamadas ao SQS e ao Java Processor (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+class _NoopMetric:
+    """Métrica sem efeito, com a interface usada dos Counter, Gauge e Histogram."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+    def time(self):
+        return nullcontext()
+
+_NOOP = _NoopMetric()
+RECEIVE_SECONDS = MESSAGES_RECEIVED = BATCH_SIZE = _NOOP
+DISPATCH_SECONDS = MESSAGES_PROCESSED = DISPATCH_IN_FLIGHT = DECOMPRESSED_MESSAGES = COALESCED_MESSAGES = _NOOP
+DELETE_SECONDS = DLQ_SECONDS = DLQ_MESSAGES = _NOOP
+
+_enable_lock = threading.Lock()
+_enabled = False
+
+def enable():
+    """
+    Cria as métricas Prometheus no lugar das sem efeito, importando o prometheus_client. Idempotente; chamado
+    ao iniciar o endpoint (ou na importação do consumidor com LAZY_CLIENTS=false).
+    """
+    global RECEIVE_SECONDS, MESSAGES_RECEIVED, BATCH_SIZE
+    global DISPATCH_SECONDS, MESSAGES_PROCESSED, DISPATCH_IN_FLIGHT, DECOMPRESSED_MESSAGES, COALESCED_MESSAGES
+    global DELETE_SECONDS, DLQ_SECONDS, DLQ_MESSAGES, _enabled
+    with _enable_lock:
+        if _enabled:
+            return
+        from prometheus_client import Counter, Gauge, Histogram
+
+        RECEIVE_SECONDS = Histogram(
+            'consumer_sqs_receive_seconds', 'Duração das chamadas receive_message (inclui o long polling)',
+            buckets=LATENCY_BUCKETS
+        )
+        MESSAGES_RECEIVED = Counter('consumer_sqs_messages_received_total', 'Mensagens recebidas do SQS')
+        BATCH_SIZE = Histogram(
+            'consumer_batch_size', 'Mensagens por receive_message que retornou mensagens',
+            buckets=(1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+        )
+
+        DISPATCH_SECONDS = Histogram(
+            'consumer_dispatch_seconds', 'Duração das requisições ao Java Processor',
+            ['endpoint', 'status'], buckets=LATENCY_BUCKETS
+        )
+        MESSAGES_PROCESSED = Counter(
+            'consumer_messages_processed_total', 'Mensagens processadas por resultado (success, failed, rejected)',
+            ['result']
+        )
+        DISPATCH_IN_FLIGHT = Gauge('consumer_dispatch_in_flight', 'Requisições ao Java Processor em andamento')
+        DECOMPRESSED_MESSAGES = Counter(
+            'consumer_messages_decompressed_total', 'Mensagens recebidas no envelope de compressão e descomprimidas'
+        )
+        COALESCED_MESSAGES = Counter(
+            'consumer_coalesced_messages_total',
+            'Mensagens confirmadas sem envio por terem sido coalescidas na mesma chave'
+        )
+
+        DELETE_SECONDS = Histogram(
+            'consumer_sqs_delete_seconds', 'Duração das chamadas delete_message_batch', buckets=LATENCY_BUCKETS
+        )
+        DLQ_SECONDS = Histogram(
+            'consumer_dlq_send_seconds', 'Duração do encaminhamento de um bloco de mensagens para a DLQ',
+            buckets=LATENCY_BUCKETS
+        )
+        DLQ_MESSAGES = Counter(
+            'consumer_dlq_messages_total', 'Mensagens encaminhadas para a DLQ por status do relatório', ['status']
+        )
+        _enabled = True
+
+def observe_receive(seconds, messages):
+    """Registra uma chamada receive_message e o tamanho do lote devolvido."""
+    RECEIVE_SECONDS.observe(seconds)
+    if messages:
+        MESSAGES_RECEIVED.inc(len(messages))
+        BATCH_SIZE.observe(len(messages))
+
+def observe_dispatch(endpoint, status, seconds):
+    """Registra uma requisição ao Java Processor. status é o código HTTP ou 'error'."""
+    DISPATCH_SECONDS.labels(endpoint=endpoint, status=str(status)).observe(seconds)
+
+def count_results(successful=0, failed=0, rejected=0):
+    """Contabiliza o resultado das mensagens de um lote."""
+    for result, count in (('success', successful), ('failed', failed), ('rejected', rejected)):
+        if count:
+            MESSAGES_PROCESSED.labels(result=result).inc(count)
+
+def observe_dlq(report, seconds):
+    """Registra o encaminhamento de um bloco para a DLQ a partir do relatório por mensagem."""
+    if not report:
+        return
+    DLQ_SECONDS.observe(seconds)
+    for result in report:
+        DLQ_MESSAGES.labels(status=result['status']).inc()
+
+class _StatsCollector:
+    """Exporta no momento da coleta os contadores dos componentes do consumidor."""
+
+    def __init__(self, http_client=None, ack_manager=None, visibility_manager=None, circuit_breaker=None,
+                 dedup_filter=None, flow_controller=None, queue_scheduler=None):
+        self.http_client = http_client
+        self.ack_manager = ack_manager
+        self.visibility_manager = visibility_manager
+        self.circuit_breaker = circuit_breaker
+        self.dedup_filter = dedup_filter
+        self.flow_controller = flow_controller
+        self.queue_scheduler = queue_scheduler
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        if self.http_client:
+            stats = self.http_client.stats()
+            connections = CounterMetricFamily('consumer_http_connections', 'Conexões HTTP com o Java Processor',
+                                              labels=['kind'])
+            connections.add_metric(['new'], stats['new_connections'])
+            connections.add_metric(['reused'], stats['reused_connections'])
+            yield connections
+
+        if self.ack_manager:
+            stats = self.ack_manager.stats()
+            yield CounterMetricFamily('consumer_sqs_messages_deleted', 'Mensagens removidas da fila',
+                                      value=stats['deleted'])
+            yield CounterMetricFamily('consumer_sqs_delete_calls', 'Chamadas delete_message_batch',
+                                      value=stats['delete_calls'])
+            failures = CounterMetricFamily('consumer_sqs_delete_failures', 'Remoções com falha', labels=['kind'])
+            failures.add_metric(['permanent'], stats['failed_permanent'])
+            failures.add_metric(['exhausted'], stats['failed_exhausted'])
+            yield failures
+
+        if self.visibility_manager:
+            stats = self.visibility_manager.stats()
+            yield GaugeMetricFamily('consumer_messages_in_flight', 'Mensagens recebidas ainda não concluídas',
+                                    value=stats['in_flight'])
+            yield GaugeMetricFamily('consumer_visibility_timeout_seconds', 'Visibility timeout do próximo recebimento',
+                                    value=stats['receive_timeout'])
+            yield CounterMetricFamily('consumer_visibility_extended', 'Extensões de visibilidade pelo heartbeat',
+                                      value=stats['extended'])
+            yield CounterMetricFamily('consumer_visibility_released_for_retry',
+                                      'Mensagens devolvidas à fila para reprocessamento',
+                                      value=stats['released_for_retry'])
+
+        if self.circuit_breaker:
+            stats = self.circuit_breaker.stats()
+            state = GaugeMetricFamily('consumer_circuit_breaker_state', 'Estado atual do circuit breaker (1 = ativo)',
+                                      labels=['state'])
+            for name in ('closed', 'open', 'half_open'):
+                state.add_metric([name], 1 if stats['state'] == name else 0)
+            yield state
+            yield CounterMetricFamily('consumer_circuit_breaker_rejected', 'Chamadas recusadas pelo circuit breaker',
+                                      value=stats['rejected'])
+            transitions = CounterMetricFamily('consumer_circuit_breaker_transitions',
+                                              'Transições de estado do circuit breaker', labels=['transition'])
+            for transition, count in stats['transitions'].items():
+                transitions.add_metric([transition], count)
+            yield transitions
+
+        if self.dedup_filter:
+            stats = self.dedup_filter.stats()
+            lookups = CounterMetricFamily('consumer_dedup_lookups', 'Consultas ao cache de idempotência por resultado',
+                                          labels=['result'])
+            lookups.add_metric(['hit_local'], stats['hits_local'])
+            lookups.add_metric(['hit_backend'], stats['hits_backend'])
+            lookups.add_metric(['miss'], stats['misses'])
+            yield lookups
+            yield CounterMetricFamily('consumer_dedup_backend_errors', 'Erros no backend compartilhado de idempotência',
+                                      value=stats['backend_errors'])
+            yield GaugeMetricFamily('consumer_dedup_cache_entries', 'Chaves no cache local de idempotência',
+                                    value=stats['cache_size'])
+
+        if self.flow_controller:
+            stats = self.flow_controller.stats()
+            yield GaugeMetricFamily('consumer_flow_control_limit',
+                                    'Limite atual de requisições simultâneas ao Java Processor', value=stats['limit'])
+            latency = GaugeMetricFamily('consumer_flow_control_latency_seconds',
+                                        'Latências usadas pelo controle adaptativo', labels=['kind'])
+            latency.add_metric(['recent'], stats['short_latency'])
+            latency.add_metric(['reference'], stats['long_latency'])
+            yield latency
+            adjustments = CounterMetricFamily('consumer_flow_control_adjustments',
+                                              'Mudanças do limite de concorrência', labels=['direction'])
+            adjustments.add_metric(['increase'], stats['increases'])
+            adjustments.add_metric(['decrease'], stats['decreases'])
+            yield adjustments
+            yield CounterMetricFamily('consumer_flow_control_congestion_signals',
+                                      'Respostas com erro ou latência acima da tolerância',
+                                      value=stats['congestion_signals'])
+
+        if self.queue_scheduler:
+            received = CounterMetricFamily('consumer_queue_messages_received', 'Mensagens recebidas por fila',
+                                           labels=['queue'])
+            polls = CounterMetricFamily('consumer_queue_polls', 'Recebimentos por fila e resultado',
+                                        labels=['queue', 'result'])
+            backoff = GaugeMetricFamily('consumer_queue_idle_backoff_seconds',
+                                        'Tempo restante do backoff de polling da fila vazia', labels=['queue'])
+            for name, stats in self.queue_scheduler.stats().items():
+                received.add_metric([name], stats['received'])
+                polls.add_metric([name, 'messages'], stats['polls'] - stats['empty_polls'])
+                polls.add_metric([name, 'empty'], stats['empty_polls'])
+                backoff.add_metric([name], stats['backoff_seconds'])
+            yield received
+            yield polls
+            yield backoff
+
+def start_metrics_server(port, **components):
+    """
+    Registra os componentes do consumidor e inicia o endpoint /metrics numa thread própria.
+    components: http_client, ack_manager, visibility_manager, circuit_breaker, dedup_filter, flow_controller,
+    queue_scheduler.
+    """
+    enable()
+    from prometheus_client import start_http_server, REGISTRY
+
+    REGISTRY.register(_StatsCollector(**components))
+    start_http_server(port)
+    logger.info(f"Métricas Prometheus expostas na porta {port}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Camada de idempotência do consumidor para descartar reentregas do SQS (at-least-once):
+1. Chaves por MessageId do SQS e/ou pelo conteúdo (operação + id + timestamp da mensagem)
+2. Cache local limitado em memória, com despejo LRU e expiração por TTL
+3. Backend compartilhado opcional (tabela DynamoDB com escrita condicional) entre instâncias
+4. Contadores de acertos e falhas para medir as chamadas evitadas ao Java Processor
+As chaves só são registradas após o processamento com sucesso: falhas continuam sendo reprocessadas.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+import codec
+from sqs_batch import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+KEY_MESSAGE_ID = 'message_id'
+KEY_BODY = 'body'
+
+def message_keys(message, key_types):
+    """
+    Chaves de deduplicação de uma mensagem SQS.
+    A operação faz parte da chave de conteúdo: o DELETE de um registro repete o id e o timestamp do INSERT.
+    """
+    keys = []
+    if KEY_MESSAGE_ID in key_types and message.get('MessageId'):
+        keys.append(f"msg:{message['MessageId']}")
+
+    if KEY_BODY in key_types:
+        try:
+            body = codec.loads(message['Body'])
+        except Exception:
+            return keys
+        if not isinstance(body, dict):
+            return keys
+
+        data = body.get('data') or {}
+        if body.get('id'):
+            record = body['id']
+        elif body.get('customerId', data.get('customerId')):
+            record = f"{body.get('customerId', data.get('customerId'))}#{body.get('recordId', data.get('recordId'))}"
+        else:
+            return keys
+        keys.append(f"body:{body.get('operation', '')}:{record}:{body.get('timestamp', '')}")
+
+    return keys
+
+class LocalDedupCache:
+    """Conjunto de chaves com limite de tamanho (LRU) e expiração (TTL), thread-safe."""
+
+    def __init__(self, max_entries=100000, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # chave -> instante de expiração
+        self._lock = threading.Lock()
+
+    def contains(self, key):
+        now = time.time()
+        with self._lock:
+            expiry = self._entries.get(key)
+            if expiry is None:
+                return False
+            if expiry <= now:
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, keys):
+        expiry = time.time() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._entries[key] = expiry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+class DynamoDBDedupStore:
+    """
+    Backend compartilhado numa tabela DynamoDB (chave de partição 'dedupKey').
+    O registro usa escrita condicional (attribute_not_exists): uma chave já registrada
+    por outra instância não é sobrescrita nem tem a expiração estendida.
+    """
+
+    # Limite de chaves por chamada batch_get_item
+    MAX_BATCH_GET_KEYS = 100
+    # Novas tentativas das UnprocessedKeys (vazão da tabela excedida) antes de desistir da consulta
+    MAX_UNPROCESSED_RETRIES = 3
+
+    def __init__(self, dynamodb, table_name, ttl_seconds=3600):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+
+    def find_known(self, keys):
+        """Retorna o subconjunto de chaves já registradas e ainda não expiradas."""
+        known = set()
+        now = int(time.time())
+        keys = list(dict.fromkeys(keys))
+
+        for start in range(0, len(keys), self.MAX_BATCH_GET_KEYS):
+            request = {self.table_name: {
+                'Keys': [{'dedupKey': {'S': key}} for key in keys[start:start + self.MAX_BATCH_GET_KEYS]],
+                'ConsistentRead': True
+            }}
+            for attempt in range(self.MAX_UNPROCESSED_RETRIES + 1):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    # O TTL do DynamoDB remove os itens com atraso: conferir a expiração na leitura
+                    if int(item.get('expiryTime', {}).get('N', '0')) > now:
+                        known.add(item['dedupKey']['S'])
+                request = response.get('UnprocessedKeys')
+                if not request:
+                    break
+                if attempt == self.MAX_UNPROCESSED_RETRIES:
+                    # O chamador trata o erro processando as mensagens, sem filtrá-las
+                    pending = len(request.get(self.table_name, {}).get('Keys', []))
+                    raise RuntimeError(f"{pending} chaves não processadas pelo batch_get_item após "
+                                       f"{self.MAX_UNPROCESSED_RETRIES} novas tentativas")
+                time.sleep(backoff_delay(attempt))
+
+        return known
+
+    def add(self, keys):
+        expiry = str(int(time.time()) + self.ttl_seconds)
+        for key in keys:
+            try:
+                self.dynamodb.put_item(
+                    TableName=self.table_name,
+                    Item={'dedupKey': {'S': key}, 'expiryTime': {'N': expiry}},
+                    ConditionExpression='attribute_not_exists(dedupKey)'
+                )
+            except self.dynamodb.exceptions.ConditionalCheckFailedException:
+                pass
+
+class DedupFilter:
+    """
+    Separa as mensagens já processadas das novas, consultando o cache local e,
+    nas falhas locais, o backend compartilhado.
+    """
+
+    def __init__(self, local_cache, backend=None, key_types=(KEY_MESSAGE_ID, KEY_BODY)):
+        self.local_cache = local_cache
+        self.backend = backend
+        self.key_types = key_types
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits_local': 0, 'hits_backend': 0, 'misses': 0, 'backend_errors': 0}
+
+    def split(self, messages):
+        """Retorna (duplicadas, novas) preservando a ordem das mensagens."""
+        keys_by_message = [message_keys(message, self.key_types) for message in messages]
+
+        local_hits = [any(self.local_cache.contains(key) for key in keys) for keys in keys_by_message]
+        backend_known = set()
+        if self.backend:
+            pending = [key for keys, hit in zip(keys_by_message, local_hits) if not hit for key in keys]
+            if pending:
+                try:
+                    backend_known = self.backend.find_known(pending)
+                except Exception as e:
+                    # Sem o backend a mensagem é processada: a idempotência do destino continua valendo
+                    logger.error(f"Erro ao consultar o backend de deduplicação: {str(e)}")
+                    with self._stats_lock:
+                        self._stats['backend_errors'] += 1
+
+        duplicates = []
+        fresh = []
+        counts = {'hits_local': 0, 'hits_backend': 0, 'misses': 0}
+        for message, keys, local_hit in zip(messages, keys_by_message, local_hits):
+            if local_hit:
+                counts['hits_local'] += 1
+                duplicates.append(message)
+            elif backend_known.intersection(keys):
+                counts['hits_backend'] += 1
+                duplicates.append(message)
+                # Próximas reentregas são resolvidas localmente
+                self.local_cache.add(keys)
+            else:
+                counts['misses'] += 1
+                fresh.append(message)
+
+        with self._stats_lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+        if duplicates:
+            logger.info(f"{len(duplicates)} mensagens duplicadas descartadas sem chamar o serviço ECS")
+        return duplicates, fresh
+
+    def mark_processed(self, messages):
+        """Registra as chaves das mensagens processadas com sucesso."""
+        keys = [key for message in messages for key in message_keys(message, self.key_types)]
+        if not keys:
+            return
+        self.local_cache.add(keys)
+        if self.backend:
+            try:
+                self.backend.add(keys)
+            except Exception as e:
+                logger.error(f"Erro ao registrar chaves no backend de deduplicação: {str(e)}")
+                with self._stats_lock:
+                    self._stats['backend_errors'] += 1
+
+    def stats(self):
+        """Retorna acertos, falhas, taxa de acerto e o tamanho do cache local."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits_local'] + stats['hits_backend'] + stats['misses']
+        stats['hit_ratio'] = (stats['hits_local'] + stats['hits_backend']) / lookups if lookups else 0.0
+        stats['cache_size'] = len(self.local_cache)
+        return stats
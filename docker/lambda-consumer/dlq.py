@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Encaminhamento em lote de mensagens com falha para a DLQ:
+1. send_message_batch em lotes de até 10 entradas e 256 KB (pack_entries), repetindo apenas as entradas Failed
+   retentáveis
+2. Um delete_message_batch por bloco para remover da fila principal somente o que chegou à DLQ
+3. Relatório por mensagem com o resultado do encaminhamento
+4. Envelope de compressão opcional nos corpos encaminhados (mesmo formato dos produtores)
+"""
+import logging
+from datetime import datetime
+from functools import partial
+import codec
+from batch_sender import pack_entries, too_long_failure
+from sqs_batch import execute_batch, execute_batch_async
+
+logger = logging.getLogger(__name__)
+
+DLQ_ERROR_REASON = 'Failed to process by ECS service'
+
+# Status possíveis no relatório de encaminhamento
+STATUS_DEAD_LETTERED = 'dead_lettered'  # Enviada para a DLQ e removida da fila principal
+STATUS_SEND_FAILED = 'send_failed'  # Não foi aceita pela DLQ; permanece na fila principal
+STATUS_DELETE_FAILED = 'delete_failed'  # Enviada para a DLQ, mas a remoção da fila principal falhou
+STATUS_INVALID_BODY = 'invalid_body'  # Corpo não é um objeto JSON; fica para o redrive nativo da fila
+
+def build_dlq_entries(messages, reason=DLQ_ERROR_REASON, compressor=None):
+    """
+    Monta as entradas de send_message_batch com as informações de erro no corpo.
+    O Id de cada entrada é o índice da mensagem, único dentro da chamada.
+    Com um compressor, os corpos acima do limite dele seguem no envelope de compressão.
+    Retorna (entries, invalid), onde invalid mapeia Id -> erro de parsing.
+    """
+    entries = []
+    invalid = {}
+
+    for index, message in enumerate(messages):
+        entry_id = str(index)
+        try:
+            body = codec.loads(message['Body'])
+        except Exception as e:
+            invalid[entry_id] = str(e)
+            continue
+        if not isinstance(body, dict):
+            invalid[entry_id] = f"corpo não é um objeto JSON ({type(body).__name__})"
+            continue
+
+        body['error'] = {
+            'timestamp': datetime.now().isoformat(),
+            'reason': reason
+        }
+        entry = {'Id': entry_id, 'MessageBody': codec.dumps(body)}
+        if compressor:
+            entry['MessageBody'], attributes = compressor.encode(entry['MessageBody'])
+            if attributes:
+                entry['MessageAttributes'] = attributes
+        entries.append(entry)
+
+    return entries, invalid
+
+def pack_dlq_entries(entries):
+    """
+    Agrupa as entradas em lotes aceitos pelo send_message_batch: dez corpos da fila principal com o envelope
+    de erro podem passar de 256 KB. Retorna (lotes, falhas das entradas que sozinhas excedem o limite);
+    estas ficam na fila principal e seguem para a DLQ pela redrive policy.
+    """
+    batches, oversized = pack_entries(entries)
+    return batches, {entry['Id']: too_long_failure(entry) for entry in oversized}
+
+def build_delete_entries(messages, sent):
+    """Monta as entradas de delete_message_batch para as mensagens aceitas pela DLQ."""
+    return [{'Id': entry_id, 'ReceiptHandle': messages[int(entry_id)]['ReceiptHandle']} for entry_id in sent]
+
+def build_report(messages, invalid, send_failed, delete_failed):
+    """Monta o relatório por mensagem a partir dos resultados de cada etapa."""
+    report = []
+
+    for index, message in enumerate(messages):
+        entry_id = str(index)
+        result = {'MessageId': message['MessageId'], 'status': STATUS_DEAD_LETTERED}
+
+        if entry_id in invalid:
+            result.update(status=STATUS_INVALID_BODY, error=invalid[entry_id])
+        elif entry_id in send_failed:
+            result.update(status=STATUS_SEND_FAILED, error=send_failed[entry_id].get('Message', ''))
+        elif entry_id in delete_failed:
+            result.update(status=STATUS_DELETE_FAILED, error=delete_failed[entry_id].get('Message', ''))
+
+        report.append(result)
+
+    return report
+
+def log_report(report):
+    """Registra o resumo do encaminhamento e o detalhe das mensagens que não foram movidas."""
+    dead_lettered = sum(1 for result in report if result['status'] == STATUS_DEAD_LETTERED)
+    logger.info(f"Encaminhamento para DLQ: {dead_lettered}/{len(report)} mensagens movidas")
+
+    for result in report:
+        if result['status'] != STATUS_DEAD_LETTERED:
+            logger.error(f"Erro ao mover mensagem para DLQ: {result['MessageId']} - "
+                         f"{result['status']}: {result.get('error', '')}")
+
+def forward_to_dlq(sqs, queue_url, dlq_url, messages, max_retries=3, compressor=None):
+    """Envia as mensagens para a DLQ em lote e as remove da fila principal. Retorna o relatório."""
+    if not messages:
+        return []
+
+    entries, invalid = build_dlq_entries(messages, compressor=compressor)
+    batches, send_failed = pack_dlq_entries(entries)
+    sent = {}
+    for batch in batches:
+        batch_sent, batch_failed = execute_batch(partial(sqs.send_message_batch, QueueUrl=dlq_url), batch, max_retries)
+        sent.update(batch_sent)
+        send_failed.update(batch_failed)
+
+    delete_failed = {}
+    if sent:
+        _, delete_failed = execute_batch(
+            partial(sqs.delete_message_batch, QueueUrl=queue_url), build_delete_entries(messages, sent), max_retries
+        )
+
+    report = build_report(messages, invalid, send_failed, delete_failed)
+    log_report(report)
+    return report
+
+async def forward_to_dlq_async(sqs, queue_url, dlq_url, messages, max_retries=3, compressor=None):
+    """Versão assíncrona de forward_to_dlq, para clientes aiobotocore."""
+    if not messages:
+        return []
+
+    entries, invalid = build_dlq_entries(messages, compressor=compressor)
+    batches, send_failed = pack_dlq_entries(entries)
+    sent = {}
+    for batch in batches:
+        batch_sent, batch_failed = await execute_batch_async(
+            partial(sqs.send_message_batch, QueueUrl=dlq_url), batch, max_retries
+        )
+        sent.update(batch_sent)
+        send_failed.update(batch_failed)
+
+    delete_failed = {}
+    if sent:
+        _, delete_failed = await execute_batch_async(
+            partial(sqs.delete_message_batch, QueueUrl=queue_url), build_delete_entries(messages, sent), max_retries
+        )
+
+    report = build_report(messages, invalid, send_failed, delete_failed)
+    log_report(report)
+    return report
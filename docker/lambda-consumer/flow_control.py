@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Controle adaptativo de fluxo das chamadas ao Java Processor (AIMD, no estilo do concurrency-limits da Netflix):
+1. Limite de requisições simultâneas ajustado em tempo de execução entre um piso e um teto configurados
+2. Aumento aditivo (+1 por limite de respostas, cerca de +1 por RTT) enquanto o limite está em uso
+3. Redução multiplicativa em sinais de congestionamento: erro 5xx/429, falha de conexão ou latência recente acima
+   de `latency_tolerance` vezes a latência de referência, no máximo uma vez por RTT
+4. A referência aproxima a latência sem fila: acompanha de imediato as quedas da latência recente e sobe devagar,
+   para não acompanhar o aumento causado pelo próprio crescimento do limite
+5. O limite também define o tamanho do próximo recebimento, para não receber mensagens que ficariam paradas
+"""
+import math
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def is_congestion(status):
+    """Status HTTP (ou 'error' para falha de conexão) que indica sobrecarga do serviço."""
+    return status == 'error' or status == 429 or (isinstance(status, int) and status >= 500)
+
+class FlowController:
+    """
+    Limitador AIMD thread-safe. acquire() bloqueia enquanto as requisições em andamento atingem o limite;
+    release() devolve a vaga e ajusta o limite com a latência e o resultado da requisição.
+    Desabilitado, não bloqueia e mantém o limite inicial.
+    """
+
+    def __init__(self, enabled=True, initial_limit=10, min_limit=1, max_limit=100, backoff_ratio=0.9,
+                 latency_tolerance=1.5, latency_threshold=0.0, short_alpha=0.2, reference_rise_seconds=60.0,
+                 reference_fall_seconds=1.0, min_samples=20):
+        self.enabled = enabled
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.latency_threshold = latency_threshold  # Latência absoluta máxima em segundos (0 = só a relativa)
+        self.short_alpha = short_alpha  # Peso das amostras na latência recente
+        self.reference_rise_seconds = reference_rise_seconds  # Constante de tempo da subida da referência
+        self.reference_fall_seconds = reference_fall_seconds  # Constante de tempo da descida da referência
+        self.min_samples = min_samples  # Amostras com a referência em média simples, antes de avaliar a latência
+
+        self._condition = threading.Condition()
+        self._limit = float(max(min_limit, min(initial_limit, self.max_limit)))
+        self._in_flight = 0
+        self._short_latency = None
+        self._long_latency = None
+        self._last_decrease = 0.0
+        self._last_sample = 0.0
+        self._samples = 0
+        self._stats = {'increases': 0, 'decreases': 0, 'congestion_signals': 0}
+
+    @property
+    def limit(self):
+        """Limite atual de requisições simultâneas."""
+        return int(self._limit)
+
+    def receive_size(self, batch_size):
+        """Mensagens a receber no próximo lote: o tamanho configurado, reduzido ao limite atual."""
+        if not self.enabled:
+            return batch_size
+        return max(1, min(batch_size, self.limit))
+
+    def acquire(self):
+        """Reserva uma vaga, aguardando enquanto o limite estiver ocupado."""
+        if not self.enabled:
+            return
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency, congested):
+        """Devolve a vaga reservada por acquire() e registra o resultado da requisição."""
+        if not self.enabled:
+            return
+        with self._condition:
+            self._update(latency, congested, self._in_flight)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency, congested, in_flight):
+        """Registra uma requisição feita sem acquire() (ex.: endpoint em lote com `in_flight` mensagens)."""
+        if not self.enabled:
+            return
+        with self._condition:
+            self._update(latency, congested, in_flight)
+            self._condition.notify_all()
+
+    def stats(self):
+        """Limite atual, requisições em andamento, latências recente e de referência e ajustes realizados."""
+        with self._condition:
+            return dict(
+                self._stats,
+                limit=self.limit,
+                in_flight=self._in_flight,
+                short_latency=self._short_latency or 0.0,
+                long_latency=self._long_latency or 0.0
+            )
+
+    def _update(self, latency, congested, in_flight):
+        """Aplica o AIMD a uma amostra. Requer o lock."""
+        now = time.time()
+        self._samples += 1
+        if self._short_latency is None:
+            self._short_latency = self._long_latency = latency
+        elif self._samples <= self.min_samples:
+            # Aquecimento: a referência é a média simples das primeiras amostras
+            self._short_latency += self.short_alpha * (latency - self._short_latency)
+            self._long_latency += (latency - self._long_latency) / self._samples
+        else:
+            self._short_latency += self.short_alpha * (latency - self._short_latency)
+            # Peso proporcional ao tempo decorrido, e não ao número de amostras: independe da vazão
+            seconds = self.reference_fall_seconds if self._short_latency < self._long_latency \
+                else self.reference_rise_seconds
+            weight = 1.0 - math.exp(-(now - self._last_sample) / seconds)
+            self._long_latency += weight * (self._short_latency - self._long_latency)
+        self._last_sample = now
+
+        if not congested and self._samples > self.min_samples:
+            congested = self._short_latency > self._long_latency * self.latency_tolerance or \
+                (self.latency_threshold > 0 and self._short_latency > self.latency_threshold)
+
+        if congested:
+            self._stats['congestion_signals'] += 1
+            # As respostas da mesma rodada refletem a mesma sobrecarga: reduzir uma vez por RTT
+            if now - self._last_decrease >= self._short_latency:
+                self._last_decrease = now
+                self._set_limit(self._limit * self.backoff_ratio, 'decreases')
+        elif in_flight * 2 >= self._limit:
+            # Só cresce com o limite em uso: um consumidor ocioso não infla o limite sem medir o serviço
+            self._set_limit(self._limit + 1.0 / self._limit, 'increases')
+
+    def _set_limit(self, value, kind):
+        """Ajusta o limite dentro do piso e do teto, registrando as mudanças da parte inteira. Requer o lock."""
+        previous = self.limit
+        self._limit = max(float(self.min_limit), min(value, float(self.max_limit)))
+        if self.limit != previous:
+            self._stats[kind] += 1
+            logger.info(f"Limite de concorrência: {previous} -> {self.limit} "
+                        f"(latência recente {self._short_latency * 1000:.1f}ms, "
+                        f"referência {self._long_latency * 1000:.1f}ms)")
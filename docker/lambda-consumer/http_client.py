@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP compartilhado para as chamadas do consumidor ao Java Processor.
+Mantém um único pool de conexões keep-alive, evitando um handshake TCP/TLS por mensagem:
+1. Pool configurável (hosts em cache e conexões por host)
+2. Seguro para uso por várias threads de despacho
+3. Contadores de conexões novas versus reutilizadas
+4. Importação do requests adiada até a primeira requisição (cold start do handler Lambda)
+"""
+import socket
+import threading
+
+class PooledHttpClient:
+    """
+    Cliente HTTP com pool de conexões compartilhado entre threads.
+    Cada thread usa sua própria requests.Session (que não é thread-safe), mas todas
+    montam o mesmo HTTPAdapter, de modo que as conexões do pool são reaproveitadas.
+    """
+
+    def __init__(self, pool_connections=1, pool_maxsize=10, pool_block=True, keep_alive=True, timeout=5):
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+
+        # TCP keep-alive mantém as conexões ociosas do pool vivas entre lotes
+        socket_options = None
+        if keep_alive:
+            socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                              (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+        self._adapter_options = dict(
+            socket_options=socket_options,
+            pool_connections=pool_connections,  # Quantidade de hosts com pool em cache
+            pool_maxsize=pool_maxsize,  # Máximo de conexões por host
+            pool_block=pool_block,  # Aguarda conexão livre em vez de abrir conexões extras descartáveis
+            max_retries=0
+        )
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def request_errors(self):
+        """Exceção base das falhas de requisição (requests.exceptions.RequestException)."""
+        import requests
+        return requests.exceptions.RequestException
+
+    def prepare(self):
+        """Importa o requests e cria o pool compartilhado, uma única vez mesmo com várias threads."""
+        if self._adapter is None:
+            with self._adapter_lock:
+                if self._adapter is None:
+                    self._adapter = _socket_options_adapter()(**self._adapter_options)
+        return self._adapter
+
+    def _session(self):
+        """Retorna a sessão da thread atual, criando-a na primeira chamada."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            adapter = self.prepare()
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if not self.keep_alive:
+                session.headers['Connection'] = 'close'
+            self._local.session = session
+        return session
+
+    def post(self, url, **kwargs):
+        """Envia um POST usando o pool compartilhado."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session().post(url, **kwargs)
+
+    def stats(self):
+        """
+        Retorna contadores de uso do pool.
+        new_connections é o número de conexões abertas (um handshake cada);
+        reused_connections é o número de requisições que aproveitaram uma conexão existente.
+        """
+        pools = self._adapter.poolmanager.pools if self._adapter else {}
+        connection_pools = [pools[key] for key in pools.keys()]
+
+        total_requests = sum(pool.num_requests for pool in connection_pools)
+        new_connections = sum(pool.num_connections for pool in connection_pools)
+        reused_connections = max(total_requests - new_connections, 0)
+
+        return {
+            'requests': total_requests,
+            'new_connections': new_connections,
+            'reused_connections': reused_connections,
+            'reuse_ratio': reused_connections / total_requests if total_requests else 0.0
+        }
+
+    def close(self):
+        """Fecha todas as conexões do pool."""
+        if self._adapter:
+            self._adapter.close()
+
+def _socket_options_adapter():
+    """Classe do HTTPAdapter que aplica opções de socket às conexões do pool (definida no primeiro uso)."""
+    from requests.adapters import HTTPAdapter
+
+    class _SocketOptionsAdapter(HTTPAdapter):
+
+        def __init__(self, socket_options=None, **kwargs):
+            self._socket_options = socket_options
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            if self._socket_options:
+                kwargs['socket_options'] = self._socket_options
+            super().init_poolmanager(*args, **kwargs)
+
+    return _SocketOptionsAdapter
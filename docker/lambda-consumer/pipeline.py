@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Consumidor em pipeline para manter mais de um lote em processamento por processo:
+1. N threads receptoras fazem long polling no SQS e alimentam uma fila de trabalho limitada
+2. Um pool de workers consome a fila e envia cada mensagem ao Java Processor
+3. As confirmações são agrupadas pelo AckManager em chamadas delete_message_batch
+4. Um estágio de DLQ agrupa as falhas para encaminhamento em lote
+5. Mensagens recusadas pelo circuit breaker voltam à fila em lote, sem passar pela DLQ
+6. Reentregas já processadas são confirmadas pelos receptores, sem ocupar a fila de trabalho
+7. Corpos no envelope de compressão são descomprimidos pelos receptores
+8. Com controle adaptativo de fluxo, o tamanho de cada recebimento acompanha o limite de concorrência
+Quando a fila de trabalho está cheia ou o circuito está aberto os receptores param de receber (backpressure).
+"""
+import time
+import queue
+import logging
+import threading
+from sqs_batch import SQS_MAX_BATCH_ENTRIES
+from circuit_breaker import REJECTED
+from compression import ENCODING_ATTRIBUTE, decode_messages
+import consumer_metrics
+
+logger = logging.getLogger(__name__)
+
+class PipelinedConsumer:
+    """
+    Pipeline receber → processar → remover executado em threads.
+    As funções de processamento, DLQ e métricas são injetadas pelo consumidor.
+    """
+
+    def __init__(self, sqs, queue_url, dlq_url, process_fn, dlq_fn, metrics_fn, ack_manager,
+                 visibility_manager, circuit_breaker, dedup_filter=None, flow_controller=None, batch_size=10, receivers=2,
+                 workers=10, work_queue_size=100, wait_time_seconds=5, ack_flush_interval=0.5):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.dlq_url = dlq_url
+        self.process_fn = process_fn  # process_fn(message) -> True, False ou REJECTED
+        self.dlq_fn = dlq_fn  # dlq_fn(queue_url, dlq_url, messages)
+        self.metrics_fn = metrics_fn  # metrics_fn(successful, failed, processing_time_ms, batches)
+        self.ack_manager = ack_manager
+        self.visibility_manager = visibility_manager  # Estende a visibilidade inclusive enquanto a mensagem aguarda na fila
+        self.circuit_breaker = circuit_breaker
+        self.dedup_filter = dedup_filter  # Opcional: descarta mensagens já processadas
+        self.flow_controller = flow_controller  # Opcional: limita o recebimento à concorrência atual
+        self.batch_size = batch_size
+        self.receivers = receivers
+        self.workers = workers
+        self.wait_time_seconds = wait_time_seconds
+        self.ack_flush_interval = ack_flush_interval
+
+        self.work_queue = queue.Queue(maxsize=work_queue_size)
+        self.dlq_queue = queue.Queue()
+        self.retry_queue = queue.Queue()
+        self._stop_receiving = threading.Event()
+        self._stop_workers = threading.Event()
+        self._stop_flushers = threading.Event()
+        self._threads = {'receiver': [], 'worker': [], 'flusher': []}
+
+    def start(self):
+        """Inicia as threads de todos os estágios do pipeline."""
+        self._start_stage('flusher', self._dlq_loop, 1)
+        self._start_stage('flusher', self._retry_loop, 1)
+        self._start_stage('worker', self._worker_loop, self.workers)
+        self._start_stage('receiver', self._receiver_loop, self.receivers)
+        logger.info(f"Pipeline iniciado. Receptores: {self.receivers}, Workers: {self.workers}, "
+                    f"Fila de trabalho: {self.work_queue.maxsize}")
+
+    def _start_stage(self, stage, target, count):
+        for i in range(count):
+            thread = threading.Thread(target=target, name=f"{stage}-{i}", daemon=True)
+            thread.start()
+            self._threads[stage].append(thread)
+
+    def stop(self):
+        """
+        Encerra o pipeline de forma ordenada: para de receber, drena a fila de trabalho
+        e confirma as mensagens já processadas antes de retornar.
+        """
+        logger.info("Encerrando pipeline...")
+        self._stop_receiving.set()
+        self._join_stage('receiver')
+
+        self.work_queue.join()
+        self._stop_workers.set()
+        self._join_stage('worker')
+
+        self._stop_flushers.set()
+        self._join_stage('flusher')
+        self.ack_manager.flush()
+        logger.info("Pipeline encerrado")
+
+    def _join_stage(self, stage):
+        for thread in self._threads[stage]:
+            thread.join()
+
+    def run_forever(self, stop_event=None):
+        """Inicia o pipeline e bloqueia até KeyboardInterrupt ou até stop_event ser sinalizado."""
+        stop_event = stop_event or threading.Event()
+        self.start()
+        try:
+            while not stop_event.wait(1):
+                pass
+        finally:
+            self.stop()
+
+    def _receive_size(self):
+        """Mensagens por recebimento: batch_size, reduzido ao limite adaptativo quando houver."""
+        if self.flow_controller is None:
+            return self.batch_size
+        return self.flow_controller.receive_size(self.batch_size)
+
+    def _has_capacity(self, batch_size):
+        """Verifica se a fila de trabalho comporta um lote completo."""
+        return self.work_queue.maxsize - self.work_queue.qsize() >= batch_size
+
+    def _receiver_loop(self):
+        """Faz long polling no SQS enquanto houver espaço na fila de trabalho."""
+        while not self._stop_receiving.is_set():
+            # Backpressure: não receber mensagens que ficariam paradas consumindo o visibility timeout
+            batch_size = self._receive_size()
+            if not self._has_capacity(batch_size):
+                self._stop_receiving.wait(0.05)
+                continue
+
+            # Com o circuito aberto o serviço ECS está indisponível: aguardar o período de teste
+            if self.circuit_breaker.is_open():
+                self._stop_receiving.wait(min(self.circuit_breaker.remaining_open_seconds(), self.wait_time_seconds))
+                continue
+
+            visibility_timeout = self.visibility_manager.receive_timeout()
+            start_time = time.time()
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=batch_size,
+                    VisibilityTimeout=visibility_timeout,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    MessageAttributeNames=[ENCODING_ATTRIBUTE]
+                )
+            except Exception as e:
+                logger.error(f"Erro ao receber mensagens: {str(e)}")
+                self._stop_receiving.wait(1)
+                continue
+
+            messages = response.get('Messages', [])
+            consumer_metrics.observe_receive(time.time() - start_time, messages)
+            if not messages:
+                continue
+
+            self.metrics_fn(0, 0, 0.0, 1)
+            self.visibility_manager.track(self.queue_url, messages, visibility_timeout)
+            consumer_metrics.DECOMPRESSED_MESSAGES.inc(decode_messages(messages))
+            if self.dedup_filter:
+                messages = self._drop_duplicates(messages)
+            for message in messages:
+                # put bloqueante garante o limite da fila mesmo com vários receptores
+                self.work_queue.put(message)
+
+    def _drop_duplicates(self, messages):
+        """Confirma as mensagens já processadas e retorna as que seguem para os workers."""
+        try:
+            duplicates, fresh = self.dedup_filter.split(messages)
+        except Exception as e:
+            logger.error(f"Erro ao verificar mensagens duplicadas: {str(e)}")
+            return messages
+
+        handles = [message['ReceiptHandle'] for message in duplicates]
+        self.ack_manager.ack(self.queue_url, handles)
+        self.visibility_manager.release(handles)
+        return fresh
+
+    def _worker_loop(self):
+        """Processa mensagens da fila de trabalho até o pipeline ser encerrado."""
+        while not self._stop_workers.is_set():
+            try:
+                message = self.work_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            settled = False  # Removida, enviada para a DLQ ou devolvida à fila
+            try:
+                start_time = time.time()
+                processed = self.process_fn(message)
+                processing_time = (time.time() - start_time) * 1000
+
+                if processed is REJECTED:
+                    self.retry_queue.put(message['ReceiptHandle'])
+                    settled = True
+                    consumer_metrics.count_results(rejected=1)
+                elif processed:
+                    self.ack_manager.ack(self.queue_url, [message['ReceiptHandle']])
+                    self.visibility_manager.release([message['ReceiptHandle']])
+                    settled = True
+                    if self.dedup_filter:
+                        self.dedup_filter.mark_processed([message])
+                    self.metrics_fn(1, 0, processing_time, 0)
+                else:
+                    self.dlq_queue.put(message)
+                    settled = True
+                    self.metrics_fn(0, 1, processing_time, 0)
+            except Exception as e:
+                logger.error(f"Erro no worker do pipeline: {str(e)}")
+                # Sem isso o heartbeat seguiria estendendo a mensagem: devolvê-la à fila como as recusadas
+                if not settled:
+                    self.retry_queue.put(message['ReceiptHandle'])
+            finally:
+                self.work_queue.task_done()
+
+    def _dlq_loop(self):
+        """Agrupa as mensagens com falha e as encaminha para a DLQ em lote."""
+        self._batch_loop(self.dlq_queue, lambda messages: self.dlq_fn(self.queue_url, self.dlq_url, messages))
+
+    def _retry_loop(self):
+        """Devolve à fila, em lote, as mensagens recusadas pelo circuit breaker."""
+        self._batch_loop(self.retry_queue,
+                         lambda handles: self.visibility_manager.release_for_retry(self.queue_url, handles))
+
+    def _batch_loop(self, source, flush_fn):
+        """
+        Acumula itens de `source` e chama flush_fn com até 10 itens, quando o bloco
+        está completo ou quando o item mais antigo espera mais que ack_flush_interval.
+        """
+        pending = []
+        deadline = None
+
+        while True:
+            stopping = self._stop_flushers.is_set()
+            timeout = self.ack_flush_interval if deadline is None else max(deadline - time.time(), 0)
+
+            try:
+                pending.append(source.get(timeout=timeout))
+                if deadline is None:
+                    deadline = time.time() + self.ack_flush_interval
+            except queue.Empty:
+                pass
+
+            if len(pending) >= SQS_MAX_BATCH_ENTRIES or (pending and (time.time() >= deadline or stopping)):
+                try:
+                    flush_fn(pending[:SQS_MAX_BATCH_ENTRIES])
+                except Exception as e:
+                    logger.error(f"Erro ao enviar lote do pipeline: {str(e)}")
+                pending = pending[SQS_MAX_BATCH_ENTRIES:]
+                deadline = time.time() + self.ack_flush_interval if pending else None
+
+            if stopping and not pending and source.empty():
+                return
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Escalonamento dos recebimentos entre várias filas SQS com pesos (weighted fair queuing):
+1. Cada fila acumula tempo virtual = mensagens recebidas / peso; o próximo recebimento vai para a fila pronta
+   com menor tempo virtual, então filas com peso maior recebem proporcionalmente mais
+2. Uma fila que volta a ter mensagens parte do tempo virtual das filas ativas, sem compensar o período ocioso
+   (não monopoliza o consumidor nem fica sem vez)
+3. Filas vazias recuam o polling com backoff exponencial, sem gastar chamadas de long polling
+4. O long polling dura o WaitTimeSeconds inteiro, limitado apenas pelas filas em backoff (até a próxima ficar
+   pronta, arredondado para cima); uma fila ociosa que volta a ser sondada enquanto outra tem mensagens
+   recebe só uma sondagem rápida, para não segurar a fila ativa
+"""
+import math
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def parse_queue_weights(spec, default_queue):
+    """
+    Converte 'fila-a:3,fila-b:1' em [(nome, peso)], na ordem informada.
+    Sem peso, a fila tem peso 1. Com spec vazia, retorna apenas default_queue.
+    """
+    queues = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition(':')
+        weight = float(weight) if weight else 1.0
+        if weight <= 0:
+            raise ValueError(f"Peso inválido para a fila {name}: {weight}")
+        queues.append((name.strip(), weight))
+    return queues or [(default_queue, 1.0)]
+
+class QueueState:
+    """Estado de escalonamento de uma fila."""
+
+    def __init__(self, name, weight):
+        self.name = name
+        self.weight = weight
+        self.url = None
+        self.virtual_time = 0.0
+        self.empty_polls = 0  # Recebimentos vazios consecutivos
+        self.next_poll_at = 0.0
+        self.stats = {'received': 0, 'polls': 0, 'empty_polls': 0}
+
+    @property
+    def idle(self):
+        return self.empty_polls > 0
+
+class WeightedQueueScheduler:
+    """Escolhe a próxima fila a receber e registra o resultado de cada recebimento (thread-safe)."""
+
+    def __init__(self, queue_weights, idle_backoff_base=0.1, idle_backoff_max=2.0):
+        self.queues = [QueueState(name, weight) for name, weight in queue_weights]
+        self.idle_backoff_base = idle_backoff_base
+        self.idle_backoff_max = idle_backoff_max  # Atraso máximo até notar mensagens numa fila ociosa
+        self._lock = threading.Lock()
+
+    def names(self):
+        return [queue.name for queue in self.queues]
+
+    def bind(self, urls):
+        """Associa as URLs resolvidas ({nome: url}) às filas."""
+        for queue in self.queues:
+            queue.url = urls[queue.name]
+
+    def next_queue(self, max_wait_seconds):
+        """
+        Retorna (fila, espera): a fila a receber e o WaitTimeSeconds do recebimento, limitado ao tempo até
+        uma fila em backoff ficar pronta. Sem fila pronta, retorna (None, segundos até a próxima ficar pronta).
+        """
+        now = time.time()
+        with self._lock:
+            ready = [queue for queue in self.queues if queue.next_poll_at <= now]
+            if not ready:
+                return None, min(queue.next_poll_at for queue in self.queues) - now
+
+            # Empate no tempo virtual: a fila de maior peso primeiro
+            chosen = min(ready, key=lambda queue: (queue.virtual_time, -queue.weight))
+            # Só as filas em backoff limitam a espera: com as prontas, todo recebimento com duas filas prontas
+            # seria short polling, que consulta parte dos servidores do SQS e volta vazio sem necessidade
+            due = [queue.next_poll_at - now for queue in self.queues
+                   if queue is not chosen and queue.next_poll_at > now]
+            wait = math.ceil(min([max_wait_seconds] + due))
+            if chosen.idle and any(queue is not chosen and not queue.idle for queue in ready):
+                # Sondagem da fila ociosa sem segurar a fila ativa pronta
+                wait = 0
+            return chosen, max(0, min(wait, max_wait_seconds))
+
+    def record(self, queue, received):
+        """Registra um recebimento: avança o tempo virtual da fila ou aplica o backoff de fila vazia."""
+        now = time.time()
+        with self._lock:
+            queue.stats['polls'] += 1
+            if received:
+                if queue.idle:
+                    # Retorno após ociosidade: alinhar com as filas ativas em vez de cobrar o atraso delas
+                    active = [other.virtual_time for other in self.queues if other is not queue and not other.idle]
+                    if active:
+                        queue.virtual_time = max(queue.virtual_time, min(active))
+                queue.virtual_time += received / queue.weight
+                queue.empty_polls = 0
+                queue.next_poll_at = 0.0
+                queue.stats['received'] += received
+            else:
+                queue.empty_polls += 1
+                queue.stats['empty_polls'] += 1
+                delay = min(self.idle_backoff_max, self.idle_backoff_base * 2 ** (queue.empty_polls - 1))
+                queue.next_poll_at = now + delay
+
+    def stats(self):
+        """Por fila: peso, mensagens recebidas, recebimentos (vazios e totais) e backoff atual em segundos."""
+        now = time.time()
+        with self._lock:
+            return {queue.name: dict(queue.stats, weight=queue.weight,
+                                     backoff_seconds=max(0.0, queue.next_poll_at - now))
+                    for queue in self.queues}
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Redrive da DLQ para a fila principal, em paralelo e com taxa limitada:
+1. Vários receptores esvaziam a DLQ em paralelo (recebimentos de 10 mensagens)
+2. O envelope `error` gravado pelo consumidor é removido ('strip') ou movido para `redrive`, com o número de
+   reprocessamentos e o último erro ('annotate')
+3. O reenvio usa send_message_batch (até 10 entradas e 256 KB por chamada) sob um token bucket de mensagens/s,
+   para não sobrecarregar o consumidor e o Java Processor com o backlog inteiro de uma vez
+4. A mensagem só sai da DLQ depois de aceita pela fila principal
+5. Filtros por operação e por motivo do erro; as mensagens fora do filtro voltam a ficar visíveis na DLQ
+6. Modo dry-run: apenas conta as mensagens que seriam reprocessadas, por operação e motivo, sem alterar as filas
+7. Relatório periódico de progresso e vazão, e resumo final
+
+Uso: docker-compose run --rm lambda-consumer python redrive.py (ou localmente, com AWS_ENDPOINT_URL apontando
+para o LocalStack)
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from functools import partial
+
+# Módulos compartilhados com os produtores: na imagem ficam ao lado deste arquivo, fora dela em docker/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import codec
+from aws_clients import create_sqs_client
+from batch_sender import BatchSender
+from compression import Compressor, ENCODING_ATTRIBUTE, message_encoding, decode_message
+from sqs_batch import execute_batch
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configurações AWS
+AWS_ENDPOINT_URL = os.environ.get('AWS_ENDPOINT_URL', 'http://localstack:4566')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'test')
+AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY', 'test')
+AWS_SESSION_TOKEN = os.environ.get('AWS_SESSION_TOKEN')
+
+# Filas de origem e destino
+SQS_DLQ_NAME = os.environ.get('SQS_DLQ_NAME', 'message-processor-dlq')
+REDRIVE_TARGET_QUEUE = os.environ.get('REDRIVE_TARGET_QUEUE', os.environ.get('SQS_QUEUE_NAME', 'message-processor-main'))
+
+# Paralelismo e taxa
+REDRIVE_RECEIVERS = int(os.environ.get('REDRIVE_RECEIVERS', '4'))  # Receptores simultâneos da DLQ
+REDRIVE_RATE = float(os.environ.get('REDRIVE_RATE', '100'))  # Mensagens reenviadas por segundo (0 = sem limite)
+REDRIVE_BURST = int(os.environ.get('REDRIVE_BURST', '10'))  # Capacidade do token bucket (rajada máxima)
+REDRIVE_MAX_MESSAGES = int(os.environ.get('REDRIVE_MAX_MESSAGES', '0'))  # Limite de mensagens reenviadas (0 = todas)
+REDRIVE_SEND_MAX_RETRIES = int(os.environ.get('REDRIVE_SEND_MAX_RETRIES', '3'))  # Novas tentativas das entradas Failed
+
+# Filtros: operações ('INSERT,DELETE') e trecho do motivo do erro (sem diferenciar maiúsculas); vazio = todas
+REDRIVE_OPERATIONS = {op.strip().upper() for op in os.environ.get('REDRIVE_OPERATIONS', '').split(',') if op.strip()}
+REDRIVE_REASON = os.environ.get('REDRIVE_REASON', '').strip().lower()
+
+# Tratamento do envelope de erro: 'strip' (remove) ou 'annotate' (move para `redrive`)
+REDRIVE_ERROR_MODE = os.environ.get('REDRIVE_ERROR_MODE', 'annotate').lower()
+REDRIVE_DRY_RUN = os.environ.get('REDRIVE_DRY_RUN', 'false').lower() == 'true'
+
+# Recebimento e encerramento
+REDRIVE_VISIBILITY_TIMEOUT = int(os.environ.get('REDRIVE_VISIBILITY_TIMEOUT', '60'))  # Reserva das mensagens recebidas
+# Reserva das mensagens mantidas na DLQ (filtradas, inválidas e do dry-run) até a liberação no final: deve cobrir
+# o tempo de esvaziar a DLQ inteira; se o redrive for interrompido sem liberar, elas voltam após esse prazo
+REDRIVE_HOLD_SECONDS = int(os.environ.get('REDRIVE_HOLD_SECONDS', '3600'))
+REDRIVE_WAIT_SECONDS = int(os.environ.get('REDRIVE_WAIT_SECONDS', '2'))  # Long polling de cada recebimento
+# Recebimentos vazios seguidos para um receptor considerar a DLQ esvaziada
+REDRIVE_EMPTY_RECEIVES = int(os.environ.get('REDRIVE_EMPTY_RECEIVES', '3'))
+# Recebimentos seguidos só com mensagens já vistas (retidas que voltaram): com a drenagem mais longa que a reserva,
+# elas reaparecem indefinidamente e nenhum recebimento chega a ficar vazio
+REDRIVE_STALE_RECEIVES = int(os.environ.get('REDRIVE_STALE_RECEIVES', '100'))
+REDRIVE_REPORT_SECONDS = float(os.environ.get('REDRIVE_REPORT_SECONDS', '5'))  # Intervalo do relatório de progresso
+
+ERROR_MODES = ('strip', 'annotate')
+
+class TokenBucket:
+    """Token bucket thread-safe: acquire(n) bloqueia até haver n tokens. Com rate <= 0 não limita."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        if self.rate <= 0:
+            return
+        # Pedidos acima da capacidade são atendidos em partes, sem nunca acumular mais que a rajada
+        while n > 0:
+            take = min(n, self.capacity)
+            self._take(take)
+            n -= take
+
+    def _take(self, n):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.rate
+            time.sleep(wait)
+
+def error_reason(body):
+    """Motivo gravado no envelope de erro, ou None para mensagens sem envelope (redrive nativo do SQS)."""
+    error = body.get('error')
+    return error.get('reason') if isinstance(error, dict) else None
+
+def matches(body, operations=(), reason=''):
+    """Verifica os filtros de operação e de motivo do erro."""
+    if operations and str(body.get('operation', '')).upper() not in operations:
+        return False
+    if reason and reason not in (error_reason(body) or '').lower():
+        return False
+    return True
+
+def transform(body, mode='annotate'):
+    """
+    Prepara o corpo para a fila principal: sem o envelope `error`, que o Java Processor não espera.
+    No modo 'annotate', o erro fica em `redrive.lastError`, junto do número de reprocessamentos.
+    """
+    error = body.pop('error', None)
+    if mode == 'annotate':
+        previous = body.get('redrive') if isinstance(body.get('redrive'), dict) else {}
+        body['redrive'] = {
+            'count': int(previous.get('count', 0)) + 1,
+            'redrivenAt': datetime.now().isoformat(),
+            'lastError': error if error is not None else previous.get('lastError')
+        }
+    return body
+
+def copy_attributes(message):
+    """Atributos de mensagem a repassar no reenvio, exceto o content-encoding (o corpo é recodificado)."""
+    attributes = {}
+    for name, attribute in (message.get('MessageAttributes') or {}).items():
+        if name == ENCODING_ATTRIBUTE:
+            continue
+        attributes[name] = {key: attribute[key] for key in ('DataType', 'StringValue', 'BinaryValue')
+                            if key in attribute}
+    return attributes
+
+class Redriver:
+    """Move as mensagens da DLQ para a fila de destino com vários receptores e taxa limitada."""
+
+    def __init__(self, sqs, dlq_url, target_url, receivers=4, bucket=None, max_messages=0, operations=(),
+                 reason='', dry_run=False, error_mode='annotate', visibility_timeout=60, hold_seconds=3600,
+                 wait_seconds=2, empty_receives=3, stale_receives=100, send_max_retries=3):
+        if error_mode not in ERROR_MODES:
+            raise ValueError(f"REDRIVE_ERROR_MODE inválido: {error_mode} (opções: {', '.join(ERROR_MODES)})")
+        self.sqs = sqs
+        self.dlq_url = dlq_url
+        self.target_url = target_url
+        self.receivers = receivers
+        self.bucket = bucket or TokenBucket(0, 1)
+        self.max_messages = max_messages
+        self.operations = operations
+        self.reason = reason
+        self.dry_run = dry_run
+        self.error_mode = error_mode
+        self.visibility_timeout = visibility_timeout
+        self.hold_seconds = max(hold_seconds, visibility_timeout)
+        self.wait_seconds = wait_seconds
+        self.empty_receives = empty_receives
+        self.stale_receives = stale_receives
+        # Cada receptor já é uma chamada simultânea: o envio dentro dele é sequencial
+        self.sender = BatchSender(sqs, concurrency=1, max_retries=send_max_retries)
+        self.send_max_retries = send_max_retries
+        self._compressors = {}  # Algoritmo -> Compressor, para reaplicar o envelope recebido
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._seen = set()  # MessageIds já contabilizados (mensagens retidas podem ser recebidas de novo)
+        self._held = {}  # MessageId -> ReceiptHandle das mensagens mantidas na DLQ, liberadas no final
+        self._reserved = 0  # Vagas de max_messages já reservadas pelos receptores
+        self.breakdown = Counter()  # (operação, motivo) das mensagens selecionadas
+        self.stats = {'received': 0, 'redriven': 0, 'skipped': 0, 'invalid': 0, 'failed': 0, 'selected': 0}
+
+    def run(self, report_seconds=5.0):
+        """Executa os receptores até a DLQ esvaziar, o limite ser atingido ou Ctrl+C. Retorna as estatísticas."""
+        started = time.time()
+        threads = [threading.Thread(target=self._receive_loop, name=f'redrive-{i}', daemon=True)
+                   for i in range(self.receivers)]
+        for thread in threads:
+            thread.start()
+
+        last_report = (started, 0)
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=report_seconds / len(threads))
+                now = time.time()
+                if now - last_report[0] >= report_seconds:
+                    last_report = self._report(started, last_report, now)
+        except KeyboardInterrupt:
+            logger.info("Redrive interrompido pelo usuário; aguardando os receptores concluírem os lotes em andamento")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        self._release_held()
+        return dict(self.stats, elapsed=time.time() - started)
+
+    def _receive_loop(self):
+        """Receptor: recebe, filtra, reenvia e remove da DLQ até não haver mensagens novas."""
+        empty = 0
+        stale = 0  # Recebimentos seguidos sem nenhuma mensagem nova
+        while not self._stop.is_set() and empty < self.empty_receives and stale < self.stale_receives:
+            if self._quota_exhausted():
+                break
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.dlq_url,
+                    MaxNumberOfMessages=10,
+                    WaitTimeSeconds=self.wait_seconds,
+                    VisibilityTimeout=self.visibility_timeout,
+                    MessageAttributeNames=['All']
+                )
+            except Exception as e:
+                logger.error(f"Erro ao receber da DLQ: {str(e)}")
+                empty += 1
+                time.sleep(1)
+                continue
+
+            # Só um recebimento vazio indica a DLQ esvaziada: mensagens já vistas que voltaram a ficar
+            # visíveis não encerram o receptor antes de ele chegar ao restante da fila
+            if not response.get('Messages'):
+                empty += 1
+                continue
+            empty = 0
+            messages, reappeared = self._new_messages(response['Messages'])
+            if reappeared:
+                self._extend_hold(reappeared)
+            stale = 0 if messages else stale + 1
+            if messages:
+                self._handle(messages)
+        if stale >= self.stale_receives:
+            logger.info(f"Receptor encerrado após {stale} recebimentos só com mensagens retidas")
+
+    def _new_messages(self, messages):
+        """
+        Separa as mensagens ainda não contabilizadas. Retorna (novas, receipt handles das retidas que voltaram
+        a ficar visíveis), renovando o handle guardado destas.
+        """
+        new = []
+        reappeared = []
+        with self._lock:
+            for message in messages:
+                if message['MessageId'] in self._seen:
+                    if message['MessageId'] in self._held:
+                        self._held[message['MessageId']] = message['ReceiptHandle']
+                        reappeared.append(message['ReceiptHandle'])
+                    continue
+                self._seen.add(message['MessageId'])
+                new.append(message)
+            self.stats['received'] += len(new)
+        return new, reappeared
+
+    def _handle(self, messages):
+        """Seleciona as mensagens do lote, reenvia à fila de destino e remove da DLQ as aceitas."""
+        entries = []
+        handles = {}
+        held = []
+        for message in messages:
+            encoding = message_encoding(message)
+            decode_message(message)
+            try:
+                body = codec.loads(message['Body'])
+            except Exception:
+                held.append(self._hold(message, 'invalid'))
+                continue
+            if not isinstance(body, dict) or not matches(body, self.operations, self.reason) or not self._reserve():
+                held.append(self._hold(message, 'skipped'))
+                continue
+
+            with self._lock:
+                self.stats['selected'] += 1
+                self.breakdown[(body.get('operation'), error_reason(body))] += 1
+            if self.dry_run:
+                held.append(self._hold(message, None))
+                continue
+
+            entry = {'Id': str(len(entries)), 'MessageBody': codec.dumps(transform(body, self.error_mode))}
+            if encoding:
+                # Mantém o envelope de compressão original quando ele ainda reduz o corpo
+                entry['MessageBody'], encoded = self._compressor(encoding).encode(entry['MessageBody'])
+            else:
+                encoded = {}
+            attributes = dict(copy_attributes(message), **encoded)
+            if attributes:
+                entry['MessageAttributes'] = attributes
+            entries.append(entry)
+            handles[entry['Id']] = message['ReceiptHandle']
+
+        if held:
+            self._extend_hold(held)
+        if not entries:
+            return
+
+        self.bucket.acquire(len(entries))
+        sent, failures = self.sender.send(self.target_url, entries)
+        for entry_id, failure in failures.items():
+            logger.error(f"Falha ao reenviar para a fila de destino: {failure.get('Code')} {failure.get('Message')}")
+
+        deleted, delete_failures = execute_batch(
+            partial(self.sqs.delete_message_batch, QueueUrl=self.dlq_url),
+            [{'Id': entry_id, 'ReceiptHandle': handles[entry_id]} for entry_id in sent],
+            max_retries=self.send_max_retries
+        )
+        if delete_failures:
+            # Já estão na fila de destino: voltam a ficar visíveis na DLQ e podem ser reprocessadas em duplicidade
+            logger.warning(f"{len(delete_failures)} mensagens reenviadas não foram removidas da DLQ")
+
+        with self._lock:
+            self.stats['redriven'] += len(sent)
+            self.stats['failed'] += len(failures)
+
+    def _compressor(self, encoding):
+        with self._lock:
+            if encoding not in self._compressors:
+                self._compressors[encoding] = Compressor(encoding, min_bytes=0)
+            return self._compressors[encoding]
+
+    def _reserve(self):
+        """Reserva uma vaga de max_messages para a mensagem. Retorna False com o limite atingido."""
+        with self._lock:
+            if self.max_messages and self._reserved >= self.max_messages:
+                return False
+            self._reserved += 1
+            return True
+
+    def _quota_exhausted(self):
+        with self._lock:
+            return bool(self.max_messages) and self._reserved >= self.max_messages
+
+    def _hold(self, message, kind):
+        """Mantém a mensagem na DLQ, reservada até o final para não ser recebida e contada de novo."""
+        with self._lock:
+            self._held[message['MessageId']] = message['ReceiptHandle']
+            if kind:
+                self.stats[kind] += 1
+        return message['ReceiptHandle']
+
+    def _extend_hold(self, handles):
+        """Estende a reserva das mensagens mantidas para hold_seconds, uma chamada em lote por recebimento."""
+        if self.hold_seconds <= self.visibility_timeout:
+            return
+        entries = [{'Id': str(i), 'ReceiptHandle': handle, 'VisibilityTimeout': self.hold_seconds}
+                   for i, handle in enumerate(handles)]
+        _, failed = execute_batch(partial(self.sqs.change_message_visibility_batch, QueueUrl=self.dlq_url), entries)
+        if failed:
+            # Voltam após visibility_timeout; ao reaparecer são estendidas de novo, sem contar em duplicidade
+            logger.warning(f"Falha ao estender a reserva de {len(failed)} mensagens mantidas na DLQ")
+
+    def _release_held(self):
+        """Torna visíveis de novo as mensagens mantidas na DLQ (filtradas, inválidas ou do dry-run)."""
+        entries = [{'Id': str(i), 'ReceiptHandle': handle, 'VisibilityTimeout': 0}
+                   for i, handle in enumerate(self._held.values())]
+        if not entries:
+            return
+        _, failed = execute_batch(partial(self.sqs.change_message_visibility_batch, QueueUrl=self.dlq_url), entries)
+        if failed:
+            logger.warning(f"{len(failed)} mensagens mantidas na DLQ só voltam a ficar visíveis após "
+                           f"a reserva ({self.hold_seconds}s)")
+        self._held.clear()
+
+    def _report(self, started, last_report, now):
+        """Registra progresso e vazão (da janela e desde o início). Retorna o novo ponto de referência."""
+        with self._lock:
+            stats = dict(self.stats)
+        done = stats['selected'] if self.dry_run else stats['redriven']
+        window_rate = (done - last_report[1]) / max(now - last_report[0], 1e-6)
+        total_rate = done / max(now - started, 1e-6)
+        logger.info(f"Redrive: recebidas={stats['received']}, reenviadas={stats['redriven']}, "
+                    f"selecionadas={stats['selected']}, ignoradas={stats['skipped']}, inválidas={stats['invalid']}, "
+                    f"falhas={stats['failed']}, {window_rate:.1f} msg/s (média {total_rate:.1f} msg/s), "
+                    f"restantes na DLQ ~{self._remaining()}")
+        return now, done
+
+    def _remaining(self):
+        try:
+            attributes = self.sqs.get_queue_attributes(
+                QueueUrl=self.dlq_url, AttributeNames=['ApproximateNumberOfMessages']
+            )['Attributes']
+            return int(attributes['ApproximateNumberOfMessages'])
+        except Exception:
+            return '?'
+
+def find_queue_url(sqs, name):
+    """URL da fila com exatamente esse nome, ou None."""
+    response = sqs.list_queues(QueueNamePrefix=name)
+    for url in response.get('QueueUrls', []):
+        if url.rstrip('/').split('/')[-1] == name:
+            return url
+    return None
+
+def main():
+    """Resolve as filas, executa o redrive e registra o resumo."""
+    sqs = create_sqs_client(
+        endpoint_url=AWS_ENDPOINT_URL,
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        aws_session_token=AWS_SESSION_TOKEN,
+        # Um recebimento, um envio ou uma remoção por receptor, mais o relatório
+        max_pool_connections=max(REDRIVE_RECEIVERS + 1, 10)
+    )
+    dlq_url = find_queue_url(sqs, SQS_DLQ_NAME)
+    target_url = find_queue_url(sqs, REDRIVE_TARGET_QUEUE)
+    if not dlq_url or not target_url:
+        logger.error(f"Fila não encontrada: {SQS_DLQ_NAME if not dlq_url else REDRIVE_TARGET_QUEUE}")
+        sys.exit(1)
+
+    redriver = Redriver(
+        sqs, dlq_url, target_url,
+        receivers=REDRIVE_RECEIVERS,
+        bucket=TokenBucket(REDRIVE_RATE, REDRIVE_BURST),
+        max_messages=REDRIVE_MAX_MESSAGES,
+        operations=REDRIVE_OPERATIONS,
+        reason=REDRIVE_REASON,
+        dry_run=REDRIVE_DRY_RUN,
+        error_mode=REDRIVE_ERROR_MODE,
+        visibility_timeout=REDRIVE_VISIBILITY_TIMEOUT,
+        hold_seconds=REDRIVE_HOLD_SECONDS,
+        wait_seconds=REDRIVE_WAIT_SECONDS,
+        empty_receives=REDRIVE_EMPTY_RECEIVES,
+        stale_receives=REDRIVE_STALE_RECEIVES,
+        send_max_retries=REDRIVE_SEND_MAX_RETRIES
+    )
+    logger.info(f"Redrive {SQS_DLQ_NAME} -> {REDRIVE_TARGET_QUEUE}: {REDRIVE_RECEIVERS} receptores, "
+                f"taxa {REDRIVE_RATE or 'ilimitada'} msg/s, erro '{REDRIVE_ERROR_MODE}'"
+                f"{', dry-run' if REDRIVE_DRY_RUN else ''}")
+
+    stats = redriver.run(REDRIVE_REPORT_SECONDS)
+    elapsed = stats.pop('elapsed')
+    done = stats['selected'] if REDRIVE_DRY_RUN else stats['redriven']
+    logger.info(f"Redrive concluído em {elapsed:.1f}s ({done / max(elapsed, 1e-6):.1f} msg/s): {stats}")
+    if REDRIVE_DRY_RUN:
+        for (operation, reason), count in redriver.breakdown.most_common():
+            logger.info(f"  {count} mensagens: operação={operation}, motivo={reason}")
+    if stats['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
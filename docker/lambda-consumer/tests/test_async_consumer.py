@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Testes do tratamento de falhas do AsyncConsumer (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import json
+import asyncio
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import async_consumer
+from visibility import VisibilityManager
+
+class FakeVisibilitySQS:
+    """Registra as chamadas de change_message_visibility_batch."""
+
+    def __init__(self):
+        self.changed = []
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.changed.extend(entry['ReceiptHandle'] for entry in Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries]}
+
+class FailingDedupFilter:
+
+    def split(self, messages):
+        raise RuntimeError('backend indisponível')
+
+class BatchFailureTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_unexpected_error_returns_the_batch_to_the_queue(self):
+        sqs = FakeVisibilitySQS()
+        visibility = VisibilityManager(sqs)
+        consumer = async_consumer.AsyncConsumer({}, 'q', 'dlq', 'http://ecs', mock.Mock(), visibility, None,
+                                                dedup_filter=FailingDedupFilter(), max_in_flight=10)
+        messages = [{'MessageId': str(index), 'ReceiptHandle': f'rh-{index}', 'Body': json.dumps({'id': index})}
+                    for index in range(3)]
+        visibility.track('q', messages, 30)
+        consumer._capacity = asyncio.Condition()  # Criada por run() dentro do event loop
+        await consumer._acquire_capacity(len(messages))
+
+        await consumer.process_message_batch('q', 'dlq', messages)
+
+        self.assertEqual(visibility.stats()['in_flight'], 0)
+        self.assertEqual(sorted(sqs.changed), ['rh-0', 'rh-1', 'rh-2'])
+        self.assertEqual(consumer._in_flight, 0)
+
+if __name__ == '__main__':
+    unittest.main()
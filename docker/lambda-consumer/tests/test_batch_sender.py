@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Testes do empacotamento e envio em lote ao SQS (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import sqs_batch
+from batch_sender import BatchSender, SQS_MAX_BATCH_BYTES, entry_size, pack_entries
+
+def entry(entry_id, size, **attributes):
+    result = {'Id': entry_id, 'MessageBody': 'x' * size}
+    if attributes:
+        result['MessageAttributes'] = {name: {'DataType': 'String', 'StringValue': value}
+                                       for name, value in attributes.items()}
+    return result
+
+class EntrySizeTest(unittest.TestCase):
+
+    def test_counts_body_and_attribute_bytes(self):
+        self.assertEqual(entry_size(entry('a', 10, encoding='gzip')), 10 + len('encoding') + len('String') + 4)
+        self.assertEqual(entry_size({'Id': 'b', 'MessageBody': 'ç'}), 2)
+
+class PackEntriesTest(unittest.TestCase):
+
+    def test_splits_at_ten_entries(self):
+        batches, oversized = pack_entries([entry(str(index), 10) for index in range(25)])
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(oversized, [])
+
+    def test_splits_at_the_byte_limit_keeping_order(self):
+        entries = [entry(str(index), 100 * 1024) for index in range(5)]
+        batches, _ = pack_entries(entries)
+        self.assertEqual([[item['Id'] for item in batch] for batch in batches], [['0', '1'], ['2', '3'], ['4']])
+        self.assertTrue(all(sum(map(entry_size, batch)) <= SQS_MAX_BATCH_BYTES for batch in batches))
+
+    def test_entry_exactly_at_the_limit_fits_alone(self):
+        batches, oversized = pack_entries([entry('a', 10), entry('b', SQS_MAX_BATCH_BYTES), entry('c', 10)])
+        self.assertEqual([[item['Id'] for item in batch] for batch in batches], [['a'], ['b'], ['c']])
+        self.assertEqual(oversized, [])
+
+    def test_oversized_entries_are_set_aside(self):
+        batches, oversized = pack_entries([entry('a', 10), entry('big', SQS_MAX_BATCH_BYTES + 1), entry('b', 10)])
+        self.assertEqual([[item['Id'] for item in batch] for batch in batches], [['a', 'b']])
+        self.assertEqual([item['Id'] for item in oversized], ['big'])
+
+class FakeSQS:
+    """Falha com erro retentável, uma vez, as entradas em `flaky`."""
+
+    def __init__(self, flaky=()):
+        self.flaky = set(flaky)
+        self.calls = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append([item['Id'] for item in Entries])
+        failed = [item['Id'] for item in Entries if item['Id'] in self.flaky]
+        self.flaky.difference_update(failed)
+        return {
+            'Successful': [{'Id': item['Id']} for item in Entries if item['Id'] not in failed],
+            'Failed': [{'Id': entry_id, 'Code': 'InternalError', 'SenderFault': False} for entry_id in failed]
+        }
+
+class BatchSenderTest(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.object(sqs_batch.time, 'sleep')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_sends_every_batch_and_retries_only_failed_entries(self):
+        sqs = FakeSQS(flaky={'3'})
+        successful, failed = BatchSender(sqs, concurrency=1).send('q', [entry(str(index), 10) for index in range(12)])
+
+        self.assertEqual((len(successful), failed), (12, {}))
+        self.assertEqual(sqs.calls, [[str(index) for index in range(10)], ['3'], ['10', '11']])
+
+    def test_parallel_send_reports_oversized_entries(self):
+        sqs = FakeSQS()
+        entries = [entry(str(index), 10) for index in range(30)] + [entry('big', SQS_MAX_BATCH_BYTES + 1)]
+        successful, failed = BatchSender(sqs, concurrency=4).send('q', entries)
+
+        self.assertEqual(len(successful), 30)
+        self.assertEqual(list(failed), ['big'])
+        self.assertEqual(failed['big']['Code'], 'MessageTooLong')
+        self.assertTrue(failed['big']['SenderFault'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Testes das transições do circuit breaker (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(circuit_breaker.time, 'time', self.clock.time)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window_size=10,
+                                      open_seconds=30, half_open_calls=2)
+
+    def trip(self):
+        for _ in range(4):
+            self.breaker.record_failure()
+
+    def test_failure_rate_is_measured_over_the_sliding_window(self):
+        for _ in range(6):
+            self.breaker.record_success()
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)  # 4 falhas em 10
+
+        self.breaker.record_failure()  # O sucesso mais antigo sai da janela: 5 falhas em 10
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_waits_for_minimum_calls_before_opening(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_open_circuit_rejects_calls_until_the_period_ends(self):
+        self.trip()
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.clock.now += 10
+        self.assertEqual(self.breaker.remaining_open_seconds(), 20)
+        self.clock.now += 20
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_half_open_successes_close_the_circuit(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertEqual([self.breaker.allow_request() for _ in range(3)], [True, True, False])
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_failure_reopens_the_circuit(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.remaining_open_seconds(), 30)
+        self.assertEqual(self.breaker.stats()['transitions'],
+                         {'closed->open': 1, 'open->half_open': 1, 'half_open->open': 1})
+
+    def test_closing_starts_a_fresh_window(self):
+        self.trip()
+        self.clock.now += 30
+        self.breaker.allow_request()
+        self.breaker.allow_request()
+        self.breaker.record_success()
+        self.breaker.record_success()
+
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_disabled_breaker_never_opens(self):
+        breaker = CircuitBreaker(enabled=False, minimum_calls=1)
+        for _ in range(10):
+            breaker.record_failure()
+        self.assertFalse(breaker.is_open())
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, CLOSED)
+
+if __name__ == '__main__':
+    unittest.main()
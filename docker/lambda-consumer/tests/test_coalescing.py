@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Testes da coalescência por chave (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import json
+import unittest
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+from coalescing import coalesce, dispatch_coalesced
+
+def message(operation, record_id='r-1', timestamp='2024-01-01T00:00:00'):
+    body = {'id': record_id, 'timestamp': timestamp, 'operation': operation}
+    return {'MessageId': f'{operation}-{record_id}', 'Body': json.dumps(body)}
+
+def operations(groups):
+    return [json.loads(representative['Body'])['operation'] for representative, _ in groups]
+
+class CoalesceTest(unittest.TestCase):
+
+    def test_insert_then_delete_forwards_delete(self):
+        messages = [message('INSERT'), message('DELETE')]
+        groups = coalesce(messages)
+        self.assertEqual(operations(groups), ['DELETE'])
+        self.assertEqual(groups[0][1], messages)
+
+    def test_delete_then_insert_forwards_insert(self):
+        messages = [message('DELETE'), message('INSERT')]
+        groups = coalesce(messages)
+        self.assertEqual(operations(groups), ['INSERT'])
+        self.assertEqual(groups[0][1], messages)
+
+    def test_trailing_delete_covers_repeated_inserts(self):
+        messages = [message('INSERT'), message('DELETE'), message('INSERT'), message('DELETE')]
+        self.assertEqual(operations(coalesce(messages)), ['DELETE'])
+
+    def test_different_keys_are_not_merged(self):
+        messages = [message('INSERT', 'r-1'), message('DELETE', 'r-2')]
+        self.assertEqual(operations(coalesce(messages)), ['INSERT', 'DELETE'])
+
+    def test_invalid_body_is_forwarded_alone(self):
+        invalid = {'MessageId': 'x', 'Body': 'not json'}
+        groups = coalesce([invalid, message('INSERT')])
+        self.assertEqual(len(groups), 2)
+        self.assertIs(groups[0][0], invalid)
+
+    def test_dispatch_replicates_group_result(self):
+        messages = [message('DELETE', 'r-1'), message('INSERT', 'r-1'), message('INSERT', 'r-2')]
+        sent = []
+
+        def dispatch(representatives):
+            sent.extend(representatives)
+            return [representative['MessageId'] for representative in representatives]
+
+        results, saved = dispatch_coalesced(messages, dispatch)
+        self.assertEqual(saved, 1)
+        self.assertEqual(sent, [messages[1], messages[2]])
+        self.assertEqual(results, ['INSERT-r-1', 'INSERT-r-1', 'INSERT-r-2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Testes do despacho do consumidor sem SQS nem Java Processor (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import json
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import consumer
+
+def message(message_id, body):
+    return {'MessageId': message_id, 'ReceiptHandle': f'rh-{message_id}', 'Body': body}
+
+def mixed_batch():
+    """Um objeto válido entre JSONs válidos que não são objetos e um corpo que não é JSON."""
+    return [
+        message('list', json.dumps([1, 2])),
+        message('valid', json.dumps({'id': 'r-1', 'operation': 'INSERT'})),
+        message('string', json.dumps('texto')),
+        message('number', '42'),
+        message('broken', '{not json'),
+    ]
+
+class FakeResponse:
+
+    def __init__(self, items):
+        self.status_code = 200
+        self.content = json.dumps(items).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+
+def batch_endpoint(url, data, headers):
+    """Endpoint em lote que aceita todos os itens recebidos."""
+    items = json.loads(data)
+    return FakeResponse([{'messageId': item['messageId'], 'status': 'OK'} for item in items])
+
+class BulkDispatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.post = mock.Mock(side_effect=batch_endpoint)
+        patches = [
+            mock.patch.object(consumer.http_client, 'post', self.post),
+            mock.patch.object(consumer, 'circuit_breaker', consumer.CircuitBreaker(enabled=False)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_non_object_bodies_fail_without_blocking_the_batch(self):
+        results = consumer.process_message_bulk(mixed_batch())
+
+        self.assertEqual(results, [False, True, False, False, False])
+        sent = json.loads(self.post.call_args.kwargs['data'])
+        self.assertEqual([item['messageId'] for item in sent], ['valid'])
+
+    def test_handler_reports_only_non_object_bodies_as_failures(self):
+        event = {'Records': [{'messageId': m['MessageId'], 'receiptHandle': m['ReceiptHandle'], 'body': m['Body']}
+                             for m in mixed_batch()]}
+        with mock.patch.object(consumer, 'USE_BATCH_ENDPOINT', True), \
+                mock.patch.object(consumer, 'COALESCE_ENABLED', False), \
+                mock.patch.object(consumer, 'dedup_filter', None):
+            response = consumer.handler(event, None)
+
+        failures = [failure['itemIdentifier'] for failure in response['batchItemFailures']]
+        self.assertEqual(failures, ['list', 'string', 'number', 'broken'])
+
+class FakeVisibilitySQS:
+    """Registra as chamadas de change_message_visibility_batch."""
+
+    def __init__(self):
+        self.changed = []
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.changed.extend(entry['ReceiptHandle'] for entry in Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries]}
+
+class BatchFailureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sqs = FakeVisibilitySQS()
+        self.visibility = consumer.VisibilityManager(self.sqs)
+        self.messages = [message(str(index), json.dumps({'id': str(index)})) for index in range(3)]
+
+        def receive(queue_url, batch_size, visibility_timeout, wait_time_seconds):
+            self.visibility.track(queue_url, self.messages, visibility_timeout)
+            return list(self.messages)
+
+        patches = [
+            mock.patch.object(consumer, 'visibility_manager', self.visibility),
+            mock.patch.object(consumer, 'receive_window', receive),
+            mock.patch.object(consumer, 'dedup_filter', None),
+            mock.patch.object(consumer, 'circuit_breaker', consumer.CircuitBreaker(enabled=False)),
+            mock.patch.object(consumer.time, 'sleep'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_unexpected_error_returns_the_batch_to_the_queue(self):
+        with mock.patch.object(consumer, 'dispatch_batch', side_effect=RuntimeError('falha')):
+            self.assertEqual(consumer.process_message_batch('q', 'dlq', 10), 0)
+
+        self.assertEqual(self.visibility.stats()['in_flight'], 0)
+        self.assertEqual(sorted(self.sqs.changed), ['rh-0', 'rh-1', 'rh-2'])
+
+    def test_settled_messages_are_not_returned_after_an_error(self):
+        ack = mock.Mock()
+        with mock.patch.object(consumer, 'dispatch_batch', return_value=[True, False, True]), \
+                mock.patch.object(consumer.ack_manager, 'ack', ack), \
+                mock.patch.object(consumer, 'send_to_dlq', side_effect=RuntimeError('falha')):
+            consumer.process_message_batch('q', 'dlq', 10)
+
+        self.assertEqual(ack.call_args.args, ('q', ['rh-0', 'rh-2']))
+        self.assertEqual(self.visibility.stats()['in_flight'], 0)
+        self.assertEqual(self.sqs.changed, ['rh-1'])
+
+if __name__ == '__main__':
+    unittest.main()
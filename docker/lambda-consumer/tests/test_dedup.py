@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Testes da camada de idempotência (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import dedup
+from dedup import (DedupFilter, DynamoDBDedupStore, LocalDedupCache, message_keys,
+                   KEY_BODY, KEY_MESSAGE_ID)
+
+def message(message_id, operation='INSERT', record_id='r-1', timestamp='2024-01-01T00:00:00'):
+    body = {'id': record_id, 'timestamp': timestamp, 'operation': operation}
+    return {'MessageId': message_id, 'Body': json.dumps(body)}
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+class FakeDynamoDB:
+    """
+    Tabela em memória. As primeiras `throttled_calls` chamadas de batch_get_item devolvem
+    todas as chaves, menos a primeira, em UnprocessedKeys.
+    """
+
+    exceptions = SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailedException)
+
+    def __init__(self, throttled_calls=0):
+        self.items = {}
+        self.throttled_calls = throttled_calls
+        self.get_calls = []
+
+    def batch_get_item(self, RequestItems):
+        (table, request), = RequestItems.items()
+        keys = request['Keys']
+        self.get_calls.append(len(keys))
+        unprocessed = []
+        if self.throttled_calls:
+            self.throttled_calls -= 1
+            keys, unprocessed = keys[:1], keys[1:]
+        found = [self.items[key['dedupKey']['S']] for key in keys if key['dedupKey']['S'] in self.items]
+        response = {'Responses': {table: found}}
+        if unprocessed:
+            response['UnprocessedKeys'] = {table: dict(request, Keys=unprocessed)}
+        return response
+
+    def put_item(self, TableName, Item, ConditionExpression):
+        key = Item['dedupKey']['S']
+        if key in self.items:
+            raise ConditionalCheckFailedException(key)
+        self.items[key] = Item
+
+    def store(self, key, expiry):
+        self.items[key] = {'dedupKey': {'S': key}, 'expiryTime': {'N': str(int(expiry))}}
+
+class ClockTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for name, value in (('time', self.clock.time), ('sleep', mock.Mock())):
+            patch = mock.patch.object(dedup.time, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.sleep = dedup.time.sleep
+
+class MessageKeysTest(unittest.TestCase):
+
+    def test_message_id_and_content_keys(self):
+        self.assertEqual(message_keys(message('m-1'), (KEY_MESSAGE_ID, KEY_BODY)),
+                         ['msg:m-1', 'body:INSERT:r-1:2024-01-01T00:00:00'])
+
+    def test_operation_distinguishes_insert_from_delete(self):
+        insert, delete = (message_keys(message(name, operation), (KEY_BODY,))
+                          for name, operation in (('a', 'INSERT'), ('b', 'DELETE')))
+        self.assertNotEqual(insert, delete)
+
+    def test_customer_record_pair_and_unkeyed_bodies(self):
+        pair = {'MessageId': 'm', 'Body': json.dumps({'data': {'customerId': 'c', 'recordId': 'r'}})}
+        self.assertEqual(message_keys(pair, (KEY_BODY,)), ['body::c#r:'])
+        for body in ('[1]', '{not json', json.dumps({'operation': 'INSERT'})):
+            self.assertEqual(message_keys({'MessageId': 'm', 'Body': body}, (KEY_MESSAGE_ID, KEY_BODY)), ['msg:m'])
+
+class LocalDedupCacheTest(ClockTestCase):
+
+    def test_least_recently_used_key_is_evicted(self):
+        cache = LocalDedupCache(max_entries=2)
+        cache.add(['a', 'b'])
+        self.assertTrue(cache.contains('a'))  # 'a' passa a ser a mais recente
+        cache.add(['c'])
+        self.assertEqual([cache.contains(key) for key in ('a', 'b', 'c')], [True, False, True])
+
+    def test_keys_expire_after_the_ttl(self):
+        cache = LocalDedupCache(ttl_seconds=60)
+        cache.add(['a'])
+        self.clock.now += 59
+        self.assertTrue(cache.contains('a'))
+        self.clock.now += 1
+        self.assertFalse(cache.contains('a'))
+        self.assertEqual(len(cache), 0)
+
+class DedupFilterTest(ClockTestCase):
+
+    def test_processed_messages_are_split_as_duplicates(self):
+        dedup_filter = DedupFilter(LocalDedupCache())
+        first = message('m-1')
+        dedup_filter.mark_processed([first])
+
+        redelivery = message('m-1')
+        resent = message('m-2')  # Mesmo conteúdo com outro MessageId: duplicada pela chave de conteúdo
+        other = message('m-3', record_id='r-2')
+        duplicates, fresh = dedup_filter.split([redelivery, other, resent])
+
+        self.assertEqual((duplicates, fresh), ([redelivery, resent], [other]))
+        stats = dedup_filter.stats()
+        self.assertEqual((stats['hits_local'], stats['misses']), (2, 1))
+
+    def test_backend_hits_are_cached_locally(self):
+        dynamodb = FakeDynamoDB()
+        backend = DynamoDBDedupStore(dynamodb, 'dedup')
+        DedupFilter(LocalDedupCache(), backend).mark_processed([message('m-1')])
+
+        dedup_filter = DedupFilter(LocalDedupCache(), backend)  # Outra instância, cache local vazio
+        self.assertEqual(len(dedup_filter.split([message('m-1')])[0]), 1)
+        calls = len(dynamodb.get_calls)
+        self.assertEqual(len(dedup_filter.split([message('m-1')])[0]), 1)
+
+        self.assertEqual(len(dynamodb.get_calls), calls)
+        stats = dedup_filter.stats()
+        self.assertEqual((stats['hits_backend'], stats['hits_local']), (1, 1))
+
+    def test_backend_error_lets_messages_through(self):
+        backend = mock.Mock()
+        backend.find_known.side_effect = RuntimeError('indisponível')
+        backend.add.side_effect = RuntimeError('indisponível')
+        dedup_filter = DedupFilter(LocalDedupCache(), backend)
+
+        duplicates, fresh = dedup_filter.split([message('m-1')])
+        dedup_filter.mark_processed(fresh)
+
+        self.assertEqual((duplicates, len(fresh)), ([], 1))
+        self.assertEqual(dedup_filter.stats()['backend_errors'], 2)
+        self.assertEqual(len(dedup_filter.split([message('m-1')])[0]), 1)  # O cache local foi registrado
+
+class DynamoDBDedupStoreTest(ClockTestCase):
+
+    def test_unprocessed_keys_are_retried(self):
+        dynamodb = FakeDynamoDB(throttled_calls=2)
+        for key in ('a', 'b', 'c'):
+            dynamodb.store(key, self.clock.now + 60)
+        dynamodb.store('expired', self.clock.now - 1)
+
+        known = DynamoDBDedupStore(dynamodb, 'dedup').find_known(['a', 'b', 'c', 'expired', 'a'])
+
+        self.assertEqual(known, {'a', 'b', 'c'})
+        self.assertEqual(dynamodb.get_calls, [4, 3, 2])
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_persistent_unprocessed_keys_raise(self):
+        dynamodb = FakeDynamoDB(throttled_calls=100)
+        store = DynamoDBDedupStore(dynamodb, 'dedup')
+
+        with self.assertRaises(RuntimeError):
+            store.find_known([f'k-{index}' for index in range(10)])
+        self.assertEqual(len(dynamodb.get_calls), DynamoDBDedupStore.MAX_UNPROCESSED_RETRIES + 1)
+
+    def test_keys_are_queried_in_chunks_of_one_hundred(self):
+        dynamodb = FakeDynamoDB()
+        DynamoDBDedupStore(dynamodb, 'dedup').find_known([f'k-{index}' for index in range(250)])
+        self.assertEqual(dynamodb.get_calls, [100, 100, 50])
+
+    def test_add_does_not_extend_an_existing_key(self):
+        dynamodb = FakeDynamoDB()
+        dynamodb.store('a', self.clock.now + 5)
+        DynamoDBDedupStore(dynamodb, 'dedup', ttl_seconds=60).add(['a', 'b'])
+        self.assertEqual({key: item['expiryTime']['N'] for key, item in dynamodb.items.items()},
+                         {'a': str(int(self.clock.now + 5)), 'b': str(int(self.clock.now + 60))})
+
+if __name__ == '__main__':
+    unittest.main()
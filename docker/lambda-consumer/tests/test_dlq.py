@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Testes do encaminhamento em lote para a DLQ (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import json
+import asyncio
+import unittest
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+from batch_sender import SQS_MAX_BATCH_BYTES, entry_size
+from dlq import (build_dlq_entries, build_report, forward_to_dlq, forward_to_dlq_async,
+                 STATUS_DEAD_LETTERED, STATUS_SEND_FAILED, STATUS_DELETE_FAILED, STATUS_INVALID_BODY)
+
+def message(message_id, body):
+    return {'MessageId': message_id, 'ReceiptHandle': f'rh-{message_id}', 'Body': body}
+
+class BuildEntriesTest(unittest.TestCase):
+
+    def test_error_envelope_is_added_to_objects(self):
+        entries, invalid = build_dlq_entries([message('a', json.dumps({'id': 'r-1'}))], reason='falha')
+        self.assertEqual(invalid, {})
+        body = json.loads(entries[0]['MessageBody'])
+        self.assertEqual((entries[0]['Id'], body['id'], body['error']['reason']), ('0', 'r-1', 'falha'))
+
+    def test_non_object_and_broken_bodies_are_invalid(self):
+        messages = [message('list', '[1, 2]'), message('ok', '{"id": "r-1"}'), message('text', '"x"'),
+                    message('broken', '{not json')]
+        entries, invalid = build_dlq_entries(messages)
+        self.assertEqual([entry['Id'] for entry in entries], ['1'])
+        self.assertEqual(sorted(invalid), ['0', '2', '3'])
+
+class FakeSQS:
+    """SQS em memória que recusa a chamada inteira acima de 10 entradas ou 256 KB, como o serviço."""
+
+    def __init__(self, failing_deletes=()):
+        self.sent = []
+        self.send_calls = []
+        self.deleted = []
+        self.failing_deletes = set(failing_deletes)
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.send_calls.append(sum(entry_size(entry) for entry in Entries))
+        if len(Entries) > 10 or self.send_calls[-1] > SQS_MAX_BATCH_BYTES:
+            raise RuntimeError('BatchRequestTooLong')
+        self.sent.extend(Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries]}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        ok = [entry for entry in Entries if entry['ReceiptHandle'] not in self.failing_deletes]
+        self.deleted.extend(entry['ReceiptHandle'] for entry in ok)
+        return {'Successful': [{'Id': entry['Id']} for entry in ok],
+                'Failed': [{'Id': entry['Id'], 'Code': 'ReceiptHandleIsInvalid', 'SenderFault': True,
+                            'Message': 'inválido'} for entry in Entries if entry not in ok]}
+
+class AsyncFakeSQS(FakeSQS):
+
+    async def send_message_batch(self, QueueUrl, Entries):
+        return FakeSQS.send_message_batch(self, QueueUrl, Entries)
+
+    async def delete_message_batch(self, QueueUrl, Entries):
+        return FakeSQS.delete_message_batch(self, QueueUrl, Entries)
+
+def large_messages(count, size):
+    return [message(str(index), json.dumps({'id': str(index), 'data': 'x' * size})) for index in range(count)]
+
+class ForwardToDlqTest(unittest.TestCase):
+
+    def test_batches_respect_the_payload_limit(self):
+        sqs = FakeSQS()
+        messages = large_messages(10, 40 * 1024)  # 400 KB em 10 mensagens: não cabe numa chamada
+
+        report = forward_to_dlq(sqs, 'main', 'dlq', messages, max_retries=0)
+
+        self.assertEqual({result['status'] for result in report}, {STATUS_DEAD_LETTERED})
+        self.assertGreater(len(sqs.send_calls), 1)
+        self.assertTrue(all(size <= SQS_MAX_BATCH_BYTES for size in sqs.send_calls))
+        self.assertEqual(sorted(sqs.deleted), sorted(m['ReceiptHandle'] for m in messages))
+
+    def test_oversized_message_stays_in_the_main_queue(self):
+        sqs = FakeSQS()
+        messages = large_messages(1, SQS_MAX_BATCH_BYTES) + [message('small', json.dumps({'id': 'r-1'}))]
+
+        report = forward_to_dlq(sqs, 'main', 'dlq', messages, max_retries=0)
+
+        self.assertEqual([result['status'] for result in report], [STATUS_SEND_FAILED, STATUS_DEAD_LETTERED])
+        self.assertIn('excede o limite', report[0]['error'])
+        self.assertEqual(sqs.deleted, ['rh-small'])
+
+    def test_async_batches_respect_the_payload_limit(self):
+        sqs = AsyncFakeSQS()
+        messages = large_messages(10, 40 * 1024)
+
+        report = asyncio.run(forward_to_dlq_async(sqs, 'main', 'dlq', messages, max_retries=0))
+
+        self.assertEqual({result['status'] for result in report}, {STATUS_DEAD_LETTERED})
+        self.assertTrue(all(size <= SQS_MAX_BATCH_BYTES for size in sqs.send_calls))
+
+class BuildReportTest(unittest.TestCase):
+
+    def test_one_status_per_message_in_order(self):
+        messages = [message(name, '{}') for name in ('ok', 'invalid', 'send', 'delete')]
+        report = build_report(messages, {'1': 'corpo inválido'}, {'2': {'Message': 'recusada'}},
+                              {'3': {'Message': 'handle expirado'}})
+
+        self.assertEqual([(result['MessageId'], result['status'], result.get('error')) for result in report], [
+            ('ok', STATUS_DEAD_LETTERED, None),
+            ('invalid', STATUS_INVALID_BODY, 'corpo inválido'),
+            ('send', STATUS_SEND_FAILED, 'recusada'),
+            ('delete', STATUS_DELETE_FAILED, 'handle expirado'),
+        ])
+
+    def test_delete_failure_is_reported_after_sending(self):
+        sqs = FakeSQS(failing_deletes={'rh-1'})
+        report = forward_to_dlq(sqs, 'main', 'dlq', large_messages(2, 10), max_retries=0)
+        self.assertEqual([result['status'] for result in report], [STATUS_DEAD_LETTERED, STATUS_DELETE_FAILED])
+        self.assertEqual(len(sqs.sent), 2)
+
+if __name__ == '__main__':
+    unittest.main()
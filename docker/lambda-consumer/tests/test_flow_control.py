@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Testes do controle de fluxo AIMD (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import flow_control
+from flow_control import FlowController, is_congestion
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+class FlowControllerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(flow_control.time, 'time', self.clock.time)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def warm_up(self, controller, latency=0.1, in_flight=1):
+        """Amostras sem congestionamento até o fim do aquecimento da referência."""
+        for _ in range(controller.min_samples):
+            self.clock.now += latency
+            controller.record(latency, False, in_flight)
+
+class AdditiveIncreaseTest(FlowControllerTestCase):
+
+    def test_limit_grows_about_one_per_limit_responses(self):
+        controller = FlowController(initial_limit=10)
+        for _ in range(10):
+            controller.record(0.1, False, 10)
+        self.assertEqual(controller.limit, 10)
+        controller.record(0.1, False, 10)
+        self.assertEqual(controller.limit, 11)
+        self.assertEqual(controller.stats()['increases'], 1)
+
+    def test_idle_consumer_does_not_inflate_the_limit(self):
+        controller = FlowController(initial_limit=10)
+        for _ in range(100):
+            controller.record(0.1, False, 4)
+        self.assertEqual(controller.limit, 10)
+
+    def test_limit_stops_at_the_ceiling(self):
+        controller = FlowController(initial_limit=4, max_limit=5)
+        for _ in range(100):
+            controller.record(0.1, False, 5)
+        self.assertEqual(controller.limit, 5)
+
+class MultiplicativeDecreaseTest(FlowControllerTestCase):
+
+    def test_congestion_cuts_the_limit_once_per_rtt(self):
+        controller = FlowController(initial_limit=20, backoff_ratio=0.5)
+        controller.record(0.1, True, 20)
+        controller.record(0.1, True, 20)  # Mesma rodada de respostas: sem nova redução
+        self.assertEqual(controller.limit, 10)
+
+        self.clock.now += 0.2
+        controller.record(0.1, True, 10)
+        self.assertEqual(controller.limit, 5)
+        self.assertEqual(controller.stats()['congestion_signals'], 3)
+
+    def test_limit_stops_at_the_floor(self):
+        controller = FlowController(initial_limit=4, min_limit=2, backoff_ratio=0.5)
+        for _ in range(5):
+            self.clock.now += 1
+            controller.record(0.1, True, 4)
+        self.assertEqual(controller.limit, 2)
+
+    def test_latency_above_the_reference_is_congestion(self):
+        controller = FlowController(initial_limit=10, latency_tolerance=1.5, min_samples=5)
+        self.warm_up(controller)
+        for _ in range(5):
+            self.clock.now += 0.5
+            controller.record(0.5, False, 1)
+        self.assertLess(controller.limit, 10)
+        self.assertGreater(controller.stats()['congestion_signals'], 0)
+
+    def test_absolute_latency_threshold(self):
+        controller = FlowController(initial_limit=10, latency_threshold=0.05, min_samples=5)
+        self.warm_up(controller)
+        self.assertEqual(controller.limit, 10)  # Sem avaliar a latência durante o aquecimento
+
+        self.clock.now += 0.1
+        controller.record(0.1, False, 1)
+        self.assertLess(controller.limit, 10)
+
+class ConcurrencyTest(FlowControllerTestCase):
+
+    def test_acquire_blocks_until_a_slot_is_released(self):
+        controller = FlowController(initial_limit=1)
+        controller.acquire()
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+        waiter.start()
+
+        self.assertFalse(acquired.wait(0.1))
+        controller.release(0.1, False)
+        self.assertTrue(acquired.wait(1))
+        waiter.join()
+        self.assertEqual(controller.stats()['in_flight'], 1)
+
+    def test_receive_size_follows_the_limit(self):
+        controller = FlowController(initial_limit=3)
+        self.assertEqual(controller.receive_size(10), 3)
+        self.assertEqual(controller.receive_size(2), 2)
+
+    def test_disabled_controller_never_blocks_nor_adapts(self):
+        controller = FlowController(enabled=False, initial_limit=1)
+        controller.acquire()
+        controller.acquire()
+        controller.record(0.1, True, 1)
+        self.assertEqual(controller.receive_size(10), 10)
+        self.assertEqual((controller.limit, controller.stats()['in_flight']), (1, 0))
+
+class IsCongestionTest(unittest.TestCase):
+
+    def test_overload_statuses(self):
+        self.assertEqual([is_congestion(status) for status in ('error', 429, 500, 503, 200, 400, 404)],
+                         [True, True, True, True, False, False, False])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Testes do conjunto de chaves vivas do producer (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import uuid
+import random
+import unittest
+
+# Módulos do producer, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..', '..', 'message-producer')]
+
+from live_keys import LiveKeySet, UuidPairCodec, UuidTimestampCodec
+
+def pair(index):
+    return str(uuid.UUID(int=index)), str(uuid.UUID(int=index + 1000))
+
+class CodecTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for codec, key in ((UuidPairCodec(), pair(1)),
+                           (UuidTimestampCodec(), (str(uuid.UUID(int=7)), '2024-05-01T12:30:45.123456'))):
+            record = codec.encode(key)
+            self.assertEqual(len(record), codec.record_size)
+            self.assertEqual(codec.decode(record), key)
+
+class LiveKeySetTest(unittest.TestCase):
+
+    def test_pop_random_returns_every_key_once(self):
+        keys = LiveKeySet(UuidPairCodec(), rng=random.Random(1))
+        for index in range(50):
+            keys.add(pair(index))
+
+        popped = [keys.pop_random() for _ in range(50)]
+
+        self.assertEqual(sorted(popped), sorted(pair(index) for index in range(50)))
+        self.assertEqual(keys.stats(), {'keys': 0, 'evicted': 0, 'bytes': 0})
+
+    def test_pop_random_on_empty_set_raises(self):
+        keys = LiveKeySet(UuidPairCodec())
+        with self.assertRaises(IndexError):
+            keys.pop_random()
+
+    def test_size_is_capped_by_reservoir_sampling(self):
+        keys = LiveKeySet(UuidPairCodec(), max_keys=10, rng=random.Random(1))
+        for index in range(1000):
+            keys.add(pair(index))
+
+        stats = keys.stats()
+        self.assertEqual((len(keys), stats['evicted'], stats['bytes']), (10, 990, 10 * UuidPairCodec.record_size))
+        sample = {keys.pop_random() for _ in range(10)}
+        self.assertTrue(sample <= {pair(index) for index in range(1000)})
+        self.assertGreater(max(int(uuid.UUID(key[0])) for key in sample), 10)  # Chaves novas entram na amostra
+
+    def test_sample_is_uniform_over_seen_keys(self):
+        rng = random.Random(7)
+        late = 0
+        for _ in range(200):
+            keys = LiveKeySet(UuidPairCodec(), max_keys=10, rng=rng)
+            for index in range(100):
+                keys.add(pair(index))
+            late += sum(1 for _ in range(10) if int(uuid.UUID(keys.pop_random()[0])) >= 50)
+        self.assertAlmostEqual(late / 2000, 0.5, delta=0.05)
+
+if __name__ == '__main__':
+    unittest.main()
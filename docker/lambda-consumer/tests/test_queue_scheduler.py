@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Testes do escalonamento entre filas com pesos (python -m unittest discover docker/lambda-consumer/tests)."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Módulos do consumidor e compartilhados, fora da imagem
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'common')]
+
+import queue_scheduler
+from queue_scheduler import WeightedQueueScheduler, parse_queue_weights
+
+MAX_WAIT = 5
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(queue_scheduler.time, 'time', self.clock.time)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def run_consumer(self, scheduler, seconds, messages_per_queue):
+        """
+        Simula o laço do consumidor: cada recebimento de uma fila com mensagens volta na hora com 10;
+        um recebimento vazio dura o WaitTimeSeconds. Retorna [(fila, espera)] de cada recebimento.
+        """
+        polls = []
+        deadline = self.clock.now + seconds
+        while self.clock.now < deadline:
+            queue, wait = scheduler.next_queue(MAX_WAIT)
+            if queue is None:
+                self.clock.now += wait
+                continue
+            polls.append((queue.name, wait))
+            received = 10 if messages_per_queue.get(queue.name) else 0
+            self.clock.now += 0.01 if received else wait
+            scheduler.record(queue, received)
+        return polls
+
+class NextQueueWaitTest(SchedulerTestCase):
+
+    def test_single_queue_long_polls_for_the_full_wait(self):
+        scheduler = WeightedQueueScheduler([('a', 1)])
+        self.assertEqual(scheduler.next_queue(MAX_WAIT)[1], MAX_WAIT)
+
+    def test_ready_queues_do_not_shorten_the_long_poll(self):
+        scheduler = WeightedQueueScheduler([('a', 1), ('b', 1), ('c', 1)])
+        queue, wait = scheduler.next_queue(MAX_WAIT)
+        self.assertEqual((queue.name, wait), ('a', MAX_WAIT))
+
+    def test_idle_queues_never_short_poll(self):
+        scheduler = WeightedQueueScheduler([('a', 1), ('b', 1)])
+        polls = self.run_consumer(scheduler, 6, {})
+        waits = [wait for _, wait in polls]
+        self.assertTrue(all(wait >= 1 for wait in waits), waits)
+        self.assertLessEqual(len(polls), 6)
+
+    def test_wait_is_capped_by_a_queue_in_backoff(self):
+        scheduler = WeightedQueueScheduler([('a', 1), ('b', 1)], idle_backoff_base=1.5)
+        b = scheduler.queues[1]
+        scheduler.record(b, 0)  # b volta a ficar pronta em 1,5s
+        queue, wait = scheduler.next_queue(MAX_WAIT)
+        self.assertEqual((queue.name, wait), ('a', 2))
+
+    def test_idle_queue_only_probes_while_another_has_messages(self):
+        scheduler = WeightedQueueScheduler([('busy', 1), ('idle', 1)])
+        polls = self.run_consumer(scheduler, 10, {'busy': True})
+        idle_waits = {wait for name, wait in polls if name == 'idle'}
+        busy_polls = sum(1 for name, _ in polls if name == 'busy')
+        self.assertEqual(idle_waits - {MAX_WAIT}, {0})
+        self.assertLessEqual(sum(1 for name, wait in polls if name == 'idle' and wait), 1)
+        self.assertGreater(busy_polls, 500)
+
+class WeightedFairnessTest(SchedulerTestCase):
+
+    def test_weights_split_receives_proportionally(self):
+        scheduler = WeightedQueueScheduler([('a', 3), ('b', 1)])
+        polls = self.run_consumer(scheduler, 4, {'a': True, 'b': True})
+        counts = {name: sum(1 for polled, _ in polls if polled == name) for name in ('a', 'b')}
+        self.assertAlmostEqual(counts['a'] / counts['b'], 3, delta=0.1)
+
+    def test_queue_returning_from_idle_does_not_monopolize(self):
+        scheduler = WeightedQueueScheduler([('a', 1), ('b', 1)])
+        a, b = scheduler.queues
+        scheduler.record(b, 0)
+        for _ in range(50):
+            scheduler.record(a, 10)
+        scheduler.record(b, 10)
+        self.assertGreaterEqual(b.virtual_time, a.virtual_time)
+
+    def test_empty_polls_back_off_exponentially_up_to_the_cap(self):
+        scheduler = WeightedQueueScheduler([('a', 1)], idle_backoff_base=0.1, idle_backoff_max=2.0)
+        a = scheduler.queues[0]
+        delays = []
+        for _ in range(7):
+            scheduler.record(a, 0)
+            delays.append(round(a.next_poll_at - self.clock.now, 2))
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1.6, 2.0, 2.0])
+
+class ParseQueueWeightsTest(unittest.TestCase):
+
+    def test_parses_names_and_default_weight(self):
+        self.assertEqual(parse_queue_weights('a:3, b ,c:0.5', 'x'), [('a', 3.0), ('b', 1.0), ('c', 0.5)])
+
+    def test_empty_spec_uses_the_default_queue(self):
+        self.assertEqual(parse_queue_weights(' ', 'main'), [('main', 1.0)])
+
+    def test_rejects_non_positive_weights(self):
+        with self.assertRaises(ValueError):
+            parse_queue_weights('a:0', 'main')
+
+if __name__ == '__main__':
+    unittest.main()
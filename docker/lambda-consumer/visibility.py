@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Gerenciamento adaptativo do visibility timeout das mensagens em processamento:
+1. Timeout de recebimento calculado a partir da latência medida por mensagem (p99)
+2. Heartbeat que estende com change_message_visibility_batch as mensagens ainda em processamento
+3. Redução do timeout das mensagens que serão reprocessadas, para que voltem à fila rapidamente
+"""
+import math
+import time
+import logging
+import threading
+from collections import deque
+from functools import partial
+from sqs_batch import execute_batch, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Limite do SQS para a visibilidade total de uma mensagem a partir do recebimento
+SQS_MAX_VISIBILITY_SECONDS = 12 * 60 * 60
+
+class VisibilityManager:
+    """
+    Acompanha os receipt handles em processamento e renova a visibilidade deles
+    numa thread própria, com base na latência observada de processamento.
+    """
+
+    def __init__(self, sqs, initial_timeout=180, min_timeout=30, max_timeout=900,
+                 heartbeat_interval=10, safety_factor=3.0, retry_timeout=5,
+                 latency_window=200, min_samples=20):
+        self.sqs = sqs
+        self.initial_timeout = initial_timeout  # Usado até haver amostras de latência suficientes
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.safety_factor = safety_factor
+        self.retry_timeout = retry_timeout
+        self.min_samples = min_samples
+
+        self._latencies = deque(maxlen=latency_window)
+        self._in_flight = {}  # receipt_handle -> [queue_url, instante de recebimento, prazo de visibilidade]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'extended': 0, 'released_for_retry': 0, 'extend_failures': 0}
+
+    def start(self):
+        """Inicia a thread de heartbeat."""
+        self._thread = threading.Thread(target=self._heartbeat_loop, name='visibility-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Encerra a thread de heartbeat."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def observe(self, latency_seconds):
+        """Registra a latência de processamento de uma mensagem."""
+        with self._lock:
+            self._latencies.append(latency_seconds)
+
+    def _latency_p99(self):
+        """Percentil 99 das latências recentes. Deve ser chamado com o lock adquirido."""
+        samples = sorted(self._latencies)
+        return samples[min(int(len(samples) * 0.99), len(samples) - 1)]
+
+    def receive_timeout(self):
+        """Visibility timeout para o próximo receive_message."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_timeout
+            p99 = self._latency_p99()
+
+        timeout = math.ceil(p99 * self.safety_factor + self.heartbeat_interval)
+        return max(self.min_timeout, min(timeout, self.max_timeout))
+
+    def track(self, queue_url, messages, visibility_timeout):
+        """Passa a acompanhar as mensagens recebidas com o timeout informado."""
+        now = time.time()
+        with self._lock:
+            for message in messages:
+                self._in_flight[message['ReceiptHandle']] = [queue_url, now, now + visibility_timeout]
+
+    def release(self, receipt_handles):
+        """Deixa de acompanhar mensagens concluídas (removidas ou enviadas para a DLQ)."""
+        with self._lock:
+            for handle in receipt_handles:
+                self._in_flight.pop(handle, None)
+
+    def release_for_retry(self, queue_url, receipt_handles):
+        """
+        Reduz a visibilidade de mensagens que serão reprocessadas, para que voltem
+        à fila em retry_timeout segundos em vez de aguardar o timeout completo.
+        """
+        self.release(receipt_handles)
+        if not receipt_handles:
+            return
+
+        entries = [{'Id': str(index), 'ReceiptHandle': handle, 'VisibilityTimeout': self.retry_timeout}
+                   for index, handle in enumerate(receipt_handles)]
+        successful, _ = execute_batch(partial(self.sqs.change_message_visibility_batch, QueueUrl=queue_url), entries)
+
+        with self._lock:
+            self._stats['released_for_retry'] += len(successful)
+
+    def stats(self):
+        """Retorna contadores do heartbeat e o timeout atual de recebimento."""
+        timeout = self.receive_timeout()
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._in_flight), receive_timeout=timeout)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._extend_expiring()
+            except Exception as e:
+                logger.error(f"Erro ao estender visibilidade das mensagens: {str(e)}")
+
+    def _extend_expiring(self):
+        """Estende as mensagens que expirariam antes dos próximos dois heartbeats."""
+        now = time.time()
+        horizon = now + 2 * self.heartbeat_interval
+        timeout = self.receive_timeout()
+
+        expiring = {}
+        with self._lock:
+            for handle, (queue_url, received_at, deadline) in self._in_flight.items():
+                # O SQS não permite visibilidade total acima de 12 horas desde o recebimento
+                if deadline <= horizon and now + timeout - received_at < SQS_MAX_VISIBILITY_SECONDS:
+                    expiring.setdefault(queue_url, []).append(handle)
+
+        for queue_url, handles in expiring.items():
+            entries = [{'Id': str(index), 'ReceiptHandle': handle, 'VisibilityTimeout': timeout}
+                       for index, handle in enumerate(handles)]
+            successful, failed = execute_batch(
+                partial(self.sqs.change_message_visibility_batch, QueueUrl=queue_url), entries
+            )
+
+            with self._lock:
+                for entry_id in successful:
+                    state = self._in_flight.get(handles[int(entry_id)])
+                    if state:
+                        state[2] = now + timeout
+                # Handles inválidos indicam mensagens já concluídas ou expiradas
+                for entry_id, failure in failed.items():
+                    if not is_retryable(failure):
+                        self._in_flight.pop(handles[int(entry_id)], None)
+                self._stats['extended'] += len(successful)
+                self._stats['extend_failures'] += len(failed)
+
+            if successful:
+                logger.info(f"Visibilidade estendida em {timeout}s para {len(successful)} mensagens em processamento")
@@ -4,15 +4,24 @@ Produtor de mensagens para SQS que simula alto volume de tráfego para o process
 Gera mensagens de insert (80%) e delete (20%) no formato esperado pelo processador Java.
 """
 import os
+import sys
 import time
-import json
 import random
 import logging
 import uuid
 from datetime import datetime
 import boto3
+from botocore.config import Config
 from faker import Faker
 
+# Módulos compartilhados com o consumidor: na imagem ficam ao lado deste arquivo, fora dela em docker/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import codec
+from compression import Compressor
+from batch_sender import BatchSender
+from live_keys import LiveKeySet, UuidTimestampCodec
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,6 +37,19 @@ SQS_QUEUE_NAME = os.environ.get('SQS_QUEUE_NAME', 'message-processor-main')
 MESSAGE_BATCH_SIZE = int(os.environ.get('MESSAGE_BATCH_SIZE', '100'))
 MESSAGE_INTERVAL_MS = int(os.environ.get('MESSAGE_INTERVAL_MS', '1000'))
 
+# Envio em lotes válidos para o SQS (até 10 entradas e 256 KB por chamada), em paralelo
+SEND_CONCURRENCY = int(os.environ.get('SEND_CONCURRENCY', '4'))  # Chamadas send_message_batch simultâneas
+SEND_MAX_RETRIES = int(os.environ.get('SEND_MAX_RETRIES', '3'))  # Novas tentativas das entradas Failed retentáveis
+
+# Chaves candidatas a DELETE mantidas em memória (acima do limite, amostragem por reservoir)
+LIVE_KEYS_MAX = int(os.environ.get('LIVE_KEYS_MAX', '100000'))
+
+# Envelope de compressão (opcional): corpos a partir de COMPRESSION_MIN_BYTES seguem comprimidos,
+# com o algoritmo no atributo de mensagem content-encoding
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'false').lower() == 'true'
+COMPRESSION_ALGORITHM = os.environ.get('COMPRESSION_ALGORITHM', 'zlib')  # 'zlib' ou 'zstd' (pacote zstandard)
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+
 # Inicializar Faker para gerar dados aleatórios
 fake = Faker()
 
@@ -37,8 +59,16 @@ sqs = boto3.client(
     endpoint_url=AWS_ENDPOINT_URL,
     region_name=AWS_REGION,
     aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    # Uma conexão por chamada simultânea do BatchSender
+    config=Config(max_pool_connections=max(SEND_CONCURRENCY, 10))
 )
+batch_sender = BatchSender(sqs, concurrency=SEND_CONCURRENCY, max_retries=SEND_MAX_RETRIES)
+
+compressor = Compressor(
+    algorithm=COMPRESSION_ALGORITHM,
+    min_bytes=COMPRESSION_MIN_BYTES
+) if COMPRESSION_ENABLED else None
 
 def wait_for_queue():
     """Aguarda até que a fila SQS esteja disponível."""
@@ -90,27 +120,31 @@ def generate_delete_message(message_id, timestamp):
     }
 
 def send_message_batch(queue_url, messages):
-    """Envia um lote de mensagens para a fila SQS."""
+    """
+    Envia mensagens para a fila SQS, em quantos lotes send_message_batch forem necessários.
+    Retorna (enviadas, falhas).
+    """
     try:
         entries = []
         for i, message in enumerate(messages):
-            entries.append({
+            entry = {
                 'Id': str(i),
-                'MessageBody': json.dumps(message)
-            })
-        
-        response = sqs.send_message_batch(
-            QueueUrl=queue_url,
-            Entries=entries
-        )
+                'MessageBody': codec.dumps(message)
+            }
+            if compressor:
+                entry['MessageBody'], attributes = compressor.encode(entry['MessageBody'])
+                if attributes:
+                    entry['MessageAttributes'] = attributes
+            entries.append(entry)
         
-        successful = len(response.get('Successful', []))
-        failed = len(response.get('Failed', []))
+        sent, failures = batch_sender.send(queue_url, entries)
+        successful = len(sent)
+        failed = len(failures)
         
         logger.info(f"Enviado lote de {successful} mensagens com sucesso, {failed} falhas")
         
         if failed > 0:
-            logger.warning(f"Falhas no envio: {response.get('Failed')}")
+            logger.warning(f"Falhas no envio: {list(failures.values())}")
             
         return successful, failed
     except Exception as e:
@@ -125,13 +159,14 @@ def main():
         return
     
     # Manter registro de mensagens para gerar operações de delete
-    messages = []
+    messages = LiveKeySet(UuidTimestampCodec(), max_keys=LIVE_KEYS_MAX)
     total_sent = 0
     
     logger.info(f"Iniciando produtor de mensagens para o processador Java. Tamanho do lote: {MESSAGE_BATCH_SIZE}, Intervalo: {MESSAGE_INTERVAL_MS}ms")
     
     try:
         while True:
+            cycle_start = time.time()
             batch = []
             
             for _ in range(MESSAGE_BATCH_SIZE):
@@ -141,23 +176,22 @@ def main():
                 if is_insert or len(messages) < 100:  # Sempre inserir se não tiver mensagens suficientes
                     # Gerar dados para insert
                     message = generate_insert_message()
-                    messages.append((message["id"], message["timestamp"]))
+                    messages.add((message["id"], message["timestamp"]))
                     batch.append(message)
                 else:
                     # Selecionar uma mensagem aleatória para delete
                     if messages:
-                        message_index = random.randint(0, len(messages) - 1)
-                        message_id, timestamp = messages.pop(message_index)
+                        message_id, timestamp = messages.pop_random()
                         batch.append(generate_delete_message(message_id, timestamp))
             
             # Enviar o lote de mensagens
             successful, _ = send_message_batch(queue_url, batch)
             total_sent += successful
             
-            logger.info(f"Total de mensagens enviadas: {total_sent}")
+            logger.info(f"Total de mensagens enviadas: {total_sent}, chaves candidatas a DELETE: {len(messages)}")
             
-            # Aguardar o intervalo configurado
-            time.sleep(MESSAGE_INTERVAL_MS / 1000.0)
+            # Aguardar o restante do intervalo: o tempo de envio não reduz a taxa configurada
+            time.sleep(max(0.0, MESSAGE_INTERVAL_MS / 1000.0 - (time.time() - cycle_start)))
     except KeyboardInterrupt:
         logger.info("Produtor de mensagens interrompido pelo usuário")
     except Exception as e:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Conjunto de chaves ainda vivas (inseridas e não removidas), candidatas às mensagens de DELETE:
+1. Remoção aleatória em O(1): o último registro ocupa o lugar do removido (swap-remove)
+2. Armazenamento compacto: registros de tamanho fixo num único bytearray (UUIDs em 16 bytes,
+   timestamps em 8 bytes), sem um objeto tuple/str por chave
+3. Limite configurável: com o conjunto cheio, cada nova chave substitui uma posição aleatória com
+   probabilidade limite / chaves vistas (reservoir sampling), mantendo uma amostra uniforme
+Chaves descartadas pelo limite nunca recebem DELETE; os registros expiram pelo TTL da tabela.
+"""
+import uuid
+import struct
+import random
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+
+class UuidPairCodec:
+    """Par (customerId, recordId) do producer.py: dois UUIDs em 32 bytes."""
+
+    record_size = 32
+
+    def encode(self, key):
+        return uuid.UUID(key[0]).bytes + uuid.UUID(key[1]).bytes
+
+    def decode(self, record):
+        return str(uuid.UUID(bytes=bytes(record[:16]))), str(uuid.UUID(bytes=bytes(record[16:])))
+
+class UuidTimestampCodec:
+    """
+    Par (id, timestamp) do java-processor-producer.py: UUID em 16 bytes e o timestamp ISO (sem fuso)
+    em microssegundos desde 1970 em 8 bytes. isoformat() reconstrói o texto original.
+    """
+
+    record_size = 24
+
+    def encode(self, key):
+        micros = (datetime.fromisoformat(key[1]) - _EPOCH) // timedelta(microseconds=1)
+        return uuid.UUID(key[0]).bytes + struct.pack('>q', micros)
+
+    def decode(self, record):
+        micros, = struct.unpack('>q', bytes(record[16:]))
+        return str(uuid.UUID(bytes=bytes(record[:16]))), (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+class LiveKeySet:
+    """Conjunto de chaves com inserção e remoção aleatória em O(1) e tamanho máximo."""
+
+    def __init__(self, key_codec, max_keys=100000, rng=None):
+        self.key_codec = key_codec
+        self.max_keys = max_keys
+        self._rng = rng or random.Random()
+        self._record_size = key_codec.record_size
+        self._data = bytearray()
+        self._count = 0
+        self._seen = 0  # Chaves oferecidas desde o início, base da probabilidade do reservoir
+        self._evicted = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, key):
+        """Adiciona a chave; com o conjunto cheio, substitui uma posição aleatória ou descarta a chave."""
+        record = self.key_codec.encode(key)
+        self._seen += 1
+        if self._count < self.max_keys:
+            self._data += record
+            self._count += 1
+            return
+
+        self._evicted += 1
+        slot = self._rng.randrange(self._seen)
+        if slot < self._count:
+            offset = slot * self._record_size
+            self._data[offset:offset + self._record_size] = record
+
+    def pop_random(self):
+        """Remove e retorna uma chave aleatória. Levanta IndexError se o conjunto estiver vazio."""
+        if not self._count:
+            raise IndexError('pop_random de um LiveKeySet vazio')
+        size = self._record_size
+        offset = self._rng.randrange(self._count) * size
+        last = (self._count - 1) * size
+        record = bytes(self._data[offset:offset + size])
+        if offset != last:
+            self._data[offset:offset + size] = self._data[last:]
+        del self._data[last:]
+        self._count -= 1
+        return self.key_codec.decode(record)
+
+    def stats(self):
+        """Chaves no conjunto, chaves descartadas pelo limite e bytes ocupados pelos registros."""
+        return {'keys': self._count, 'evicted': self._evicted, 'bytes': len(self._data)}
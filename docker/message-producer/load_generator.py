@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga para os produtores, com taxa alvo em mensagens por segundo:
+1. Agendador sem deriva: os ticks seguem instantes absolutos (início + k * tick) e a quantidade
+   de mensagens de cada tick vem da integral da taxa, com a fração acumulada para o tick seguinte
+2. Geração e envio distribuídos num pool de processos, cada um com a sua parcela da taxa,
+   o seu cliente SQS e o envio paralelo do BatchSender
+3. Pool de payloads gerado pelo Faker antes do início: no caminho quente só mudam ids e timestamps
+4. Perfis de carga: constant, ramp, step e spike
+Usa as funções de geração e envio do produtor escolhido em LOAD_FORMAT.
+"""
+import os
+import time
+import queue
+import uuid
+import random
+import logging
+import importlib.util
+import multiprocessing
+from datetime import datetime
+from threading import BrokenBarrierError
+from live_keys import LiveKeySet, UuidPairCodec, UuidTimestampCodec
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configurações do gerador de carga
+LOAD_FORMAT = os.environ.get('LOAD_FORMAT', 'java')  # 'java' (java-processor-producer.py) ou 'customer' (producer.py)
+LOAD_PROCESSES = int(os.environ.get('LOAD_PROCESSES', str(os.cpu_count() or 1)))
+LOAD_RATE = float(os.environ.get('LOAD_RATE', '100'))  # Mensagens por segundo (taxa base dos perfis)
+LOAD_PROFILE = os.environ.get('LOAD_PROFILE', 'constant')  # constant, ramp, step ou spike
+LOAD_DURATION_SECONDS = float(os.environ.get('LOAD_DURATION_SECONDS', '60'))  # 0 = até ser interrompido
+LOAD_TICK_MS = int(os.environ.get('LOAD_TICK_MS', '100'))  # Granularidade do agendador
+LOAD_PAYLOAD_POOL_SIZE = int(os.environ.get('LOAD_PAYLOAD_POOL_SIZE', '1000'))  # Payloads pré-gerados por processo
+LOAD_DELETE_RATIO = float(os.environ.get('LOAD_DELETE_RATIO', '0.2'))
+LOAD_REPORT_SECONDS = float(os.environ.get('LOAD_REPORT_SECONDS', '5'))
+
+# Perfil ramp: de LOAD_RAMP_START_RATE até LOAD_RATE em LOAD_RAMP_SECONDS, depois constante
+LOAD_RAMP_START_RATE = float(os.environ.get('LOAD_RAMP_START_RATE', '0'))
+LOAD_RAMP_SECONDS = float(os.environ.get('LOAD_RAMP_SECONDS', '30'))
+# Perfil step: cada taxa da lista por LOAD_STEP_SECONDS; a última é mantida
+LOAD_STEP_RATES = [float(rate) for rate in os.environ.get('LOAD_STEP_RATES', '50,100,200,400').split(',')]
+LOAD_STEP_SECONDS = float(os.environ.get('LOAD_STEP_SECONDS', '15'))
+# Perfil spike: LOAD_RATE com picos de LOAD_SPIKE_RATE por LOAD_SPIKE_SECONDS a cada LOAD_SPIKE_EVERY_SECONDS
+LOAD_SPIKE_RATE = float(os.environ.get('LOAD_SPIKE_RATE', '1000'))
+LOAD_SPIKE_SECONDS = float(os.environ.get('LOAD_SPIKE_SECONDS', '5'))
+LOAD_SPIKE_EVERY_SECONDS = float(os.environ.get('LOAD_SPIKE_EVERY_SECONDS', '30'))
+
+PRODUCER_FILES = {'java': 'java-processor-producer.py', 'customer': 'producer.py'}
+
+def profile_rate(elapsed):
+    """Taxa alvo (mensagens por segundo) no instante elapsed do perfil configurado."""
+    if LOAD_PROFILE == 'constant':
+        return LOAD_RATE
+    if LOAD_PROFILE == 'ramp':
+        if elapsed >= LOAD_RAMP_SECONDS:
+            return LOAD_RATE
+        return LOAD_RAMP_START_RATE + (LOAD_RATE - LOAD_RAMP_START_RATE) * elapsed / LOAD_RAMP_SECONDS
+    if LOAD_PROFILE == 'step':
+        return LOAD_STEP_RATES[min(int(elapsed // LOAD_STEP_SECONDS), len(LOAD_STEP_RATES) - 1)]
+    if LOAD_PROFILE == 'spike':
+        in_spike = elapsed % LOAD_SPIKE_EVERY_SECONDS >= LOAD_SPIKE_EVERY_SECONDS - LOAD_SPIKE_SECONDS
+        return LOAD_SPIKE_RATE if in_spike else LOAD_RATE
+    raise ValueError(f"Perfil de carga desconhecido: {LOAD_PROFILE} (opções: constant, ramp, step, spike)")
+
+def expected_messages(elapsed):
+    """Mensagens previstas pelo perfil até elapsed, com a mesma discretização do agendador."""
+    tick = LOAD_TICK_MS / 1000.0
+    return sum(profile_rate(k * tick) * tick for k in range(int(elapsed / tick)))
+
+def load_producer(load_format):
+    """Carrega o módulo do produtor (o nome do arquivo do processador Java não é importável diretamente)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), PRODUCER_FILES[load_format])
+    spec = importlib.util.spec_from_file_location(f"{load_format}_producer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class PayloadPool:
+    """
+    Modelos de mensagem gerados pelo Faker antes do início da carga.
+    next_batch só troca ids e timestamps e mantém a proporção de DELETE sobre registros já inseridos.
+    """
+
+    def __init__(self, producer, load_format, size, delete_ratio=0.2, min_live_keys=100, max_live_keys=100000):
+        self.producer = producer
+        self.load_format = load_format
+        self.delete_ratio = delete_ratio
+        self.min_live_keys = min_live_keys
+        key_codec = UuidPairCodec() if load_format == 'customer' else UuidTimestampCodec()
+        self.live_keys = LiveKeySet(key_codec, max_keys=max_live_keys)
+        if load_format == 'customer':
+            self.templates = [producer.generate_customer_data() for _ in range(size)]
+        else:
+            self.templates = [producer.generate_insert_message() for _ in range(size)]
+
+    def _insert(self):
+        template = random.choice(self.templates)
+        if self.load_format == 'customer':
+            data = dict(template, customerId=str(uuid.uuid4()), recordId=str(uuid.uuid4()))
+            self.live_keys.add((data['customerId'], data['recordId']))
+            return self.producer.generate_insert_message(data)
+
+        message = dict(template, id=str(uuid.uuid4()), timestamp=datetime.now().isoformat())
+        self.live_keys.add((message['id'], message['timestamp']))
+        return message
+
+    def _delete(self):
+        return self.producer.generate_delete_message(*self.live_keys.pop_random())
+
+    def next_batch(self, count):
+        batch = []
+        for _ in range(count):
+            if len(self.live_keys) < self.min_live_keys or random.random() >= self.delete_ratio:
+                batch.append(self._insert())
+            else:
+                batch.append(self._delete())
+        return batch
+
+def run_worker(index, processes, barrier, stats_queue):
+    """Processo gerador: envia a sua parcela (1/processes) da taxa do perfil."""
+    producer = load_producer(LOAD_FORMAT)
+    # O log por chamada do produtor é ruído nesta taxa: o progresso é reportado pelo processo principal
+    producer.logger.setLevel(logging.WARNING)
+
+    queue_url = producer.wait_for_queue()
+    if not queue_url:
+        barrier.abort()
+        return
+    pool = PayloadPool(producer, LOAD_FORMAT, LOAD_PAYLOAD_POOL_SIZE, delete_ratio=LOAD_DELETE_RATIO,
+                       max_live_keys=producer.LIVE_KEYS_MAX)
+
+    try:
+        barrier.wait()
+    except BrokenBarrierError:
+        return
+
+    tick = LOAD_TICK_MS / 1000.0
+    start = time.monotonic()
+    report_round = 1
+    due = 0.0
+    generated = 0
+    sent = 0
+    failed = 0
+    max_lag = 0.0
+    k = 0
+
+    while not LOAD_DURATION_SECONDS or k * tick < LOAD_DURATION_SECONDS:
+        # Quantidade pela integral da taxa: a fração que sobra entra no tick seguinte
+        due += profile_rate(k * tick) * tick / processes
+        count = int(due) - generated
+        if count > 0:
+            successful, failures = producer.send_message_batch(queue_url, pool.next_batch(count))
+            generated += count
+            sent += successful
+            failed += failures
+
+        k += 1
+        # Próximo tick em instante absoluto: o tempo de geração e envio não acumula atraso
+        lag = time.monotonic() - (start + k * tick)
+        if lag < 0:
+            time.sleep(-lag)
+        else:
+            max_lag = max(max_lag, lag)
+
+        # Relatórios em rodadas pelo tempo agendado, para o processo principal somar rodadas equivalentes
+        if k * tick >= report_round * LOAD_REPORT_SECONDS:
+            stats_queue.put({'worker': index, 'round': report_round, 'elapsed': time.monotonic() - start,
+                             'sent': sent, 'failed': failed, 'max_lag_ms': max_lag * 1000})
+            report_round += 1
+
+    stats_queue.put({'worker': index, 'round': report_round, 'elapsed': time.monotonic() - start,
+                     'sent': sent, 'failed': failed, 'max_lag_ms': max_lag * 1000, 'done': True})
+
+def main():
+    """Inicia os processos geradores e reporta a taxa obtida em relação à taxa alvo."""
+    logger.info(f"Gerador de carga: formato {LOAD_FORMAT}, perfil {LOAD_PROFILE}, taxa base {LOAD_RATE} msg/s, "
+                f"{LOAD_PROCESSES} processos, duração {LOAD_DURATION_SECONDS or 'ilimitada'} s")
+    profile_rate(0)  # Valida o perfil antes de iniciar os processos
+
+    barrier = multiprocessing.Barrier(LOAD_PROCESSES + 1)
+    stats_queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(index, LOAD_PROCESSES, barrier, stats_queue),
+                                name=f"load-{index}")
+        for index in range(LOAD_PROCESSES)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        barrier.wait()
+    except BrokenBarrierError:
+        logger.error("Não foi possível encontrar a fila SQS. Encerrando.")
+        for worker in workers:
+            worker.join()
+        return
+
+    start = time.monotonic()
+    latest = {}
+    done = set()
+    report_round = 1
+    previous_sent = 0
+    previous_elapsed = 0.0
+    previous_expected = 0.0
+
+    try:
+        while len(done) < LOAD_PROCESSES:
+            try:
+                stats = stats_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+            latest[stats['worker']] = stats
+            if stats.get('done'):
+                done.add(stats['worker'])
+
+            # Uma linha por rodada, quando todos os processos já reportaram
+            if len(latest) < LOAD_PROCESSES or any(stats['round'] < report_round for stats in latest.values()):
+                continue
+            elapsed = max(stats['elapsed'] for stats in latest.values())
+            report_round = min(stats['round'] for stats in latest.values()) + 1
+            if elapsed - previous_elapsed < LOAD_TICK_MS / 1000.0:
+                continue  # Relatório final logo após o último da rodada
+            sent = sum(stats['sent'] for stats in latest.values())
+            failed = sum(stats['failed'] for stats in latest.values())
+            max_lag = max(stats['max_lag_ms'] for stats in latest.values())
+            # Taxas médias da janela desde o relatório anterior
+            expected = expected_messages(elapsed)
+            window = elapsed - previous_elapsed
+            logger.info(f"{elapsed:.0f}s: taxa alvo {(expected - previous_expected) / window:.0f} msg/s, "
+                        f"obtida {(sent - previous_sent) / window:.0f} msg/s, enviadas {sent} (previstas {expected:.0f}), "
+                        f"falhas {failed}, atraso máximo do agendador {max_lag:.0f}ms")
+            previous_expected = expected
+            previous_sent = sent
+            previous_elapsed = elapsed
+    except KeyboardInterrupt:
+        logger.info("Gerador de carga interrompido pelo usuário")
+        for worker in workers:
+            worker.terminate()
+
+    for worker in workers:
+        worker.join()
+
+    elapsed = max((stats['elapsed'] for stats in latest.values()), default=time.monotonic() - start)
+    sent = sum(stats['sent'] for stats in latest.values())
+    logger.info(f"Carga concluída em {elapsed:.1f}s: {sent} mensagens enviadas ({sent / max(elapsed, 1e-9):.0f} msg/s, "
+                f"previstas {expected_messages(elapsed):.0f}), "
+                f"{sum(stats['failed'] for stats in latest.values())} falhas")
+
+if __name__ == "__main__":
+    main()
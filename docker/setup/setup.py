@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 """
 Script para configurar os recursos AWS na LocalStack:
-- Cria filas SQS (principal e DLQ)
-- Cria tabela DynamoDB
+- Cria filas SQS (principal, prioritária e DLQ)
+- Cria tabelas DynamoDB e habilita o TTL (update_time_to_live)
 - Configura permissões e políticas
+
+Idempotente e paralelo:
+1. Recursos existentes são detectados e reconciliados (atributos das filas e TTL das tabelas), então o script
+   pode ser executado de novo a qualquer momento
+2. As filas e as tabelas são criadas em paralelo; só a fila principal e a prioritária esperam o ARN da DLQ
+3. Prontidão verificada com polling exponencial (LocalStack) e waiters do boto3 (tabelas ACTIVE), sem esperas fixas
 """
 import os
+import sys
 import time
 import boto3
 import json
 import logging
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -21,178 +31,180 @@ AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID', 'test')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY', 'test')
 
+# Prontidão
+SETUP_TIMEOUT_SECONDS = float(os.environ.get('SETUP_TIMEOUT_SECONDS', '60'))  # Espera máxima pelo LocalStack
+SETUP_POLL_MAX_SECONDS = float(os.environ.get('SETUP_POLL_MAX_SECONDS', '2'))  # Intervalo máximo entre verificações
+
 # Nomes dos recursos
 MAIN_QUEUE_NAME = 'message-processor-main'
+PRIORITY_QUEUE_NAME = 'message-processor-priority'  # Tráfego urgente, consumido com peso maior (SQS_QUEUES)
 DLQ_NAME = 'message-processor-dlq'
 DYNAMODB_TABLE = 'customer-data'
 MESSAGE_PROCESSOR_TABLE = 'message-processor-data'
+DEDUP_TABLE = 'consumer-dedup'  # Cache de idempotência compartilhado do consumidor (DEDUP_BACKEND=dynamodb)
 
-def wait_for_localstack():
-    """Aguarda até que o LocalStack esteja pronto para receber conexões."""
-    logger.info("Aguardando LocalStack iniciar...")
-    
-    # Cria um cliente SQS para verificar se o LocalStack está pronto
-    sqs = boto3.client(
-        'sqs',
+DLQ_ATTRIBUTES = {
+    'MessageRetentionPeriod': '1209600',  # 14 dias para investigação
+    'VisibilityTimeout': '180',  # 3 minutos
+}
+
+QUEUE_ATTRIBUTES = {
+    'MessageRetentionPeriod': '86400',  # 24 horas (otimizado)
+    'VisibilityTimeout': '180',  # 3 minutos
+}
+
+MAX_RECEIVE_COUNT = '5'  # Após 5 tentativas, enviar para DLQ
+
+# Tabelas: nome, chaves (partição e classificação, todas string) e atributo de TTL (None = sem TTL)
+TABLES = [
+    (DYNAMODB_TABLE, ['customerId', 'recordId'], None),
+    (MESSAGE_PROCESSOR_TABLE, ['id', 'timestamp'], 'expiryTime'),
+    (DEDUP_TABLE, ['dedupKey'], 'expiryTime'),
+]
+
+# Clientes com timeouts curtos: enquanto o LocalStack sobe, cada verificação falha rápido
+CLIENT_CONFIG = Config(connect_timeout=2, read_timeout=10, retries={'max_attempts': 3, 'mode': 'standard'})
+
+def create_client(service_name):
+    return boto3.client(
+        service_name,
         endpoint_url=AWS_ENDPOINT_URL,
         region_name=AWS_REGION,
         aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        config=CLIENT_CONFIG
     )
-    
-    max_retries = 30
-    retries = 0
-    
-    while retries < max_retries:
+
+def error_code(error):
+    return error.response.get('Error', {}).get('Code', '')
+
+def wait_for_localstack(sqs, dynamodb):
+    """Aguarda até que SQS e DynamoDB da LocalStack respondam, com intervalo exponencial entre as tentativas."""
+    logger.info("Aguardando LocalStack iniciar...")
+
+    deadline = time.time() + SETUP_TIMEOUT_SECONDS
+    delay = 0.1
+    attempt = 0
+
+    while True:
+        attempt += 1
         try:
-            # Tenta listar as filas para verificar se o LocalStack está pronto
             sqs.list_queues()
-            logger.info("LocalStack está pronto!")
+            dynamodb.list_tables(Limit=1)
+            logger.info(f"LocalStack está pronto! ({attempt} tentativas)")
             return True
         except Exception as e:
-            logger.info(f"LocalStack ainda não está pronto. Tentativa {retries+1}/{max_retries}")
-            retries += 1
-            time.sleep(2)
-    
-    logger.error("Timeout aguardando o LocalStack iniciar")
-    return False
-
-def create_sqs_queues():
-    """Cria as filas SQS (principal e DLQ) com configurações otimizadas."""
-    logger.info("Criando filas SQS...")
-    
-    sqs = boto3.client(
-        'sqs',
-        endpoint_url=AWS_ENDPOINT_URL,
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-    )
-    
-    # Criar a fila DLQ primeiro
-    dlq_response = sqs.create_queue(
-        QueueName=DLQ_NAME,
-        Attributes={
-            'MessageRetentionPeriod': '1209600',  # 14 dias para investigação
-            'VisibilityTimeout': '180',  # 3 minutos
-        }
-    )
-    dlq_url = dlq_response['QueueUrl']
-    
+            if time.time() + delay > deadline:
+                logger.error(f"Timeout aguardando o LocalStack iniciar: {str(e)}")
+                return False
+            logger.info(f"LocalStack ainda não está pronto. Nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, SETUP_POLL_MAX_SECONDS)
+
+def ensure_queue(sqs, name, attributes):
+    """
+    Cria a fila ou reconcilia os atributos de uma fila existente. create_queue já é idempotente quando os
+    atributos coincidem; com atributos diferentes o SQS recusa, e eles são atualizados com set_queue_attributes.
+    Retorna a URL da fila.
+    """
+    try:
+        queue_url = sqs.create_queue(QueueName=name, Attributes=attributes)['QueueUrl']
+        logger.info(f"Fila pronta: {queue_url}")
+    except ClientError as e:
+        if error_code(e) not in ('QueueAlreadyExists', 'QueueNameExists',
+                                 'AWS.SimpleQueueService.QueueNameExists'):
+            raise
+        queue_url = sqs.get_queue_url(QueueName=name)['QueueUrl']
+        sqs.set_queue_attributes(QueueUrl=queue_url, Attributes=attributes)
+        logger.info(f"Fila existente com atributos atualizados: {queue_url}")
+    return queue_url
+
+def create_sqs_queues(sqs):
+    """Cria as filas SQS (DLQ primeiro, depois a principal e a prioritária em paralelo). Retorna as URLs."""
+    dlq_url = ensure_queue(sqs, DLQ_NAME, DLQ_ATTRIBUTES)
+
     # Obter o ARN da DLQ
-    dlq_attrs = sqs.get_queue_attributes(
-        QueueUrl=dlq_url,
-        AttributeNames=['QueueArn']
-    )
-    dlq_arn = dlq_attrs['Attributes']['QueueArn']
-    
-    # Criar a fila principal com redrive policy apontando para a DLQ
-    redrive_policy = {
+    dlq_arn = sqs.get_queue_attributes(QueueUrl=dlq_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+
+    # Filas principal e prioritária com redrive policy apontando para a DLQ
+    attributes = dict(QUEUE_ATTRIBUTES, RedrivePolicy=json.dumps({
         'deadLetterTargetArn': dlq_arn,
-        'maxReceiveCount': '5'  # Após 5 tentativas, enviar para DLQ
-    }
-    
-    main_queue_response = sqs.create_queue(
-        QueueName=MAIN_QUEUE_NAME,
-        Attributes={
-            'MessageRetentionPeriod': '86400',  # 24 horas (otimizado)
-            'VisibilityTimeout': '180',  # 3 minutos
-            'RedrivePolicy': json.dumps(redrive_policy)
-        }
-    )
-    main_queue_url = main_queue_response['QueueUrl']
-    
-    logger.info(f"Fila principal criada: {main_queue_url}")
-    logger.info(f"Fila DLQ criada: {dlq_url}")
-    
-    return main_queue_url, dlq_url
-
-def create_dynamodb_tables():
-    """Cria as tabelas DynamoDB para armazenar os dados dos clientes e mensagens processadas."""
-    logger.info("Criando tabelas DynamoDB...")
-    
-    dynamodb = boto3.client(
-        'dynamodb',
-        endpoint_url=AWS_ENDPOINT_URL,
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-    )
-    
-    # Criar tabela para dados de clientes
-    customer_table = dynamodb.create_table(
-        TableName=DYNAMODB_TABLE,
-        KeySchema=[
-            {
-                'AttributeName': 'customerId',
-                'KeyType': 'HASH'  # Chave de partição
-            },
-            {
-                'AttributeName': 'recordId',
-                'KeyType': 'RANGE'  # Chave de classificação
-            }
-        ],
-        AttributeDefinitions=[
-            {
-                'AttributeName': 'customerId',
-                'AttributeType': 'S'  # String
-            },
-            {
-                'AttributeName': 'recordId',
-                'AttributeType': 'S'  # String
-            }
-        ],
-        BillingMode='PAY_PER_REQUEST'  # Modo sob demanda para otimização de custos
-    )
-    
-    logger.info(f"Tabela DynamoDB criada: {DYNAMODB_TABLE}")
-    
-    # Criar tabela para o processador Java
-    message_table = dynamodb.create_table(
-        TableName=MESSAGE_PROCESSOR_TABLE,
-        KeySchema=[
-            {
-                'AttributeName': 'id',
-                'KeyType': 'HASH'  # Chave de partição
-            },
-            {
-                'AttributeName': 'timestamp',
-                'KeyType': 'RANGE'  # Chave de classificação
-            }
-        ],
-        AttributeDefinitions=[
-            {
-                'AttributeName': 'id',
-                'AttributeType': 'S'  # String
-            },
-            {
-                'AttributeName': 'timestamp',
-                'AttributeType': 'S'  # String
-            }
-        ],
-        BillingMode='PAY_PER_REQUEST',  # Modo sob demanda para otimização de custos
-        TimeToLiveSpecification={
-            'Enabled': True,
-            'AttributeName': 'expiryTime'
-        }
+        'maxReceiveCount': MAX_RECEIVE_COUNT
+    }))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        main_future = executor.submit(ensure_queue, sqs, MAIN_QUEUE_NAME, attributes)
+        priority_future = executor.submit(ensure_queue, sqs, PRIORITY_QUEUE_NAME, attributes)
+        return main_future.result(), priority_future.result(), dlq_url
+
+def key_schema(keys):
+    """KeySchema e AttributeDefinitions: a primeira chave é a de partição, a segunda a de classificação."""
+    schema = [{'AttributeName': name, 'KeyType': key_type} for name, key_type in zip(keys, ['HASH', 'RANGE'])]
+    definitions = [{'AttributeName': name, 'AttributeType': 'S'} for name in keys]
+    return schema, definitions
+
+def ensure_table(dynamodb, name, keys, ttl_attribute):
+    """Cria a tabela se não existir, aguarda ficar ACTIVE e habilita o TTL. Retorna o nome da tabela."""
+    schema, definitions = key_schema(keys)
+    try:
+        existing = dynamodb.describe_table(TableName=name)['Table']
+        if existing['KeySchema'] != schema:
+            # As chaves de uma tabela não podem ser alteradas: recriar a tabela é uma decisão manual
+            logger.warning(f"Tabela {name} existe com chaves diferentes: {existing['KeySchema']} (esperado {schema})")
+        logger.info(f"Tabela DynamoDB existente: {name} ({existing['TableStatus']})")
+    except ClientError as e:
+        if error_code(e) != 'ResourceNotFoundException':
+            raise
+        try:
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=schema,
+                AttributeDefinitions=definitions,
+                BillingMode='PAY_PER_REQUEST'  # Modo sob demanda para otimização de custos
+            )
+            logger.info(f"Tabela DynamoDB criada: {name}")
+        except ClientError as e:
+            # Outra execução do setup criou a tabela ao mesmo tempo
+            if error_code(e) != 'ResourceInUseException':
+                raise
+
+    dynamodb.get_waiter('table_exists').wait(TableName=name, WaiterConfig={'Delay': 1, 'MaxAttempts': 60})
+
+    if ttl_attribute:
+        ensure_time_to_live(dynamodb, name, ttl_attribute)
+    return name
+
+def ensure_time_to_live(dynamodb, name, attribute):
+    """Habilita o TTL no atributo informado, se ainda não estiver (create_table não aceita essa configuração)."""
+    current = dynamodb.describe_time_to_live(TableName=name)['TimeToLiveDescription']
+    if current.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING') and current.get('AttributeName') == attribute:
+        return
+    dynamodb.update_time_to_live(
+        TableName=name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute}
     )
-    
-    logger.info(f"Tabela DynamoDB para processador Java criada: {MESSAGE_PROCESSOR_TABLE}")
-    
-    return customer_table, message_table
+    logger.info(f"TTL habilitado na tabela {name}: {attribute}")
 
 def main():
-    """Função principal que configura todos os recursos necessários."""
-    if not wait_for_localstack():
-        return
-    
+    """Função principal que configura todos os recursos necessários em paralelo."""
+    started = time.time()
+    sqs = create_client('sqs')
+    dynamodb = create_client('dynamodb')
+
+    if not wait_for_localstack(sqs, dynamodb):
+        sys.exit(1)
+
     try:
-        main_queue_url, dlq_url = create_sqs_queues()
-        customer_table, message_table = create_dynamodb_tables()
-        
-        logger.info("Configuração concluída com sucesso!")
+        with ThreadPoolExecutor(max_workers=len(TABLES) + 1) as executor:
+            queues = executor.submit(create_sqs_queues, sqs)
+            tables = [executor.submit(ensure_table, dynamodb, name, keys, ttl) for name, keys, ttl in TABLES]
+            main_queue_url, priority_queue_url, dlq_url = queues.result()
+            for table in tables:
+                table.result()
+
+        logger.info(f"Configuração concluída com sucesso em {time.time() - started:.1f}s!")
     except Exception as e:
         logger.error(f"Erro durante a configuração: {str(e)}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
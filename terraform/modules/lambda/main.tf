@@ -85,6 +85,8 @@ resource "aws_iam_role_policy_attachment" "lambda_policy_attachment" {
 }
 
 # Create Lambda function package
+# The function directory holds the Python consumer: docker/lambda-consumer/*.py and docker/common/*.py,
+# the same files the consumer image copies, plus its requirements installed alongside them
 data "archive_file" "lambda_package" {
   type        = "zip"
   source_dir  = "${path.module}/function"
@@ -100,8 +102,8 @@ resource "aws_lambda_function" "processor" {
   source_code_hash = data.archive_file.lambda_package.output_base64sha256
   
   role    = aws_iam_role.lambda_role.arn
-  handler = "index.handler"
-  runtime = "nodejs16.x"
+  handler = "consumer.handler"
+  runtime = "python3.9"
   
   # Optimization: Optimized memory size for cost/performance
   memory_size = var.memory_size
@@ -120,13 +122,17 @@ resource "aws_lambda_function" "processor" {
   
   # Environment variables
   environment {
-    variables = {
-      ECS_CLUSTER_NAME = var.ecs_cluster_name
-      ECS_TASK_DEFINITION = var.ecs_task_definition
-      ECS_CONTAINER_NAME = var.ecs_container_name
-      ECS_SUBNET_IDS = join(",", var.subnet_ids)
-      ECS_SECURITY_GROUP_IDS = join(",", var.security_group_ids)
-    }
+    variables = merge(
+      {
+        ECS_CLUSTER_NAME = var.ecs_cluster_name
+        ECS_TASK_DEFINITION = var.ecs_task_definition
+        ECS_CONTAINER_NAME = var.ecs_container_name
+        ECS_SUBNET_IDS = join(",", var.subnet_ids)
+        ECS_SECURITY_GROUP_IDS = join(",", var.security_group_ids)
+      },
+      # Endpoint of the Java Processor called by the handler (consumer default when empty)
+      var.ecs_service_url != "" ? { ECS_SERVICE_URL = var.ecs_service_url } : {}
+    )
   }
   
   # Tags for cost tracking
@@ -156,6 +162,9 @@ resource "aws_lambda_event_source_mapping" "sqs_event_source" {
   
   # Optimization: Maximum batch window to allow batching of messages
   maximum_batching_window_in_seconds = var.maximum_batching_window_in_seconds
+  
+  # Optimization: Partial batch responses, only failed records (batchItemFailures) are retried
+  function_response_types = ["ReportBatchItemFailures"]
 }
 
 # CloudWatch Alarm for Lambda errors
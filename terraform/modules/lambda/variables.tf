@@ -84,6 +84,12 @@ variable "ecs_container_name" {
   default     = "message-processor"
 }
 
+variable "ecs_service_url" {
+  description = "URL of the Java Processor /process endpoint called by the Python handler"
+  type        = string
+  default     = ""
+}
+
 variable "alarm_actions" {
   description = "List of ARNs to execute when the alarm transitions to ALARM state"
   type        = list(string)